@@ -3,10 +3,11 @@ AgentQ 기본 에이전트 구현
 Plan → Thought → Action → Explanation → Critique 루프
 """
 
-import asyncio
 from typing import Optional, Dict, Any
 from agentq.models import AgentState, Action, ActionType, AgentResponse
 from agentq.skills import execute_action, get_page_info, extract_text_content
+from agentq.playwright_helper import get_current_page
+from agentq.waits import wait_for_network_idle
 
 
 class AgentQ:
@@ -56,8 +57,10 @@ class AgentQ:
                 if self.state.done:
                     break
                     
-                # 다음 루프를 위한 짧은 대기
-                await asyncio.sleep(1)
+                # 다음 루프 전에 직전 액션의 네트워크 활동이 잦아들기를 대기
+                page = await get_current_page()
+                if page:
+                    await wait_for_network_idle(page)
             
             # 최종 결과
             if self.state.done:
@@ -0,0 +1,120 @@
+"""
+서비스 모드용 브라우저 컨텍스트 풀
+브라우저 하나에 격리된 컨텍스트(+페이지)를 미리 띄워 두고 세션마다 하나씩 빌려줌.
+반납된 컨텍스트는 쿠키/스토리지가 남지 않도록 닫고, 새 컨텍스트를 백그라운드로 채워 넣음
+"""
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from playwright.async_api import Browser, Page, Playwright, async_playwright
+
+from agentq.network_filter import NetworkFilter, NetworkPolicy
+from agentq.playwright_helper import attach_route_layers
+from agentq.resource_cache import ResourceCache
+from agentq.startup import get_startup_profile
+from agentq.waits import track_page
+
+BROWSER_POOL_SIZE = int(os.getenv("AGENTQ_BROWSER_POOL_SIZE", "2"))
+
+
+class BrowserPool:
+    """미리 만든 컨텍스트를 asyncio.Queue로 나눠 주는 풀 (크기 = 동시에 실행할 수 있는 세션 수)"""
+
+    def __init__(
+        self,
+        size: int = BROWSER_POOL_SIZE,
+        headless: bool = True,
+        network_policy: Optional[NetworkPolicy] = None,
+        resource_cache: Optional[ResourceCache] = None
+    ):
+        self.size = size
+        self.headless = headless
+        self.network_filter = NetworkFilter(network_policy) if network_policy else None
+        # 모든 컨텍스트가 같은 디스크 캐시를 씀 (컨텍스트를 새로 만들어도 번들/CSS를 다시 받지 않음)
+        self.resource_cache = resource_cache
+        self._resource_counters: Dict[Page, Dict[str, Any]] = {}
+        self.playwright: Optional[Playwright] = None
+        self.browser: Optional[Browser] = None
+        self._idle: "asyncio.Queue[Page]" = asyncio.Queue()
+        self._in_use: Set[Page] = set()
+        self._refills: Set[asyncio.Task] = set()
+        self.stats = {"acquired": 0, "recycled": 0, "refill_errors": 0, "acquire_wait_s": 0.0, "max_acquire_wait_s": 0.0}
+
+    async def start(self):
+        """브라우저를 띄우고 풀 크기만큼 컨텍스트를 미리 생성"""
+        profile = get_startup_profile()
+        with profile.phase("Playwright 시작"):
+            self.playwright = await async_playwright().start()
+        with profile.phase("Chromium 실행"):
+            self.browser = await self.playwright.chromium.launch(
+                headless=self.headless,
+                args=['--no-sandbox', '--disable-dev-shm-usage']
+            )
+        with profile.phase(f"컨텍스트 {self.size}개 준비"):
+            pages = await asyncio.gather(*(self._new_page() for _ in range(self.size)))
+        for page in pages:
+            self._idle.put_nowait(page)
+        print(f"🧊 브라우저 컨텍스트 풀 준비 완료 ({self.size}개, headless: {self.headless})")
+
+    async def _new_page(self) -> Page:
+        context = await self.browser.new_context()
+        counters = await attach_route_layers(context, network_filter=self.network_filter, resource_cache=self.resource_cache)
+        page = await context.new_page()
+        if counters is not None:
+            self._resource_counters[page] = counters
+        track_page(page)
+        return page
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Page]:
+        """빈 컨텍스트가 생길 때까지 기다렸다가 페이지를 빌려줌 (블록을 벗어나면 폐기 후 새로 채움)"""
+        waited = time.perf_counter()
+        page = await self._idle.get()
+        waited = time.perf_counter() - waited
+        self._in_use.add(page)
+        self.stats["acquired"] += 1
+        self.stats["acquire_wait_s"] += waited
+        self.stats["max_acquire_wait_s"] = max(self.stats["max_acquire_wait_s"], waited)
+        try:
+            yield page
+        finally:
+            self._in_use.discard(page)
+            task = asyncio.create_task(self._recycle(page))
+            self._refills.add(task)
+            task.add_done_callback(self._refills.discard)
+
+    def resource_counters(self, page: Page) -> Optional[Dict[str, Any]]:
+        """빌려준 페이지(컨텍스트)의 리소스 캐시 통계 (캐시를 안 쓰면 None)"""
+        return self._resource_counters.get(page)
+
+    async def _recycle(self, page: Page):
+        self._resource_counters.pop(page, None)
+        try:
+            await page.context.close()
+        except Exception:
+            pass
+        try:
+            self._idle.put_nowait(await self._new_page())
+            self.stats["recycled"] += 1
+        except Exception as e:
+            # 브라우저가 죽었으면 풀이 줄어든 채로 남음 (health에서 idle/size로 확인)
+            self.stats["refill_errors"] += 1
+            print(f"❌ 브라우저 컨텍스트 재생성 실패: {e}")
+
+    def summary(self) -> Dict[str, float]:
+        return {"size": self.size, "idle": self._idle.qsize(), "in_use": len(self._in_use), **self.stats}
+
+    async def close(self):
+        for task in list(self._refills):
+            task.cancel()
+        await asyncio.gather(*self._refills, return_exceptions=True)
+        if self.browser:
+            await self.browser.close()
+        if self.playwright:
+            await self.playwright.stop()
+        self.browser = None
+        self.playwright = None
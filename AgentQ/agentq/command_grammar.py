@@ -0,0 +1,208 @@
+"""
+커맨드 언어 문법 (NAVIGATE/SEARCH/CLICK/TYPE/... 한 줄 커맨드 → 액션 dict)
+키워드 앞 두 글자로 커맨드 계열을 고른 뒤 그 계열의 규칙을 하나로 묶어 미리 컴파일한 정규식을
+한 번만 매칭함. 규칙과 우선순위는 기존 re.match 연쇄와 같아 같은 액션 dict를 만들고,
+매칭되지 않으면 어느 부분이 잘못됐는지 위치(span)와 함께 오류를 돌려줌
+"""
+
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# (규칙 이름, 패턴) — 계열 안에서는 기존 연쇄와 같은 순서로 시도됨
+_RULES: Dict[str, List[Tuple[str, str]]] = {
+    "NAVIGATE": [
+        ("nav_angle", r'(?:GOTO|GO TO|NAVIGATE)\s*\[\s*URL\s*=\s*<(?P<nav_angle_url>[^>\]]+)>\s*\]\s*$'),
+        ("nav_bracket", r'(?:GOTO|GO TO|NAVIGATE)\s*\[\s*URL\s*=\s*(?P<nav_bracket_url>[^\]\s]+)\s*\]\s*$'),
+        ("nav_bare", r'(?:GOTO|GO TO|NAVIGATE)\s+(?P<nav_bare_url>https?://\S+)\s*$'),
+        ("nav_colon", r'(?:NAVIGATE|GOTO)\s*:\s*(?P<nav_colon_url>.+)$'),
+    ],
+    "SEARCH": [
+        ("search", r'SEARCH\s*(?:\[\s*(?:TEXT\s*=\s*)?(?P<search_bracket>[^\]]+?)\s*\]|:\s*(?P<search_colon>[^\n\r#]+?)\s*$)'),
+    ],
+    "CLICK": [
+        ("click_bracket", r'CLICK\s*\[\s*(?:ID|SELECTOR)?\s*=\s*(?P<click_bracket_target>[^\]]+)\s*\]\s*$'),
+        ("click_colon", r'CLICK\s*:\s*(?P<click_colon_target>.+)$'),
+    ],
+    "TYPE": [
+        ("type_bracket", r'TYPE\s*\[\s*(?P<type_bracket_target>[^\]]+)\s*\]\s*\[\s*(?:TEXT\s*=\s*)?(?P<type_bracket_text>[^\]]+)\s*\]\s*$'),
+        ("type_colon", r'TYPE\s*:\s*(?P<type_colon_target>.+?)\s*\|\|\s*(?P<type_colon_text>.+)$'),
+    ],
+    "SUBMIT": [
+        ("submit", r'SUBMIT\s*\[\s*ID\s*=\s*(?P<submit_target>[^\]]+)\s*\]\s*$'),
+    ],
+    "CLEAR": [
+        ("clear", r'CLEAR\s*\[\s*ID\s*=\s*(?P<clear_target>[^\]]+)\s*\]\s*$'),
+    ],
+    "SCROLL": [
+        ("scroll_bracket", r'SCROLL\s*\[\s*(?P<scroll_bracket_dir>UP|DOWN)\s*\]\s*$'),
+        ("scroll_colon", r'SCROLL\s*:\s*(?P<scroll_colon_dir>up|down)\s*$'),
+    ],
+    "GET_DOM": [
+        ("get_dom", r'(?:GET[_\s-]?DOM)\s*$'),
+    ],
+    "SCREENSHOT": [
+        ("screenshot", r'SCREENSHOT(?:\s*\[\s*PATH\s*=\s*(?P<screenshot_path>[^\]]+)\s*\])?\s*$'),
+    ],
+    "WAIT": [
+        ("wait_colon", r'WAIT\s*:\s*(?P<wait_colon_seconds>\d+)\s*$'),
+        ("wait_bracket", r'WAIT\s*\[\s*SECONDS\s*=\s*(?P<wait_bracket_seconds>\d+)\s*\]\s*$'),
+    ],
+    "ASK_USER_HELP": [
+        ("ask", r'ASK\s*USER\s*HELP\s*\[\s*TEXT\s*=\s*(?P<ask_text>.+?)\s*\]\s*$'),
+    ],
+}
+
+# 오류 메시지에 보여 줄 계열별 문법 (프롬프트의 Action Grammar와 같은 표기)
+USAGE = {
+    "NAVIGATE": "GOTO [URL=<http(s)://...>]",
+    "SEARCH": "SEARCH [TEXT=<query>]",
+    "CLICK": "CLICK [ID=<data-agentq-id>]",
+    "TYPE": "TYPE [ID=<data-agentq-id>] [TEXT=<free text>]",
+    "SUBMIT": "SUBMIT [ID=<data-agentq-id>]",
+    "CLEAR": "CLEAR [ID=<data-agentq-id>]",
+    "SCROLL": "SCROLL [UP|DOWN]",
+    "GET_DOM": "GET_DOM",
+    "SCREENSHOT": "SCREENSHOT [PATH=<filename.png>]",
+    "WAIT": "WAIT [SECONDS=<int>]",
+    "ASK_USER_HELP": "ASK USER HELP [TEXT=<question>]",
+}
+
+# 키워드 앞 두 글자 → 후보 계열 (모든 규칙이 키워드 리터럴로 시작하므로 계열끼리는 겹치지 않음)
+_FAMILIES_BY_PREFIX = {
+    "GO": ["NAVIGATE"], "NA": ["NAVIGATE"], "SE": ["SEARCH"], "CL": ["CLICK", "CLEAR"],
+    "TY": ["TYPE"], "SU": ["SUBMIT"], "SC": ["SCROLL", "SCREENSHOT"], "GE": ["GET_DOM"],
+    "WA": ["WAIT"], "AS": ["ASK_USER_HELP"],
+}
+_COMPILED = {
+    prefix: re.compile(
+        "|".join(f"(?P<{name}>{pattern})" for family in families for name, pattern in _RULES[family]),
+        re.I
+    )
+    for prefix, families in _FAMILIES_BY_PREFIX.items()
+}
+# 오류 위치 진단용 계열별 키워드
+_KEYWORDS = [
+    (family, re.compile(pattern, re.I)) for family, pattern in (
+        ("NAVIGATE", r'(?:GOTO|GO TO|NAVIGATE)\b'), ("SEARCH", r'SEARCH\b'), ("CLICK", r'CLICK\b'),
+        ("TYPE", r'TYPE\b'), ("SUBMIT", r'SUBMIT\b'), ("CLEAR", r'CLEAR\b'), ("SCROLL", r'SCROLL\b'),
+        ("GET_DOM", r'GET[_\s-]?DOM\b'), ("SCREENSHOT", r'SCREENSHOT\b'), ("WAIT", r'WAIT\b'),
+        ("ASK_USER_HELP", r'ASK\s*USER\s*HELP\b'),
+    )
+]
+_WORD = re.compile(r'\S+')
+_ID_PREFIX = re.compile(r'^ID\s*=\s*(.+)$', re.I)
+# SEARCH 질의 끝의 괄호/마침표/주석 꼬리 정리
+_SEARCH_TAIL_PAREN = re.compile(r'\s*\(.*?\)\s*$')
+_SEARCH_TAIL_PUNCT = re.compile(r'\s*[\.\)]\s*$')
+_SEARCH_TAIL_COMMENT = re.compile(r'\s+#.*$')
+_MULTI_SPACE = re.compile(r'\s{2,}')
+
+
+class CommandError(NamedTuple):
+    """잘못된 커맨드의 오류 (start/end는 원래 문자열 기준 위치)"""
+    message: str
+    start: int
+    end: int
+
+    def render(self, command: str) -> str:
+        """커맨드 아래에 ^^^로 오류 위치 표시"""
+        return f"{command}\n{' ' * self.start}{'^' * max(1, self.end - self.start)} {self.message}"
+
+
+class ParsedCommand(NamedTuple):
+    command: str
+    action: Optional[Dict[str, Any]]
+    error: Optional[CommandError] = None
+
+
+def _id_or_selector(action_type: str, target: str, **extra) -> Dict[str, Any]:
+    target = target.strip()
+    id_match = _ID_PREFIX.match(target)
+    if id_match:
+        return {"type": action_type, "target": id_match.group(1).strip(), **extra, "by": "agentq-id"}
+    return {"type": action_type, "target": target, **extra}
+
+
+def _build_action(rule: str, m: "re.Match") -> Dict[str, Any]:
+    g = m.group
+    if rule.startswith("nav_"):
+        return {"type": "NAVIGATE", "target": g(f"{rule}_url").strip()}
+    if rule == "search":
+        q = (g("search_bracket") or g("search_colon") or "").strip()
+        q = _SEARCH_TAIL_PAREN.sub('', q)
+        q = _SEARCH_TAIL_PUNCT.sub('', q)
+        q = _SEARCH_TAIL_COMMENT.sub('', q)
+        q = _MULTI_SPACE.sub(' ', q).strip()
+        return {"type": "SEARCH", "content": q}
+    if rule.startswith("click_"):
+        return _id_or_selector("CLICK", g(f"{rule}_target"))
+    if rule.startswith("type_"):
+        return _id_or_selector("TYPE", g(f"{rule}_target"), content=g(f"{rule}_text").strip())
+    if rule in ("submit", "clear"):
+        return {"type": rule.upper(), "target": g(f"{rule}_target").strip(), "by": "agentq-id"}
+    if rule.startswith("scroll_"):
+        return {"type": "SCROLL", "target": g(f"{rule}_dir").lower()}
+    if rule == "get_dom":
+        return {"type": "GET_DOM"}
+    if rule == "screenshot":
+        return {"type": "SCREENSHOT", "target": (g("screenshot_path") or "screenshot.png").strip()}
+    if rule.startswith("wait_"):
+        return {"type": "WAIT", "content": g(f"{rule}_seconds").strip()}
+    return {"type": "ASK_USER_HELP", "content": g("ask_text").strip()}
+
+
+def _diagnose(c: str) -> Tuple[str, int, int]:
+    """매칭 실패 원인과 위치 (c는 앞뒤 공백을 뺀 커맨드)"""
+    family, keyword_end = next(((f, m.end()) for f, kw in _KEYWORDS for m in [kw.match(c)] if m), (None, 0))
+    if family is None:
+        word = _WORD.match(c)
+        return f"알 수 없는 커맨드 '{word.group()}'", 0, word.end()
+    usage = f"(형식: {USAGE[family]})"
+
+    depth, opened, closed = 0, -1, -1
+    for i, ch in enumerate(c):
+        if ch == "[":
+            if depth == 0:
+                opened = i
+            depth += 1
+        elif ch == "]":
+            if depth == 0:
+                return f"여는 '[' 없이 닫힘 {usage}", i, i + 1
+            depth -= 1
+            closed = i
+    if depth:
+        return f"닫는 ']' 없음 {usage}", opened, len(c)
+    rest = c[closed + 1:]
+    if closed >= 0 and rest.strip() and not rest.lstrip().startswith("["):
+        tail = len(c) - len(rest.lstrip())
+        return f"커맨드 뒤에 남는 텍스트 {usage}", tail, len(c)
+
+    argument_start = len(c) - len(c[keyword_end:].lstrip())
+    if argument_start >= len(c):
+        return f"인자가 없음 {usage}", 0, keyword_end
+    return f"인자 형식이 맞지 않음 {usage}", argument_start, len(c)
+
+
+def parse_command(cmd: str) -> ParsedCommand:
+    """커맨드 한 줄 파싱 (빈 문자열이면 action/error 모두 None)"""
+    if not cmd:
+        return ParsedCommand(cmd, None)
+    c = cmd.strip()
+    offset = len(cmd) - len(cmd.lstrip())
+    compiled = _COMPILED.get(c[:2].upper())
+    m = compiled.match(c) if compiled else None
+    if m:
+        return ParsedCommand(cmd, _build_action(m.lastgroup, m))
+    if not c:
+        return ParsedCommand(cmd, None, CommandError("빈 커맨드", 0, len(cmd)))
+    message, start, end = _diagnose(c)
+    return ParsedCommand(cmd, None, CommandError(message, offset + start, offset + end))
+
+
+def parse_commands(cmds: List[str]) -> List[ParsedCommand]:
+    """후보 커맨드 목록을 한 번에 파싱 (같은 커맨드는 한 번만)"""
+    parsed: Dict[str, ParsedCommand] = {}
+    for cmd in cmds:
+        if cmd not in parsed:
+            parsed[cmd] = parse_command(cmd)
+    return [parsed[cmd] for cmd in cmds]
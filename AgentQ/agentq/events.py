@@ -0,0 +1,92 @@
+"""
+AgentQ 실행 이벤트 타입
+AgentQExecutor.iter_events가 내보내는 이벤트로, 서비스 모드(server.py)에서는 그대로 SSE로 전달됨
+"""
+
+import json
+import time
+from typing import Any, Dict, Literal, Optional, Union
+
+from pydantic import BaseModel, Field
+
+# 이벤트 출력에 담을 값의 최대 길이 (스크래치패드 등 큰 값은 잘라서 전달)
+EVENT_VALUE_MAX_CHARS = 500
+
+
+class AgentEvent(BaseModel):
+    """모든 이벤트의 공통 필드"""
+    type: str
+    session_id: str
+    ts: float = Field(default_factory=time.time)
+
+    def to_sse(self) -> bytes:
+        """Server-Sent Events 한 건으로 직렬화"""
+        return f"event: {self.type}\ndata: {self.model_dump_json()}\n\n".encode("utf-8")
+
+
+class RunStarted(AgentEvent):
+    type: Literal["run_started"] = "run_started"
+    objective: str
+    max_loops: int
+
+
+class NodeStarted(AgentEvent):
+    type: Literal["node_started"] = "node_started"
+    node: str
+
+
+class NodeFinished(AgentEvent):
+    type: Literal["node_finished"] = "node_finished"
+    node: str
+    duration_s: float
+    error: Optional[str] = None
+
+
+class NodeOutput(AgentEvent):
+    """노드가 상태에 반영한 값 (긴 값은 잘림)"""
+    type: Literal["node_output"] = "node_output"
+    node: str
+    output: Dict[str, Any]
+
+
+class ActionResult(AgentEvent):
+    type: Literal["action_result"] = "action_result"
+    loop: int
+    action: Optional[Dict[str, Any]] = None
+    observation: str
+
+
+class TokenUsage(AgentEvent):
+    """LLM 호출 한 번의 토큰 사용량"""
+    type: Literal["token_usage"] = "token_usage"
+    model: Optional[str] = None
+    input_tokens: int
+    output_tokens: int
+    duration_s: float
+
+
+class RunFinished(AgentEvent):
+    type: Literal["run_finished"] = "run_finished"
+    status: Literal["done", "incomplete", "cancelled", "error"]
+    loop_count: int = 0
+    explanation: Optional[str] = None
+    error: Optional[str] = None
+    duration_s: float = 0.0
+
+
+Event = Union[RunStarted, NodeStarted, NodeFinished, NodeOutput, ActionResult, TokenUsage, RunFinished]
+
+
+def compact_value(value: Any) -> Any:
+    """JSON으로 보낼 수 있게 바꾸고 긴 문자열은 잘라냄"""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        return value if len(value) <= EVENT_VALUE_MAX_CHARS else value[:EVENT_VALUE_MAX_CHARS] + "..."
+    try:
+        text = json.dumps(value, ensure_ascii=False, default=str)
+    except (TypeError, ValueError):
+        return compact_value(str(value))
+    if len(text) <= EVENT_VALUE_MAX_CHARS:
+        return json.loads(text)
+    return text[:EVENT_VALUE_MAX_CHARS] + "..."
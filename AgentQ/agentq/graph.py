@@ -2,16 +2,32 @@
 LangGraph 그래프 정의 및 에이전트 실행 로직
 """
 
+import asyncio
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, Optional
 from langgraph.graph import StateGraph, START, END
+from agentq import nodes
+from agentq.events import (
+    ActionResult, Event, NodeFinished, NodeOutput, NodeStarted, RunFinished, RunStarted, TokenUsage, compact_value
+)
+from agentq.startup import get_startup_profile
 from agentq.state import AgentState
+from agentq.tracing import Span, Tracer, end_trace, start_trace
 from agentq.nodes import (
     plan_node, thought_node, action_node, 
-    explanation_node, critique_node, should_continue
+    explanation_node, critique_node, reflect_node, should_continue
 )
 
 
-def create_agentq_graph() -> StateGraph:
-    """AgentQ LangGraph 생성"""
+def create_agentq_graph(fused_reflection: Optional[bool] = None) -> StateGraph:
+    """AgentQ LangGraph 생성
+
+    fused_reflection: True면 explanation/critique 대신 reflect 노드 하나로 액션 결과를 해석·평가
+    (None이면 nodes.ENABLE_FUSED_REFLECTION / AGENTQ_FUSED_REFLECTION 설정을 따름)
+    """
+    if fused_reflection is None:
+        fused_reflection = nodes.ENABLE_FUSED_REFLECTION
     
     # StateGraph 초기화
     graph = StateGraph(AgentState)
@@ -20,8 +36,11 @@ def create_agentq_graph() -> StateGraph:
     graph.add_node("plan_node", plan_node)
     graph.add_node("thought_node", thought_node)
     graph.add_node("action_node", action_node)
-    graph.add_node("explanation_node", explanation_node)
-    graph.add_node("critique_node", critique_node)
+    if fused_reflection:
+        graph.add_node("reflect_node", reflect_node)
+    else:
+        graph.add_node("explanation_node", explanation_node)
+        graph.add_node("critique_node", critique_node)
     
     # 엣지 연결
     # START → Plan (처음 한 번만)
@@ -33,15 +52,21 @@ def create_agentq_graph() -> StateGraph:
     # Thought → Action (사고 후 행동)
     graph.add_edge("thought_node", "action_node")
     
-    # Action → Explanation (행동 후 설명)
-    graph.add_edge("action_node", "explanation_node")
-    
-    # Explanation → Critique (설명 후 평가)
-    graph.add_edge("explanation_node", "critique_node")
+    if fused_reflection:
+        # Action → Reflect (설명과 평가를 한 번에) → 조건부 분기
+        graph.add_edge("action_node", "reflect_node")
+        last_node = "reflect_node"
+    else:
+        # Action → Explanation (행동 후 설명)
+        graph.add_edge("action_node", "explanation_node")
+
+        # Explanation → Critique (설명 후 평가)
+        graph.add_edge("explanation_node", "critique_node")
+        last_node = "critique_node"
     
-    # Critique → 조건부 분기 (완료 여부에 따라)
+    # Critique/Reflect → 조건부 분기 (완료 여부에 따라)
     graph.add_conditional_edges(
-        "critique_node",
+        last_node,
         should_continue,
         {
             "thought": "thought_node",  # 계속하는 경우 다시 사고 단계로
@@ -51,24 +76,31 @@ def create_agentq_graph() -> StateGraph:
     
     return graph
 
+# 노드 이벤트로 내보낼 스팬 이름 (nodes.py의 @traced 이름)
+NODE_SPANS = {"plan", "thought", "action", "explanation", "critique", "reflect"}
+
 
 class AgentQExecutor:
     """AgentQ 실행기"""
     
-    def __init__(self):
-        self.graph = create_agentq_graph()
+    def __init__(self, fused_reflection: Optional[bool] = None):
+        self.graph = create_agentq_graph(fused_reflection)
         self.compiled_graph = None
+        # 마지막 실행의 스팬 기록 (trace_path를 준 실행만)
+        self.last_trace: Tracer = None
     
     def compile(self):
         """그래프 컴파일"""
-        self.compiled_graph = self.graph.compile()
+        with get_startup_profile().phase("그래프 컴파일"):
+            self.compiled_graph = self.graph.compile()
         print("✅ AgentQ 그래프가 컴파일되었습니다.")
     
     async def execute(
         self, 
         user_input: str, 
         max_loops: int = 5,
-        session_id: str = None
+        session_id: str = None,
+        trace_path: str = None
     ) -> AgentState:
         """AgentQ 실행"""
         
@@ -85,6 +117,10 @@ class AgentQExecutor:
         print(f"🎯 AgentQ 실행 시작: {user_input}")
         print("=" * 60)
         
+        # trace_path가 있으면 노드/LLM/CDP 스팬을 기록해 실행 종료 시 JSONL로 저장
+        if trace_path:
+            self.last_trace = start_trace(session_id, trace_path)
+
         try:
             # 그래프 실행
             final_state = await self.compiled_graph.ainvoke(initial_state)
@@ -106,47 +142,141 @@ class AgentQExecutor:
             initial_state["last_error"] = str(e)
             initial_state["explanation"] = f"실행 중 오류가 발생했습니다: {str(e)}"
             return initial_state
+        finally:
+            nodes.end_session(initial_state)
+            if trace_path:
+                end_trace()
     
     async def stream_execute(
         self, 
         user_input: str, 
         max_loops: int = 5,
-        session_id: str = None
+        session_id: str = None,
+        trace_path: str = None
     ):
         """AgentQ 스트리밍 실행 (중간 과정 실시간 출력)"""
         
-        if not self.compiled_graph:
-            self.compile()
-        
-        # 초기 상태 생성
-        initial_state = AgentState.create_initial_state(
-            user_input=user_input,
-            max_loops=max_loops,
-            session_id=session_id
-        )
-        
         print(f"🎯 AgentQ 스트리밍 실행 시작: {user_input}")
         print("=" * 60)
         
         try:
-            # 스트리밍 실행
-            async for event in self.compiled_graph.astream(initial_state):
-                # 각 노드 실행 결과를 실시간으로 출력
-                for node_name, node_output in event.items():
-                    print(f"\n🔄 노드 '{node_name}' 완료")
-                    if isinstance(node_output, dict):
-                        for key, value in node_output.items():
-                            if value and len(str(value)) > 100:
-                                print(f"   {key}: {str(value)[:100]}...")
-                            else:
-                                print(f"   {key}: {value}")
+            # 노드 출력 이벤트를 실시간으로 출력
+            async for event in self.iter_events(user_input, max_loops, session_id, trace_path):
+                if isinstance(event, NodeOutput):
+                    print(f"\n🔄 노드 '{event.node}_node' 완료")
+                    for key, value in event.output.items():
+                        if value and len(str(value)) > 100:
+                            print(f"   {key}: {str(value)[:100]}...")
+                        else:
+                            print(f"   {key}: {value}")
                     print("-" * 40)
+                elif isinstance(event, RunFinished) and event.status == "error":
+                    raise RuntimeError(event.error)
             
             print("\n" + "=" * 60)
             print("🎉 AgentQ 스트리밍 실행 완료!")
             
         except Exception as e:
             print(f"\n❌ AgentQ 스트리밍 실행 중 오류 발생: {str(e)}")
+
+    async def iter_events(
+        self,
+        user_input: str,
+        max_loops: int = 5,
+        session_id: str = None,
+        trace_path: str = None
+    ) -> AsyncIterator[Event]:
+        """AgentQ 실행을 타입 있는 이벤트 스트림으로 반환
+
+        노드 시작/종료와 LLM 토큰 사용량은 스팬 리스너에서, 노드 출력과 액션 결과는
+        compiled_graph.astream의 updates에서 만들어 하나의 큐로 합칩니다.
+        소비자가 중간에 멈추면(aclose/취소) 실행 중인 그래프도 취소됩니다.
+        """
+        if not self.compiled_graph:
+            self.compile()
+
+        session_id = session_id or uuid.uuid4().hex[:12]
+        initial_state = AgentState.create_initial_state(
+            user_input=user_input,
+            max_loops=max_loops,
+            session_id=session_id
+        )
+        queue: "asyncio.Queue[Optional[Event]]" = asyncio.Queue()
+
+        def on_span(phase: str, current: Span):
+            if current.name in NODE_SPANS:
+                if phase == "start":
+                    queue.put_nowait(NodeStarted(session_id=session_id, node=current.name))
+                else:
+                    queue.put_nowait(NodeFinished(
+                        session_id=session_id, node=current.name,
+                        duration_s=current.duration_s or 0.0, error=current.error
+                    ))
+            elif current.name == "llm" and phase == "end":
+                queue.put_nowait(TokenUsage(
+                    session_id=session_id, model=current.attrs.get("model"),
+                    input_tokens=current.input_tokens, output_tokens=current.output_tokens,
+                    duration_s=current.duration_s or 0.0
+                ))
+
+        async def run():
+            started = time.perf_counter()
+            tracer = start_trace(session_id, trace_path)
+            tracer.listeners.append(on_span)
+            if trace_path:
+                self.last_trace = tracer
+            state: Dict[str, Any] = dict(initial_state)
+            queue.put_nowait(RunStarted(session_id=session_id, objective=user_input, max_loops=max_loops))
+            try:
+                async for mode, chunk in self.compiled_graph.astream(initial_state, stream_mode=["updates", "values"]):
+                    if mode == "values":
+                        state = chunk
+                        continue
+                    for node_name, output in chunk.items():
+                        node = node_name.removesuffix("_node")
+                        output = output or {}
+                        queue.put_nowait(NodeOutput(
+                            session_id=session_id, node=node,
+                            output={key: compact_value(value) for key, value in output.items()}
+                        ))
+                        if node == "action":
+                            queue.put_nowait(ActionResult(
+                                session_id=session_id, loop=state.get("loop_count", 0),
+                                action=compact_value(state.get("action")), observation=output.get("observation") or ""
+                            ))
+                queue.put_nowait(RunFinished(
+                    session_id=session_id, status="done" if state.get("done") else "incomplete",
+                    loop_count=state.get("loop_count", 0), explanation=state.get("explanation"),
+                    error=state.get("last_error"), duration_s=time.perf_counter() - started
+                ))
+            except asyncio.CancelledError:
+                queue.put_nowait(RunFinished(
+                    session_id=session_id, status="cancelled",
+                    loop_count=state.get("loop_count", 0), duration_s=time.perf_counter() - started
+                ))
+                raise
+            except Exception as e:
+                queue.put_nowait(RunFinished(
+                    session_id=session_id, status="error", loop_count=state.get("loop_count", 0),
+                    error=str(e), duration_s=time.perf_counter() - started
+                ))
+            finally:
+                nodes.end_session(initial_state)
+                end_trace()
+                queue.put_nowait(None)
+
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield event
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
     
     def get_graph_visualization(self) -> str:
         """그래프 구조 시각화 (텍스트)"""
@@ -175,6 +305,7 @@ CRITIQUE (완료 여부 평가)
 - ACTION: 웹 상호작용 실행 (클릭, 입력, 검색 등)
 - EXPLANATION: 액션 결과 해석 및 의미 분석
 - CRITIQUE: 목표 달성 여부 판단 및 루프 제어
+- (fused 모드) REFLECT: EXPLANATION + CRITIQUE를 한 번의 LLM 호출로 수행
 """
 
 
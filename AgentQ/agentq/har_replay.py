@@ -0,0 +1,101 @@
+"""
+HAR 기반 웹 환경 재생
+record 모드에서 Playwright가 저장한 HAR(본문 embed)를 page.route로 그대로 돌려줘
+네트워크 없이 결정적으로 태스크를 재실행할 수 있게 함
+"""
+
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit, parse_qsl
+
+from playwright.async_api import BrowserContext, Page, Route
+
+# 캐시 버스터/추적용이라 값이 매번 달라지는 쿼리 파라미터 → 매칭에서 무시
+VOLATILE_QUERY_PARAMS = {
+    "_", "t", "ts", "cb", "rand", "random", "nonce", "timestamp", "time", "v", "ver",
+    "gclid", "fbclid", "utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content",
+    "sessionid", "session_id", "sid", "correlator", "requestid", "request_id",
+}
+# 재생 시 본문이 이미 풀린 상태이므로 전달하면 안 되는 헤더
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+def _split(url: str) -> Tuple[str, List[Tuple[str, str]]]:
+    parts = urlsplit(url)
+    base = f"{parts.scheme}://{parts.netloc}{parts.path}"
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k.lower() not in VOLATILE_QUERY_PARAMS]
+    return base, query
+
+
+class HarReplayer:
+    """HAR 엔트리를 (메서드, URL)로 색인해 요청에 응답
+
+    정확히 같은 URL이 없으면 같은 경로의 엔트리 중 (휘발성 파라미터를 뺀) 쿼리가
+    가장 많이 겹치는 것을 사용합니다. 그래도 없으면 요청을 끊어 네트워크로 나가지 않습니다.
+    """
+
+    def __init__(self, har_path: str):
+        with open(har_path, "r", encoding="utf-8") as f:
+            entries = json.load(f)["log"]["entries"]
+
+        self._exact: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._by_path: Dict[Tuple[str, str], List[Tuple[List[Tuple[str, str]], Dict[str, Any]]]] = {}
+        for entry in entries:
+            request, response = entry["request"], entry["response"]
+            if response.get("status", 0) <= 0:
+                continue
+            method = request["method"].upper()
+            # 같은 URL이 여러 번 기록됐다면 처음 것을 사용 (최초 로드 시점 상태)
+            self._exact.setdefault((method, request["url"]), response)
+            base, query = _split(request["url"])
+            self._by_path.setdefault((method, base), []).append((query, response))
+
+        self.stats = {"exact": 0, "fuzzy": 0, "miss": 0}
+
+    def lookup(self, method: str, url: str) -> Optional[Dict[str, Any]]:
+        method = method.upper()
+        response = self._exact.get((method, url))
+        if response:
+            self.stats["exact"] += 1
+            return response
+
+        base, query = _split(url)
+        candidates = self._by_path.get((method, base))
+        if not candidates:
+            self.stats["miss"] += 1
+            return None
+
+        wanted_pairs = set(query)
+        wanted_keys = {k for k, _ in query}
+
+        def overlap(candidate_query: List[Tuple[str, str]]) -> Tuple[int, int]:
+            pairs = set(candidate_query)
+            keys = {k for k, _ in candidate_query}
+            # 값까지 같은 파라미터 우선, 그다음 키만 같은 파라미터, 남는 키는 감점
+            return (len(pairs & wanted_pairs) * 2 + len(keys & wanted_keys), -len(keys ^ wanted_keys))
+
+        self.stats["fuzzy"] += 1
+        return max(candidates, key=lambda item: overlap(item[0]))[1]
+
+    async def handle(self, route: Route):
+        request = route.request
+        response = self.lookup(request.method, request.url)
+        if response is None:
+            await route.abort("internetdisconnected")
+            return
+
+        content = response.get("content") or {}
+        text = content.get("text") or ""
+        body = base64.b64decode(text) if content.get("encoding") == "base64" else text.encode("utf-8")
+        headers = {
+            h["name"]: h["value"] for h in response.get("headers", [])
+            if h["name"].lower() not in DROPPED_HEADERS
+        }
+        await route.fulfill(status=response["status"], headers=headers, body=body)
+
+    async def attach(self, target: Union[BrowserContext, Page]):
+        await target.route("**/*", self.handle)
+
+    def summary(self) -> str:
+        return f"HAR 재생: 정확 {self.stats['exact']}건, 유사 {self.stats['fuzzy']}건, 누락 {self.stats['miss']}건"
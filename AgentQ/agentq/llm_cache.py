@@ -0,0 +1,115 @@
+"""
+LLM 응답 디스크 캐시
+(모델, temperature, 시스템 프롬프트, 사용자 메시지, 스키마)의 해시를 키로 응답을 저장해
+같은 테스트 파일을 다시 돌릴 때 동일한 plan/critique 프롬프트를 모델에 보내지 않도록 함
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+LLM_CACHE_DIR = os.getenv("AGENTQ_LLM_CACHE_DIR", ".agentq/llm_cache")
+LLM_CACHE_MAX_MB = int(os.getenv("AGENTQ_LLM_CACHE_MAX_MB", "256"))
+# 용량 초과 시 이 비율까지 오래 안 쓴 항목부터 지움 (매 쓰기마다 정리하지 않도록 여유를 둠)
+EVICT_TARGET_RATIO = 0.9
+
+
+class LLMCache:
+    """내용 주소 기반 응답 캐시
+
+    항목 하나가 파일 하나(키 앞 두 글자로 하위 폴더 분산)이고, 조회 시 mtime을 갱신해
+    용량 초과 시 mtime이 오래된 항목부터 제거합니다(LRU 근사).
+    """
+
+    def __init__(self, cache_dir: str = LLM_CACHE_DIR, max_bytes: int = LLM_CACHE_MAX_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._total_bytes = sum(os.path.getsize(p) for p in self._entry_paths())
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "saved_s": 0.0}
+
+    @staticmethod
+    def make_key(
+        model_id: str,
+        temperature: Any,
+        system_prompt: str,
+        user_message: str,
+        schema: Optional[Dict[str, Any]] = None,
+        extra: Optional[Dict[str, Any]] = None
+    ) -> str:
+        payload = json.dumps(
+            [model_id, temperature, system_prompt, user_message, schema, extra or {}],
+            sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _entry_paths(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    yield os.path.join(root, name)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """{"kind", "value", "latency_s"} 또는 None"""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        self.stats["saved_s"] += entry.get("latency_s", 0.0)
+        return entry
+
+    def put(self, key: str, kind: str, value: Any, latency_s: float):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps({"kind": kind, "value": value, "latency_s": latency_s, "created_at": time.time()}, ensure_ascii=False)
+        # 동시에 도는 다른 실행이 반쯤 쓰인 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        previous = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(tmp_path, path)
+        self._total_bytes += len(data.encode("utf-8")) - previous
+        self.stats["writes"] += 1
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        for path in self._entry_paths():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICT_TARGET_RATIO
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.stats["evictions"] += 1
+        self._total_bytes = total
+
+    def summary(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            "size_mb": self._total_bytes / 1024 / 1024,
+        }
@@ -3,13 +3,42 @@ LLM 모델 초기화 및 관리 유틸리티
 OpenAI, Ollama 등 다양한 LLM 지원
 """
 
+import asyncio
+import hashlib
+import json
 import os
-from typing import Optional, Dict, Any, List, Type
+import sys
+import threading
+import time
+from typing import Optional, Dict, Any, List, Type, Callable, Awaitable
+import httpx
 from pydantic import BaseModel
-from langchain_openai import ChatOpenAI
-from langchain_ollama import ChatOllama
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_random_exponential
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, AIMessage
+from agentq.llm_cache import LLMCache
+from agentq.startup import get_startup_profile
+from agentq.tracing import record_usage, set_span_attrs, span
+
+# 모델별 동시 호출 상한 (set_concurrency로 모델마다 바꿀 수 있음)
+LLM_MAX_CONCURRENCY = int(os.getenv("AGENTQ_LLM_MAX_CONCURRENCY", "4"))
+LLM_MAX_ATTEMPTS = int(os.getenv("AGENTQ_LLM_MAX_ATTEMPTS", "4"))
+LLM_RETRY_MAX_WAIT_S = 8.0
+# 재시도할 가치가 있는 일시적 전송 오류 (스키마 검증 실패 등은 재시도해도 같으므로 제외)
+TRANSIENT_LLM_ERRORS = (
+    httpx.TransportError,
+    ConnectionError,
+    asyncio.TimeoutError,
+)
+# openai 패키지 오류는 이름으로만 두고, 클라이언트가 openai를 import한 뒤에만 확인 (시작 시 import 비용 회피)
+TRANSIENT_OPENAI_ERRORS = ("APIConnectionError", "RateLimitError", "InternalServerError")
+
+
+def is_transient_llm_error(error: BaseException) -> bool:
+    if isinstance(error, TRANSIENT_LLM_ERRORS):
+        return True
+    openai = sys.modules.get("openai")
+    return openai is not None and isinstance(error, tuple(getattr(openai, name) for name in TRANSIENT_OPENAI_ERRORS))
 
 
 class LLMManager:
@@ -17,7 +46,117 @@ class LLMManager:
 
     def __init__(self):
         self._models: Dict[str, BaseChatModel] = {}
+        # 첫 사용 때 만드는 모델 (langchain_openai/langchain_ollama import를 시작 경로에서 뺌)
+        self._factories: Dict[str, Callable[[], BaseChatModel]] = {}
+        self._factory_lock = threading.Lock()
         self._default_model: Optional[str] = None
+        self.cache: Optional[LLMCache] = None
+        self._concurrency: Dict[str, int] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.metrics: Dict[str, Dict[str, float]] = {}
+
+    def set_concurrency(self, name: str, limit: int):
+        """모델별 동시 호출 상한 설정 (다음 호출부터 적용)"""
+        self._concurrency[name] = limit
+        self._semaphores.pop(name, None)
+
+    def _model_metrics(self, name: str) -> Dict[str, float]:
+        return self.metrics.setdefault(name, {
+            "calls": 0, "coalesced": 0, "retries": 0, "failures": 0, "queue_wait_s": 0.0, "model_s": 0.0
+        })
+
+    @staticmethod
+    def _request_key(name: str, messages: List[BaseMessage], schema: Any = None, **kwargs) -> str:
+        payload = json.dumps(
+            [name, [(m.type, m.content) for m in messages], schema, kwargs],
+            sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def _call_limited(self, name: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """모델별 세마포어 안에서 호출하고, 일시적 오류는 지터를 준 지수 백오프로 재시도
+
+        백오프 동안에는 세마포어를 놓아 다른 요청이 진행되게 하며,
+        세마포어 대기 시간(queue_wait_s)과 모델 응답 시간(model_s)을 따로 집계합니다.
+        """
+        metrics = self._model_metrics(name)
+        semaphore = self._semaphores.get(name)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._concurrency.get(name, LLM_MAX_CONCURRENCY))
+            self._semaphores[name] = semaphore
+
+        def before_sleep(retry_state):
+            metrics["retries"] += 1
+            print(f"⚠️ LLM '{name}' 호출 재시도 {retry_state.attempt_number}/{LLM_MAX_ATTEMPTS}: {retry_state.outcome.exception()}")
+
+        try:
+            with span("llm", model=name):
+                async for attempt in AsyncRetrying(
+                    retry=retry_if_exception(is_transient_llm_error),
+                    wait=wait_random_exponential(multiplier=0.5, max=LLM_RETRY_MAX_WAIT_S),
+                    stop=stop_after_attempt(LLM_MAX_ATTEMPTS),
+                    before_sleep=before_sleep,
+                    reraise=True,
+                ):
+                    with attempt:
+                        queued = time.perf_counter()
+                        async with semaphore:
+                            started = time.perf_counter()
+                            metrics["queue_wait_s"] += started - queued
+                            set_span_attrs(queue_wait_s=started - queued, attempts=attempt.retry_state.attempt_number)
+                            try:
+                                result = await call()
+                            finally:
+                                metrics["model_s"] += time.perf_counter() - started
+                                metrics["calls"] += 1
+                        # include_raw=True 구조화 출력은 {"raw", "parsed", ...} 형태라 raw 메시지에서 토큰을 읽음
+                        record_usage(result.get("raw") if isinstance(result, dict) else result)
+                        return result
+        except Exception:
+            metrics["failures"] += 1
+            raise
+
+    async def _call_coalesced(self, name: str, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """같은 요청이 이미 진행 중이면 새로 보내지 않고 그 결과를 함께 기다림"""
+        task = self._inflight.get(key)
+        if task is not None:
+            self._model_metrics(name)["coalesced"] += 1
+        else:
+            task = asyncio.create_task(self._call_limited(name, call))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._inflight.pop(key) if self._inflight.get(key) is t else None)
+        # 기다리던 쪽 하나가 취소돼도 나머지 대기자를 위해 실제 호출은 계속 진행
+        return await asyncio.shield(task)
+
+    def enable_cache(self, cache_dir: Optional[str] = None, max_mb: Optional[int] = None) -> LLMCache:
+        """응답 디스크 캐시 켜기 (기본 꺼짐)"""
+        kwargs = {}
+        if cache_dir:
+            kwargs["cache_dir"] = cache_dir
+        if max_mb:
+            kwargs["max_bytes"] = max_mb * 1024 * 1024
+        self.cache = LLMCache(**kwargs)
+        print(f"🗄️ LLM 응답 캐시 사용: {self.cache.cache_dir}")
+        return self.cache
+
+    def _cache_key(
+        self,
+        model_name: Optional[str],
+        system_prompt: str,
+        user_message: str,
+        schema: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> Optional[str]:
+        if self.cache is None:
+            return None
+        name = model_name or self._default_model
+        model = self.get_model(model_name)
+        # 같은 이름으로 다른 모델을 등록해도 섞이지 않도록 실제 모델 식별자까지 포함
+        model_id = f"{name}:{getattr(model, 'model_name', None) or getattr(model, 'model', None) or type(model).__name__}"
+        return self.cache.make_key(
+            model_id, getattr(model, "temperature", None), system_prompt, user_message, schema, kwargs
+        )
 
     def add_openai_model(
         self,
@@ -25,25 +164,26 @@ class LLMManager:
         model: str = "gpt-3.5-turbo",
         api_key: Optional[str] = None,
         temperature: float = 0.0,
+        lazy: bool = False,
         **kwargs
-    ) -> BaseChatModel:
-        """OpenAI 모델 추가"""
+    ) -> Optional[BaseChatModel]:
+        """OpenAI 모델 추가 (lazy=True면 첫 사용 때 생성하고 None 반환)"""
         api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OpenAI API 키가 필요합니다. OPENAI_API_KEY 환경변수를 설정하거나 api_key 매개변수를 제공하세요.")
 
-        llm = ChatOpenAI(
-            model=model,
-            api_key=api_key,
-            temperature=temperature,
-            **kwargs
-        )
-
-        self._models[name] = llm
-        if self._default_model is None:
-            self._default_model = name
-
-        print(f"✅ OpenAI 모델 '{name}' 추가됨 (모델: {model})")
+        def build() -> BaseChatModel:
+            from langchain_openai import ChatOpenAI
+            return ChatOpenAI(
+                model=model,
+                api_key=api_key,
+                temperature=temperature,
+                **kwargs
+            )
+
+        llm = self._register(name, build, lazy)
+        if not lazy:
+            print(f"✅ OpenAI 모델 '{name}' 추가됨 (모델: {model})")
         return llm
 
     def add_ollama_model(
@@ -52,11 +192,11 @@ class LLMManager:
         model: str = "llama3.2:3b",
         base_url: str = None,
         temperature: float = 0.0,
+        lazy: bool = False,
         **kwargs
-    ) -> BaseChatModel:
-        """Ollama 모델 추가"""
+    ) -> Optional[BaseChatModel]:
+        """Ollama 모델 추가 (lazy=True면 첫 사용 때 생성하고 None 반환)"""
         # 환경변수에서 Ollama 호스트 확인
-        import os
         if base_url is None:
             ollama_host = os.getenv("OLLAMA_HOST", "localhost:11434")
             if not ollama_host.startswith("http"):
@@ -64,31 +204,69 @@ class LLMManager:
             else:
                 base_url = ollama_host
 
-        llm = ChatOllama(
-            model=model,
-            base_url=base_url,
-            temperature=temperature,
-            **kwargs
-        )
+        def build() -> BaseChatModel:
+            from langchain_ollama import ChatOllama
+            return ChatOllama(
+                model=model,
+                base_url=base_url,
+                temperature=temperature,
+                **kwargs
+            )
+
+        llm = self._register(name, build, lazy)
+        if not lazy:
+            print(f"✅ Ollama 모델 '{name}' 추가됨 (모델: {model})")
+        return llm
 
-        self._models[name] = llm
+    def _register(self, name: str, factory: Callable[[], BaseChatModel], lazy: bool) -> Optional[BaseChatModel]:
+        if lazy:
+            self._models.pop(name, None)
+            self._factories[name] = factory
+            llm = None
+        else:
+            self._factories.pop(name, None)
+            llm = self._models[name] = factory()
         if self._default_model is None:
             self._default_model = name
+        return llm
 
-        print(f"✅ Ollama 모델 '{name}' 추가됨 (모델: {model})")
+    def _build_model(self, name: str) -> BaseChatModel:
+        """지연 등록된 모델 생성 (워밍업 스레드와 이벤트 루프가 동시에 불러도 한 번만)"""
+        with self._factory_lock:
+            if name not in self._models:
+                with get_startup_profile().phase(f"LLM '{name}' 생성 (import 포함)"):
+                    self._models[name] = self._factories[name]()
+                del self._factories[name]
+        return self._models[name]
+
+    def warm_up(self, names: Optional[List[str]] = None):
+        """지연 등록된 모델을 미리 생성 (asyncio.to_thread로 브라우저 준비와 겹쳐 실행)"""
+        for name in names or [self._default_model]:
+            if name in self._factories:
+                self._build_model(name)
+
+    def add_model(self, name: str, llm: BaseChatModel, make_default: bool = False) -> BaseChatModel:
+        """이미 만들어진 모델(또는 ainvoke/with_structured_output을 갖춘 목업) 등록"""
+        self._models[name] = llm
+        if make_default or self._default_model is None:
+            self._default_model = name
+
+        print(f"✅ 모델 '{name}' 추가됨 ({type(llm).__name__})")
         return llm
 
     def get_model(self, name: Optional[str] = None) -> BaseChatModel:
         """모델 가져오기"""
         model_name = name or self._default_model
+        if model_name in self._factories:
+            return self._build_model(model_name)
         if not model_name or model_name not in self._models:
-            raise ValueError(f"모델 '{model_name}'을 찾을 수 없습니다. 사용 가능한 모델: {list(self._models.keys())}")
+            raise ValueError(f"모델 '{model_name}'을 찾을 수 없습니다. 사용 가능한 모델: {self.list_models()}")
 
         return self._models[model_name]
 
     def list_models(self) -> List[str]:
-        """등록된 모델 목록 반환"""
-        return list(self._models.keys())
+        """등록된 모델 목록 반환 (아직 생성되지 않은 지연 모델 포함)"""
+        return list(self._models.keys()) + [name for name in self._factories if name not in self._models]
 
     async def invoke_model(
         self,
@@ -96,9 +274,11 @@ class LLMManager:
         model_name: Optional[str] = None,
         **kwargs
     ) -> AIMessage:
-        """모델 호출"""
+        """모델 호출 (동시성 제한, 동일 요청 병합, 일시적 오류 재시도 적용)"""
         model = self.get_model(model_name)
-        return await model.ainvoke(messages, **kwargs)
+        name = model_name or self._default_model
+        key = self._request_key(name, messages, **kwargs)
+        return await self._call_coalesced(name, key, lambda: model.ainvoke(messages, **kwargs))
 
     async def invoke_with_system(
         self,
@@ -108,12 +288,21 @@ class LLMManager:
         **kwargs
     ) -> str:
         """시스템 프롬프트와 사용자 메시지로 모델 호출"""
+        cache_key = self._cache_key(model_name, system_prompt, user_message, **kwargs)
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached:
+                return cached["value"]
+
         messages = [
             SystemMessage(content=system_prompt),
             HumanMessage(content=user_message)
         ]
 
+        started = time.perf_counter()
         response = await self.invoke_model(messages, model_name, **kwargs)
+        if cache_key:
+            self.cache.put(cache_key, "text", response.content, time.perf_counter() - started)
         return response.content
 
     def supports_structured_output(self, model_name: Optional[str] = None) -> bool:
@@ -136,12 +325,30 @@ class LLMManager:
         try:
             if not hasattr(model, "with_structured_output"):
                 return None
-            structured_llm = model.with_structured_output(schema_model)
+            cache_key = self._cache_key(
+                model_name, system_prompt, user_message, schema_model.model_json_schema(), **kwargs
+            )
+            if cache_key:
+                cached = self.cache.get(cache_key)
+                if cached:
+                    # 파싱된 출력을 저장해 두었으므로 스키마로 다시 검증만 하면 됨
+                    return schema_model.model_validate(cached["value"])
+            # include_raw=True로 원본 메시지(토큰 사용량)도 함께 받음
+            structured_llm = model.with_structured_output(schema_model, include_raw=True)
             messages = [
                 SystemMessage(content=system_prompt),
                 HumanMessage(content=user_message)
             ]
-            resp = await structured_llm.ainvoke(messages, **kwargs)
+            started = time.perf_counter()
+            name = model_name or self._default_model
+            key = self._request_key(name, messages, schema_model.__name__, **kwargs)
+            resp = await self._call_coalesced(name, key, lambda: structured_llm.ainvoke(messages, **kwargs))
+            if isinstance(resp, dict) and "parsed" in resp:
+                if resp.get("parsing_error"):
+                    raise resp["parsing_error"]
+                resp = resp["parsed"]
+            if cache_key and isinstance(resp, BaseModel):
+                self.cache.put(cache_key, "structured", resp.model_dump(mode="json"), time.perf_counter() - started)
             return resp
         except Exception as e:
             print(f"⚠️ Structured output invoke 실패: {e}")
@@ -166,14 +373,24 @@ class LLMManager:
             bind = getattr(model, "bind", None)
             if bind is None:
                 return None
+            cache_key = self._cache_key(model_name, system_prompt, user_message, json_schema, **kwargs)
+            if cache_key:
+                cached = self.cache.get(cache_key)
+                if cached:
+                    return cached["value"]
             schema_bound = bind(format=json_schema)
             messages = [
                 SystemMessage(content=system_prompt),
                 HumanMessage(content=user_message),
             ]
-            resp = await schema_bound.ainvoke(messages, **kwargs)
+            started = time.perf_counter()
+            name = model_name or self._default_model
+            key = self._request_key(name, messages, json_schema, **kwargs)
+            resp = await self._call_coalesced(name, key, lambda: schema_bound.ainvoke(messages, **kwargs))
             raw = (resp.content or "").strip()
             import json as _json; _json.loads(raw)  # JSON sanity check
+            if cache_key:
+                self.cache.put(cache_key, "json", raw, time.perf_counter() - started)
             return raw
         except Exception as e:
             print(f"⚠️ JSON-schema 강제 호출 실패: {e}")
@@ -193,14 +410,13 @@ def get_llm_manager() -> LLMManager:
 
 
 def setup_default_llms():
-    """기본 LLM 설정"""
+    """기본 LLM 설정 (클라이언트는 첫 사용 때 생성되므로 제공자 패키지를 여기서 import하지 않음)"""
     manager = get_llm_manager()
 
-    # OpenAI 모델 설정 시도
+    # OpenAI 모델 설정 시도 (키가 있으면 기본 모델)
     try:
         if os.getenv("OPENAI_API_KEY"):
-            manager.add_openai_model()
-            print("🤖 OpenAI 모델이 기본으로 설정되었습니다.")
+            manager.add_openai_model(lazy=True)
         else:
             print("⚠️ OPENAI_API_KEY가 설정되지 않았습니다.")
     except Exception as e:
@@ -208,8 +424,7 @@ def setup_default_llms():
 
     # Ollama 모델 설정 시도
     try:
-        manager.add_ollama_model()
-        print("🦙 Ollama 모델이 추가되었습니다.")
+        manager.add_ollama_model(lazy=True)
     except Exception as e:
         print(f"⚠️ Ollama 모델 설정 실패: {e}")
 
@@ -221,7 +436,7 @@ def setup_default_llms():
         print("   1. OPENAI_API_KEY 환경변수 설정")
         print("   2. Ollama 서버 실행 (ollama serve)")
     else:
-        print(f"✅ 사용 가능한 모델: {available_models}")
+        print(f"✅ 사용 가능한 모델: {available_models} (기본: {manager._default_model})")
 
 
 async def test_llm_connection(model_name: Optional[str] = None) -> bool:
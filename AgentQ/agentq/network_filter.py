@@ -0,0 +1,122 @@
+"""
+네트워크 요청 필터링
+에이전트는 innerText와 인터랙티브 요소만 사용하므로 이미지/폰트/미디어와 트래커 요청을 차단해 페이지 로드를 줄임
+"""
+
+import time
+from typing import Any, Dict, List, Union
+from urllib.parse import urlparse
+
+from pydantic import BaseModel, Field
+from playwright.async_api import BrowserContext, Page, Route
+
+DEFAULT_BLOCKED_RESOURCE_TYPES = ["image", "media", "font"]
+DEFAULT_TRACKER_DOMAINS = [
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "adservice.google.com", "facebook.net", "connect.facebook.net", "hotjar.com", "segment.io",
+    "segment.com", "optimizely.com", "newrelic.com", "nr-data.net", "scorecardresearch.com",
+    "quantserve.com", "criteo.com", "taboola.com", "outbrain.com", "adnxs.com", "amazon-adsystem.com",
+    "bat.bing.com", "clarity.ms", "fullstory.com", "mixpanel.com", "branch.io",
+]
+
+# 차단된 요청은 응답을 받지 않으므로 절감량은 리소스 타입별 평균 전송량으로 추정
+ESTIMATED_BYTES_BY_TYPE = {
+    "image": 60_000, "media": 400_000, "font": 35_000, "script": 30_000,
+    "stylesheet": 20_000, "xhr": 5_000, "fetch": 5_000,
+}
+ESTIMATED_BYTES_DEFAULT = 5_000
+# 절감 시간 추정용 대역폭 (바이트/초, 약 20Mbps)
+ESTIMATED_BANDWIDTH_BPS = 2_500_000
+
+# 스크린샷 기반 평가가 필요한 eval 타입 → 리소스 타입 차단을 끔
+SCREENSHOT_EVAL_TYPES = {"llm_eval"}
+
+
+class NetworkPolicy(BaseModel):
+    """요청 차단 정책"""
+    enabled: bool = True
+    block_resource_types: List[str] = Field(default_factory=lambda: list(DEFAULT_BLOCKED_RESOURCE_TYPES))
+    block_domains: List[str] = Field(default_factory=lambda: list(DEFAULT_TRACKER_DOMAINS))
+    # 이 문자열이 URL에 포함되면 항상 허용 (예: 특정 CDN, 스크린샷 평가에 필요한 이미지)
+    allow_patterns: List[str] = Field(default_factory=list)
+
+    @classmethod
+    def for_task(cls, task_config: Dict[str, Any], enabled: bool = True) -> "NetworkPolicy":
+        """태스크 설정으로부터 정책 생성
+
+        task_config["network_policy"]에 필드를 덮어쓸 수 있고, 스크린샷 기반 평가 태스크는
+        트래커만 차단하고 이미지/폰트/미디어는 그대로 받습니다.
+        """
+        policy = cls(**{"enabled": enabled, **(task_config.get("network_policy") or {})})
+        eval_types = set((task_config.get("eval") or {}).get("eval_types") or [])
+        if eval_types & SCREENSHOT_EVAL_TYPES:
+            policy.block_resource_types = []
+        return policy
+
+    def should_block(self, url: str, resource_type: str) -> bool:
+        if not self.enabled or any(p in url for p in self.allow_patterns):
+            return False
+        if resource_type in self.block_resource_types:
+            return True
+        host = (urlparse(url).hostname or "").lower()
+        return any(host == d or host.endswith("." + d) for d in self.block_domains)
+
+
+class NetworkFilter:
+    """page/context.route로 정책을 적용하고 내비게이션별 절감량을 기록
+
+    허용된 요청은 route.fallback()으로 넘기므로 이후에 등록되는 다른 라우트 계층과 함께 쓸 수 있습니다.
+    """
+
+    def __init__(self, policy: NetworkPolicy):
+        self.policy = policy
+        self._navigations: Dict[Page, Dict[str, Any]] = {}
+        self.totals = {"blocked": 0, "bytes": 0, "navigations": 0}
+
+    async def attach(self, target: Union[BrowserContext, Page]):
+        """컨텍스트(권장) 또는 단일 페이지에 필터 설치"""
+        await target.route("**/*", self._handle)
+        if isinstance(target, BrowserContext):
+            for page in target.pages:
+                self._watch(page)
+            target.on("page", self._watch)
+        else:
+            self._watch(target)
+
+    def _watch(self, page: Page):
+        page.on("framenavigated", lambda frame: self._begin(page) if frame == page.main_frame else None)
+        page.on("load", lambda _: self._finish(page))
+
+    def _begin(self, page: Page):
+        self._navigations[page] = {"url": page.url, "started": time.perf_counter(), "blocked": 0, "bytes": 0}
+
+    def _finish(self, page: Page):
+        nav = self._navigations.pop(page, None)
+        if not nav:
+            return
+        self.totals["navigations"] += 1
+        if nav["blocked"]:
+            load_s = time.perf_counter() - nav["started"]
+            saved_s = nav["bytes"] / ESTIMATED_BANDWIDTH_BPS
+            print(f"🚫 요청 차단 {nav['blocked']}건 ({nav['url'][:80]}): "
+                  f"약 {nav['bytes'] / 1024:.0f}KB, {saved_s:.2f}초 절감(추정), 로드 {load_s:.2f}초")
+
+    async def _handle(self, route: Route):
+        request = route.request
+        if not self.policy.should_block(request.url, request.resource_type):
+            await route.fallback()
+            return
+
+        estimated = ESTIMATED_BYTES_BY_TYPE.get(request.resource_type, ESTIMATED_BYTES_DEFAULT)
+        self.totals["blocked"] += 1
+        self.totals["bytes"] += estimated
+        try:
+            nav = self._navigations.get(request.frame.page)
+        except Exception:
+            # 서비스 워커 요청 등 프레임이 없는 경우
+            nav = None
+        if nav is not None:
+            nav["blocked"] += 1
+            nav["bytes"] += estimated
+        await route.abort("blockedbyclient")
+
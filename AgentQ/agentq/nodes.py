@@ -2,24 +2,236 @@
 에이전트의 핵심 의사결정 및 도구 실행 노드 구현
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from pydantic import BaseModel, Field
 from agentq.state import AgentState, increment_loop_count, add_error, clear_error
 from agentq.llm_utils import get_llm_manager
 from agentq.prompt_utils import (
     get_prompt_builder, ScratchpadManager,
     extract_action_from_response, extract_critique_decision, clean_response,
-    split_output_blocks, extract_commands_and_status, parse_command_line
+    split_output_blocks, extract_commands_and_status
 )
-from agentq.tools import get_tool_executor, WebTool
+from agentq.command_grammar import parse_command, parse_commands
+from agentq.tools import get_tool_executor, swap_current_page, WebTool
+from agentq.q_store import element_identities, get_q_store
+from agentq.playwright_helper import get_current_page, is_page_pinned
+from agentq.prefetch import NavigationPrefetch, resolve_target
+from agentq.screenshots import get_screenshot_service
+from agentq.rollout import run_rollouts
+from agentq.observation import build_observation
+from agentq.scratchpad import apply_scratchpad_fold, discard_scratchpad_fold, start_scratchpad_fold
+from agentq.tracing import set_span_attrs, span, traced
+import asyncio
+import os
 import re
 import json
+import textwrap
+import time
 
 # 릴리즈 토글/가드
 ENABLE_CRITIC = True
 ENABLE_MCTS_LITE = True
-
-
+# 액션 직후 다음 루프용 DOM 스냅샷을 explanation/critique LLM 호출과 겹쳐서 미리 추출
+ENABLE_DOM_PREFETCH = True
+# 직전 critic 호출이 임계값보다 느렸다면 후보를 부분집합으로 나눠 동시에 채점
+ENABLE_PARALLEL_CRITIC = True
+CRITIC_SLOW_THRESHOLD_S = 5.0
+CRITIC_SUBSET_SIZE = 2
+# 세션 간 Q-값을 SQLite에 누적해 UCB-lite 점수에 반영
+ENABLE_PERSISTENT_Q = True
+# 상위 k개 후보를 복제한 브라우저 컨텍스트에서 병렬 실행해 보고 고르는 롤아웃 모드 (비용이 커서 기본 off)
+ENABLE_MCTS_ROLLOUT = False
+ROLLOUT_TOP_K = 3
+ROLLOUT_BUDGET_S = 20.0
+# explanation + critique를 구조화 호출 하나로 합친 reflect 노드 사용 (액션 후 LLM 호출 2회 → 1회)
+ENABLE_FUSED_REFLECTION = os.getenv("AGENTQ_FUSED_REFLECTION", "0") == "1"
+# critic 채점 동안 링크 CLICK/NAVIGATE 후보의 대상 페이지를 백그라운드 탭에 미리 로드 (요청이 늘어나 기본 off)
+ENABLE_NAV_PREFETCH = os.getenv("AGENTQ_NAV_PREFETCH", "0") == "1"
+
+# 세션별 선행 스냅샷 태스크와 직전 critic 지연 (LangGraph 상태에 Task를 넣지 않기 위해 모듈에 보관)
+_pending_snapshots: Dict[str, asyncio.Task] = {}
+_pending_navigations: Dict[str, NavigationPrefetch] = {}
+_critic_latencies: Dict[str, float] = {}
+
+
+async def _timed(coro):
+    """코루틴 결과와 소요 시간(초)을 함께 반환"""
+    started = time.perf_counter()
+    result = await coro
+    return result, time.perf_counter() - started
+
+
+def _add_loop_metric(state: AgentState, key: str, value: float) -> None:
+    """현재 루프 지표에 값 누적 (thought_node 이전 호출 등 루프 지표가 없으면 무시)"""
+    if state.get("loop_metrics"):
+        metrics = state["loop_metrics"][-1]
+        metrics[key] = metrics.get(key, 0.0) + value
+
+
+def _start_snapshot_prefetch(state: AgentState) -> None:
+    """다음 thought_node가 사용할 DOM 스냅샷을 백그라운드에서 시작"""
+    if not ENABLE_DOM_PREFETCH:
+        return
+    key = state.get("session_id") or ""
+    previous = _pending_snapshots.pop(key, None)
+    if previous and not previous.done():
+        previous.cancel()
+    _pending_snapshots[key] = asyncio.create_task(_timed(WebTool.extract_page_content()))
+
+
+def _discard_snapshot_prefetch(state: AgentState) -> None:
+    """종료된 세션의 선행 스냅샷 정리"""
+    pending = _pending_snapshots.pop(state.get("session_id") or "", None)
+    if pending and not pending.done():
+        pending.cancel()
+
+
+def end_session(state: AgentState) -> None:
+    """실행이 끝난 세션의 선행 스냅샷/선행 로드/스크래치패드 요약/critic 지연 기록을 모두 정리
+
+    같은 session_id로 다음 실행(대화형 모드 등)이 이전 실행의 결과를 받아 쓰지 않도록
+    그래프 실행이 어떻게 끝나든 호출됩니다.
+    """
+    _discard_snapshot_prefetch(state)
+    _discard_navigation_prefetch(state)
+    discard_scratchpad_fold(state)
+    _critic_latencies.pop(state.get("session_id") or "", None)
+
+
+async def _refresh_page_snapshot(state: AgentState, metrics: Dict[str, Any]) -> None:
+    """선행 스냅샷이 있으면 그 결과를, 없으면 (페이지 내용이 비었을 때만) 새 스냅샷을 반영"""
+    pending = _pending_snapshots.pop(state.get("session_id") or "", None)
+    wait_started = time.perf_counter()
+    if pending:
+        try:
+            snap, snap_duration = await pending
+        except asyncio.CancelledError:
+            snap, snap_duration = None, 0.0
+        waited = time.perf_counter() - wait_started
+        metrics["dom_wait_s"] = waited
+        # 스냅샷이 LLM 호출 뒤에서 진행된 만큼이 임계 경로에서 빠진 시간
+        metrics["dom_overlap_saved_s"] = max(0.0, snap_duration - waited)
+    elif not state.get("page_content"):
+        snap = await WebTool.extract_page_content()
+        metrics["dom_wait_s"] = time.perf_counter() - wait_started
+    else:
+        return
+
+    if snap and snap.get("success") and isinstance(snap.get("data"), dict):
+        d = snap["data"]
+        state["current_url"] = d.get("url")
+        state["page_title"] = d.get("title")
+        state["page_content"] = (d.get("content") or "")[:500]
+        state["observation"] = state.get("observation") or "페이지 내용 추출 완료"
+        _update_page_outline(state, d)
+
+
+async def _start_navigation_prefetch(state: AgentState, cmds: List[str], metrics: Dict[str, Any]) -> None:
+    """후보 중 링크 이동 대상을 백그라운드 페이지에서 로드 시작 (페이지가 고정된 세션/롤아웃에서는 생략)"""
+    _discard_navigation_prefetch(state)
+    if not ENABLE_NAV_PREFETCH or is_page_pinned():
+        return
+    page = await get_current_page()
+    if not page:
+        return
+    prefetch = await NavigationPrefetch.start(page, cmds)
+    if prefetch.urls:
+        _pending_navigations[state.get("session_id") or ""] = prefetch
+        metrics["prefetch_started"] = len(prefetch.urls)
+        print(f"   선행 로드: {prefetch.urls}")
+
+
+def _discard_navigation_prefetch(state: AgentState) -> int:
+    """남은 선행 로드 폐기 (낭비된 로드 수 반환)"""
+    prefetch = _pending_navigations.pop(state.get("session_id") or "", None)
+    return prefetch.discard() if prefetch else 0
+
+
+async def _use_navigation_prefetch(state: AgentState, action: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """선택된 액션이 미리 로드한 URL로 이동하면 그 페이지로 바꿔 끼우고 도구 결과를 반환 (아니면 None)"""
+    prefetch = _pending_navigations.pop(state.get("session_id") or "", None)
+    if not prefetch:
+        return None
+    loaded = None
+    try:
+        url = await resolve_target(prefetch.source, action)
+        loaded = await prefetch.take(url) if url else None
+    finally:
+        wasted = prefetch.discard()
+    if loaded and not await swap_current_page(loaded[0]):
+        await loaded[0].close()
+        wasted, loaded = wasted + 1, None
+    _add_loop_metric(state, "prefetch_wasted", wasted)
+    if not loaded:
+        return None
+
+    page, saved_s = loaded
+    _add_loop_metric(state, "prefetch_hit", 1)
+    _add_loop_metric(state, "prefetch_saved_s", saved_s)
+    print(f"   🔮 선행 로드된 페이지로 전환: {page.url} (약 {saved_s:.2f}초 절감)")
+    return {
+        "success": True,
+        "message": f"{'페이지 이동' if action.get('type') == 'NAVIGATE' else '링크 클릭'} 성공(선행 로드): {page.url}",
+        "data": {"url": page.url, "title": await page.title()}
+    }
+
+
+def _update_page_outline(state: AgentState, snapshot: Dict[str, Any]) -> None:
+    """스냅샷의 접근성 트리 노드로 관찰 토큰 예산 이내의 페이지 개요 생성"""
+    if snapshot.get("ax_nodes") is None:
+        return
+    outline, stats = build_observation(snapshot["ax_nodes"], state["objective"])
+    state["page_outline"] = outline
+    state["element_identities"] = element_identities(snapshot["ax_nodes"])
+    _add_loop_metric(state, "obs_tokens", stats["tokens"])
+    set_span_attrs(obs_nodes=stats["nodes"], obs_kept=stats["kept"], obs_tokens=stats["tokens"])
+
+
+async def _score_candidates(state: AgentState, cmds: List[str], metrics: Dict[str, Any]) -> Dict[str, float]:
+    """Critic으로 후보를 채점해 {cmd: score} 반환
+
+    모델이 느릴 때는 후보를 부분집합으로 나눠 asyncio.gather로 동시에 채점합니다.
+    각 응답에서는 해당 부분집합에 실제로 포함된 커맨드만 받아들이고, 먼저 병합된 점수를
+    우선해 부분집합 간 중복/환각 커맨드가 결과를 뒤집지 않도록 합니다.
+    """
+    key = state.get("session_id") or ""
+    prompt_builder = get_prompt_builder()
+    llm_manager = get_llm_manager()
+    critic_prompt = prompt_builder.build_critic_prompt(state)
+
+    slow = _critic_latencies.get(key, 0.0) > CRITIC_SLOW_THRESHOLD_S
+    if ENABLE_PARALLEL_CRITIC and slow and len(cmds) > CRITIC_SUBSET_SIZE:
+        subsets = [cmds[i:i + CRITIC_SUBSET_SIZE] for i in range(0, len(cmds), CRITIC_SUBSET_SIZE)]
+    else:
+        subsets = [cmds]
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        _timed(llm_manager.invoke_structured_with_system(
+            system_prompt=critic_prompt,
+            user_message="Rank these commands:\n" + "\n".join([f"- {c}" for c in subset]),
+            schema_model=CriticOutput
+        ))
+        for subset in subsets
+    ])
+    elapsed = time.perf_counter() - started
+
+    score_map: Dict[str, float] = {}
+    for subset, (critic_output, _) in zip(subsets, results):
+        if not critic_output or not critic_output.scores:
+            continue
+        allowed = {c.strip() for c in subset}
+        for item in critic_output.scores:
+            key = item.cmd.strip()
+            if key in allowed and key not in score_map:
+                score_map[key] = max(0.0, min(1.0, item.score))
+
+    # 단일 호출 기준 지연으로 이 세션의 다음 루프 분할 여부를 결정 (다른 세션에는 영향 없음)
+    _critic_latencies[key] = max(latency for _, latency in results)
+    metrics["critic_s"] = elapsed
+    metrics["critic_serial_s"] = sum(latency for _, latency in results)
+    metrics["critic_subsets"] = len(subsets)
+    return score_map
 
 
 def _progress_fingerprint(state: AgentState) -> str:
@@ -52,7 +264,14 @@ class CriticOutput(BaseModel):
     """Critic의 전체 평가 결과"""
     scores: List[CriticScore]
 
+class Reflection(BaseModel):
+    """액션 결과 해석과 완료 판단을 한 번에 받는 구조화 출력 (reflect 노드)"""
+    explanation: str = Field(description="What the last action did and whether it moved toward the objective.")
+    done: bool = Field(description="True only if the objective has been fully accomplished.")
+    rationale: str = Field(description="A short reason for the done decision.")
+
 
+@traced("plan")
 async def plan_node(state: AgentState) -> Dict[str, Any]:
     """Plan 노드: 전체 계획 수립"""
     print("📋 Plan 노드 실행 중...")
@@ -88,33 +307,34 @@ async def plan_node(state: AgentState) -> Dict[str, Any]:
         return {"plan": "계획 수립에 실패했습니다."}
 
 
+@traced("thought")
 async def thought_node(state: AgentState) -> Dict[str, Any]:
     """Thought 노드: 후보 생성 → critic 점수화 → 최종 액션 선택 (간소화된 버전)"""
     print(f"🤔 Thought 노드 실행 중... (루프 {state['loop_count'] + 1})")
 
     try:
         state = increment_loop_count(state)
+        metrics = {"loop": state["loop_count"], "started": time.perf_counter()}
+        state.setdefault("loop_metrics", []).append(metrics)
 
-        # 최신 DOM 스냅샷 확보 (없을 때만)
-        if not state.get("page_content"):
-            snap = await WebTool.extract_page_content()
-            if snap.get("success") and isinstance(snap.get("data"), dict):
-                d = snap["data"]
-                state["current_url"] = d.get("url")
-                state["page_title"] = d.get("title")
-                state["page_content"] = (d.get("content") or "")[:500]
-                state["observation"] = "페이지 내용 추출 완료"
+        # 직전 루프 뒤에서 끝난 스크래치패드 요약이 있으면 반영 (진행 중이면 기다리지 않음)
+        apply_scratchpad_fold(state)
+
+        # 최신 DOM 스냅샷 확보 (직전 액션 이후 선행 추출된 결과 우선)
+        with span("thought.snapshot"):
+            await _refresh_page_snapshot(state, metrics)
 
         prompt_builder = get_prompt_builder()
         llm_manager = get_llm_manager()
         
         # 1. 후보 커맨드 생성
         thought_prompt = prompt_builder.build_thought_prompt(state)
-        thought_process: ThoughtProcess = await llm_manager.invoke_structured_with_system(
-            system_prompt=thought_prompt,
-            user_message="Propose multiple candidate COMMANDS for the very next step.",
-            schema_model=ThoughtProcess
-        )
+        with span("thought.candidates"):
+            thought_process, metrics["thought_llm_s"] = await _timed(llm_manager.invoke_structured_with_system(
+                system_prompt=thought_prompt,
+                user_message="Propose multiple candidate COMMANDS for the very next step.",
+                schema_model=ThoughtProcess
+            ))
 
         if not thought_process or not thought_process.commands:
             raise ValueError("LLM으로부터 유효한 커맨드를 생성하지 못했습니다.")
@@ -123,20 +343,27 @@ async def thought_node(state: AgentState) -> Dict[str, Any]:
         thought_text = thought_process.thought
         status = thought_process.status
 
+        # 후보 전체를 한 번에 파싱 (문법 오류는 위치와 함께 표시하고 후보 통계에 남김)
+        parsed = {p.command: p for p in parse_commands(cmds)}
+        invalid = [p for p in parsed.values() if p.error]
+        for p in invalid:
+            print(f"   ⚠️ 해석할 수 없는 커맨드:\n{textwrap.indent(p.error.render(p.command), '      ')}")
+        metrics["invalid_commands"] = len(invalid)
+
+        # critic 채점/롤아웃과 겹쳐 링크 후보의 대상 페이지를 미리 로드
+        with span("thought.prefetch"):
+            await _start_navigation_prefetch(state, cmds, metrics)
+
         scores = []
+        # 후보별 critic 점수/Q/UCB 기록 (궤적 저장소의 후보 행이 됨)
+        candidate_stats: Dict[str, Dict[str, Any]] = {c: {"command": c} for c in cmds}
+        for p in invalid:
+            candidate_stats[p.command]["parse_error"] = p.error.message
         # 2. Critic으로 랭킹 (활성화된 경우)
         if ENABLE_CRITIC and cmds:
-            critic_prompt = prompt_builder.build_critic_prompt(state)
-            critic_input = "Rank these commands:\n" + "\n".join([f"- {c}" for c in cmds])
-            
-            critic_output: CriticOutput = await llm_manager.invoke_structured_with_system(
-                system_prompt=critic_prompt,
-                user_message=critic_input,
-                schema_model=CriticOutput
-            )
-
-            if critic_output and critic_output.scores:
-                score_map = {item.cmd.strip(): item.score for item in critic_output.scores}
+            with span("thought.critic", candidates=len(cmds)):
+                score_map = await _score_candidates(state, cmds, metrics)
+            if score_map:
                 scores = [(cmd, score_map.get(cmd.strip(), 0.5)) for cmd in cmds]
                 print(f"   Critic 점수: { {c: s for c, s in scores} }")
 
@@ -150,28 +377,58 @@ async def thought_node(state: AgentState) -> Dict[str, Any]:
         if scores:
             if ENABLE_MCTS_LITE:
                 qstats = state.get("q_stats") or {}
+                # 현재 페이지의 후보 전체를 한 번에 조회 (페이지 패턴 단위 메모리 캐시)
+                stored = {}
+                if ENABLE_PERSISTENT_Q:
+                    lookup_started = time.perf_counter()
+                    stored = get_q_store().get_many(
+                        state.get("current_url"), [c for c, _ in scores], state.get("element_identities")
+                    )
+                    metrics["q_store_s"] = time.perf_counter() - lookup_started
                 alpha = 0.5
                 scored_cmds = []
                 for c, s in scores:
-                    q = qstats.get(c, {}).get("Q", 0.0)
-                    n = qstats.get(c, {}).get("N", 0)
+                    # 세션 내 통계가 있으면 우선, 없으면 과거 세션에서 학습된 값 사용
+                    ent = qstats.get(c) or stored.get(c) or {}
+                    q = ent.get("Q", 0.0)
+                    n = ent.get("N", 0)
                     bonus = 0.1 if n == 0 else 0.0
                     total = alpha * s + (1 - alpha) * q + bonus
                     scored_cmds.append((total, c))
+                    candidate_stats.setdefault(c, {"command": c}).update({"q": q, "visits": n, "ucb": total})
                 
                 scored_cmds.sort(reverse=True)
-                best_cmd = scored_cmds[0][1]
+                ranked = [c for _, c in scored_cmds]
                 print(f"   UCB-lite 상위: { {c: t for t, c in scored_cmds[:3]} }")
             else:
                 # MCTS 비활성화 시 critic 점수만으로 선택
-                best_cmd = max(scores, key=lambda item: item[1])[0]
-            
-            action = parse_command_line(best_cmd)
+                ranked = [c for c, _ in sorted(scores, key=lambda item: item[1], reverse=True)]
+            best_cmd = ranked[0]
+            for c, s in scores:
+                candidate_stats.setdefault(c, {"command": c})["critic_score"] = s
+
+            # 상위 후보를 복제 컨텍스트에서 실제로 실행해 보고 승자만 메인 컨텍스트에서 실행
+            if ENABLE_MCTS_ROLLOUT:
+                with span("thought.rollout", candidates=len(ranked[:ROLLOUT_TOP_K])):
+                    winner, metrics["rollout_s"] = await _timed(
+                        run_rollouts(state, ranked[:ROLLOUT_TOP_K], ROLLOUT_BUDGET_S)
+                    )
+                if winner:
+                    best_cmd = winner
+                    metrics["chosen_by"] = "rollout"
+                    print(f"   롤아웃 승자: {winner}")
+
+            action = (parsed.get(best_cmd) or parse_command(best_cmd)).action
 
         # Fallback: 액션 선택 실패 시
         if not action:
             best_cmd = cmds[0] if cmds else "GET_DOM"
-            action = parse_command_line(best_cmd)
+            action = (parsed.get(best_cmd) or parse_command(best_cmd)).action
+
+        metrics["candidates"] = list(candidate_stats.values())
+        metrics["command"] = best_cmd
+        metrics["action_type"] = action.get("type") if action else None
+        metrics["url"] = state.get("current_url")
 
         # 4. 상태 업데이트
         state.update({
@@ -180,6 +437,8 @@ async def thought_node(state: AgentState) -> Dict[str, Any]:
             "critic_scores": [s for _, s in scores],
             "status": status,
             "last_command": best_cmd,
+            "last_command_url": state.get("current_url"),
+            "last_command_identities": state.get("element_identities"),
             "action": action,
         })
 
@@ -194,7 +453,17 @@ async def thought_node(state: AgentState) -> Dict[str, Any]:
             "thought": state["thought"],
             "action": action,
             "loop_count": state["loop_count"],
-            "candidate_commands": cmds
+            "candidate_commands": cmds,
+            "last_command": best_cmd,
+            "last_command_url": state.get("current_url"),
+            "last_command_identities": state.get("element_identities"),
+            "element_identities": state.get("element_identities"),
+            "current_url": state.get("current_url"),
+            "page_title": state.get("page_title"),
+            "page_content": state.get("page_content"),
+            "page_outline": state.get("page_outline"),
+            "scratchpad_summary": state.get("scratchpad_summary"),
+            "scratchpad_folded": state.get("scratchpad_folded", 0)
         }
 
     except Exception as e:
@@ -213,6 +482,7 @@ async def thought_node(state: AgentState) -> Dict[str, Any]:
 
 
 
+@traced("action")
 async def action_node(state: AgentState) -> Dict[str, Any]:
     """Action 노드: 실제 액션 실행"""
     print("⚡ Action 노드 실행 중...")
@@ -227,9 +497,13 @@ async def action_node(state: AgentState) -> Dict[str, Any]:
             state = ScratchpadManager.add_observation(state, observation)
             return {"observation": observation}
 
-        # 도구 실행
-        tool_executor = get_tool_executor()
-        result = await tool_executor.execute_action(action)
+        # 도구 실행 (선행 로드한 페이지로 이동하는 액션이면 페이지만 바꿔 끼움)
+        set_span_attrs(action_type=action.get("type"))
+        result = await _use_navigation_prefetch(state, action)
+        set_span_attrs(prefetch_hit=result is not None)
+        if result is None:
+            tool_executor = get_tool_executor()
+            result = await tool_executor.execute_action(action)
 
         # 관찰 결과 구성
         if result["success"]:
@@ -244,6 +518,7 @@ async def action_node(state: AgentState) -> Dict[str, Any]:
                     if "content" in result["data"]:
                         state["page_content"] = result["data"]["content"][:500]  # 처음 500자만
                         observation += f"\n페이지 내용: {result['data']['content'][:200]}..."
+                    _update_page_outline(state, result["data"])
                 elif isinstance(result["data"], str):
                     observation += f"\n결과: {result['data'][:200]}..."
         else:
@@ -257,8 +532,19 @@ async def action_node(state: AgentState) -> Dict[str, Any]:
         if result["success"]:
             state = clear_error(state)
 
+        # explanation/critique LLM 호출 동안 다음 루프의 DOM 스냅샷을 미리 추출
+        _start_snapshot_prefetch(state)
+
+        # 정책(always/on_failure)에 맞으면 액션 직후 화면도 백그라운드로 캡처
+        if action.get("type") != "SCREENSHOT":
+            get_screenshot_service().capture_in_background(
+                await get_current_page(),
+                f"{state.get('session_id') or 'session'}_loop{state['loop_count']}_{action.get('type', '').lower()}",
+                failed=not result["success"]
+            )
+
         print(f"   실행 결과: {observation[:100]}...")
-        return {"observation": observation}
+        return {"observation": observation, "page_outline": state.get("page_outline"), "element_identities": state.get("element_identities")}
 
     except Exception as e:
         error_msg = f"Action 노드 실행 중 오류: {str(e)}"
@@ -270,6 +556,7 @@ async def action_node(state: AgentState) -> Dict[str, Any]:
         return {"observation": observation}
 
 
+@traced("explanation")
 async def explanation_node(state: AgentState) -> Dict[str, Any]:
     """Explanation 노드: 결과 설명"""
     print("📝 Explanation 노드 실행 중...")
@@ -281,10 +568,11 @@ async def explanation_node(state: AgentState) -> Dict[str, Any]:
 
         # LLM 호출
         llm_manager = get_llm_manager()
-        response = await llm_manager.invoke_with_system(
+        response, elapsed = await _timed(llm_manager.invoke_with_system(
             system_prompt=system_prompt,
             user_message="Please explain what happened and its significance."
-        )
+        ))
+        _add_loop_metric(state, "post_action_llm_s", elapsed)
 
         # 응답 정리
         explanation = clean_response(response)
@@ -305,6 +593,98 @@ async def explanation_node(state: AgentState) -> Dict[str, Any]:
         return {"explanation": explanation}
 
 
+def _finish_critique(state: AgentState, done: bool, critique: str) -> Dict[str, Any]:
+    """LLM의 완료 판단에 루프 가드(min_loops, 무진전 연속 횟수, 도메인 휴리스틱, 최대 루프)를 적용하고
+    Q-통계/루프 지표/스크래치패드를 갱신해 상태 업데이트를 반환 (critique_node, reflect_node 공용)"""
+    # ---- 진행도/루프 가드 ----
+    loops = state.get("loop_count", 0)
+    min_loops = state.get("min_loops", 3)
+
+    prev_fp = state.get("last_progress_fingerprint")
+    curr_fp = _progress_fingerprint(state)
+    progress_gain = (prev_fp != curr_fp) and bool(curr_fp)
+
+    if progress_gain:
+        state["no_progress_streak"] = 0
+        state["last_progress_fingerprint"] = curr_fp
+    else:
+        state["no_progress_streak"] = state.get("no_progress_streak", 0) + 1
+
+    if loops < min_loops:
+        done = False
+
+    if state.get("no_progress_streak", 0) >= 3 and loops >= min_loops:
+        done = True
+        critique += "\nHeuristic: No progress for multiple steps → stopping."
+
+    # 도메인 휴리스틱 (OpenTable)
+    try:
+        url = state.get("current_url") or ""
+        text = (state.get("page_content") or "").lower()
+        if "opentable.com" in url:
+            success_keywords = ["reservation confirmed", "complete reservation", "you're all set"]
+            if any(k in text for k in success_keywords):
+                done = True
+                critique += "\nHeuristic: OpenTable success indicators found."
+    except Exception:
+        pass
+
+    # 이번 루프 커맨드의 보상 (루프 지표에도 남겨 궤적 저장소에서 커맨드별 Q를 다시 계산할 수 있게 함)
+    reward = 1.0 if done else (0.2 if progress_gain else 0.0)
+    if state.get("loop_metrics"):
+        state["loop_metrics"][-1].update({"reward": reward, "progress": progress_gain})
+
+    # Q-통계 업데이트 (세션 내 + 세션 간 저장소)
+    if ENABLE_MCTS_LITE:
+        try:
+            cmd = state.get("last_command")
+            if cmd:
+                stats = state.get("q_stats") or {}
+                ent = stats.get(cmd, {"Q": 0.0, "N": 0})
+                ent["N"] += 1
+                ent["Q"] = ent["Q"] + (reward - ent["Q"]) / ent["N"]
+                stats[cmd] = ent
+                state["q_stats"] = stats
+                if ENABLE_PERSISTENT_Q:
+                    # 커맨드를 고른 시점의 페이지 기준으로 적립
+                    get_q_store().update(state.get("last_command_url"), cmd, reward, state.get("last_command_identities"))
+        except Exception as e:
+            print(f"⚠️ Q-통계 업데이트 실패: {e}")
+
+    # 최대 루프 횟수 체크
+    if state["loop_count"] >= state["max_loops"]:
+        done = True
+        critique += f"\n최대 루프 횟수({state['max_loops']})에 도달하여 종료합니다."
+
+    if state.get("loop_metrics"):
+        metrics = state["loop_metrics"][-1]
+        metrics["loop_s"] = time.perf_counter() - metrics["started"]
+        metrics["done"] = done
+
+    print(f"   루프 {loops}, min_loops {min_loops}, no_progress_streak {state.get('no_progress_streak')}, done={done}")
+
+    # 상태 업데이트
+    state["done"] = done
+    state = ScratchpadManager.add_critique(state, critique, done)
+    if done:
+        end_session(state)
+    else:
+        # 예산을 넘었으면 다음 루프 LLM 호출과 겹쳐 오래된 항목 요약
+        start_scratchpad_fold(state)
+
+    status = "완료" if done else "계속"
+    print(f"   평가 결과: {status} - {critique[:100]}...")
+
+    return {
+        "done": done,
+        "critique": critique,
+        "no_progress_streak": state["no_progress_streak"],
+        "last_progress_fingerprint": state.get("last_progress_fingerprint"),
+        "q_stats": state.get("q_stats")
+    }
+
+
+@traced("critique")
 async def critique_node(state: AgentState) -> Dict[str, Any]:
     """Critique 노드: 완료 여부 판단"""
     print("🔍 Critique 노드 실행 중...")
@@ -316,10 +696,11 @@ async def critique_node(state: AgentState) -> Dict[str, Any]:
 
         # LLM 호출
         llm_manager = get_llm_manager()
-        response = await llm_manager.invoke_with_system(
+        response, elapsed = await _timed(llm_manager.invoke_with_system(
             system_prompt=system_prompt,
             user_message="Should we continue or is the task complete?"
-        )
+        ))
+        _add_loop_metric(state, "post_action_llm_s", elapsed)
 
         # 응답 정리
         critique = clean_response(response)
@@ -327,87 +708,66 @@ async def critique_node(state: AgentState) -> Dict[str, Any]:
         # 완료 여부 결정
         done = extract_critique_decision(response)
 
-        # ---- 진행도/루프 가드 ----
-        loops = state.get("loop_count", 0)
-        min_loops = state.get("min_loops", 3)
+        return _finish_critique(state, done, critique)
 
-        prev_fp = state.get("last_progress_fingerprint")
-        curr_fp = _progress_fingerprint(state)
-        progress_gain = (prev_fp != curr_fp) and bool(curr_fp)
+    except Exception as e:
+        error_msg = f"Critique 노드 실행 중 오류: {str(e)}"
+        print(f"❌ {error_msg}")
 
-        if progress_gain:
-            state["no_progress_streak"] = 0
-            state["last_progress_fingerprint"] = curr_fp
-        else:
-            state["no_progress_streak"] = state.get("no_progress_streak", 0) + 1
+        # 오류 발생 시 안전하게 종료
+        critique = f"평가 중 오류가 발생했습니다: {str(e)}"
+        state["done"] = True
+        state = add_error(state, error_msg)
 
-        if loops < min_loops:
-            done = False
+        return {
+            "done": True,
+            "critique": critique
+        }
 
-        if state.get("no_progress_streak", 0) >= 3 and loops >= min_loops:
-            done = True
-            critique += "\nHeuristic: No progress for multiple steps → stopping."
 
-        # 도메인 휴리스틱 (OpenTable)
-        try:
-            url = state.get("current_url") or ""
-            text = (state.get("page_content") or "").lower()
-            if "opentable.com" in url:
-                success_keywords = ["reservation confirmed", "complete reservation", "you're all set"]
-                if any(k in text for k in success_keywords):
-                    done = True
-                    critique += "\nHeuristic: OpenTable success indicators found."
-        except Exception:
-            pass
-
-        # 간단한 Q-통계 업데이트 (세션 내에서만)
-        if ENABLE_MCTS_LITE:
-            try:
-                cmd = state.get("last_command")
-                if cmd:
-                    stats = state.get("q_stats") or {}
-                    ent = stats.get(cmd, {"Q": 0.0, "N": 0})
-                    reward = 1.0 if done else (0.2 if progress_gain else 0.0)
-                    ent["N"] += 1
-                    ent["Q"] = ent["Q"] + (reward - ent["Q"]) / ent["N"]
-                    stats[cmd] = ent
-                    state["q_stats"] = stats
-            except Exception:
-                pass
-
-        # 최대 루프 횟수 체크
-        if state["loop_count"] >= state["max_loops"]:
-            done = True
-            critique += f"\n최대 루프 횟수({state['max_loops']})에 도달하여 종료합니다."
-
-        print(f"   루프 {loops}, min_loops {min_loops}, no_progress_streak {state.get('no_progress_streak')}, done={done}")
+@traced("reflect")
+async def reflect_node(state: AgentState) -> Dict[str, Any]:
+    """Reflect 노드: explanation + critique를 한 번의 구조화 호출로 수행 (fused 모드)"""
+    print("🪞 Reflect 노드 실행 중...")
 
-        # 상태 업데이트
-        state["done"] = done
-        state = ScratchpadManager.add_critique(state, critique, done)
+    try:
+        prompt_builder = get_prompt_builder()
+        system_prompt = prompt_builder.build_reflect_prompt(state)
 
-        status = "완료" if done else "계속"
-        print(f"   평가 결과: {status} - {critique[:100]}...")
+        llm_manager = get_llm_manager()
+        reflection, elapsed = await _timed(llm_manager.invoke_structured_with_system(
+            system_prompt=system_prompt,
+            user_message="Explain what happened and decide whether the task is complete.",
+            schema_model=Reflection
+        ))
+        _add_loop_metric(state, "post_action_llm_s", elapsed)
+
+        # 구조화 출력 미지원/실패 시 기존 두 단계로 폴백
+        if reflection is None:
+            print("   ⚠️ 구조화 출력 실패 → explanation/critique 분리 실행으로 폴백")
+            update = await explanation_node(state)
+            update.update(await critique_node(state))
+            return update
+
+        explanation = clean_response(reflection.explanation)
+        state["explanation"] = explanation
+        state = ScratchpadManager.add_explanation(state, explanation)
+        print(f"   설명: {explanation[:100]}...")
 
-        return {
-            "done": done,
-            "critique": critique,
-            "no_progress_streak": state["no_progress_streak"],
-            "last_progress_fingerprint": state.get("last_progress_fingerprint")
-        }
+        critique = f"{'COMPLETE' if reflection.done else 'CONTINUE'}: {reflection.rationale}"
+        return {"explanation": explanation, **_finish_critique(state, reflection.done, critique)}
 
     except Exception as e:
-        error_msg = f"Critique 노드 실행 중 오류: {str(e)}"
+        error_msg = f"Reflect 노드 실행 중 오류: {str(e)}"
         print(f"❌ {error_msg}")
 
-        # 오류 발생 시 안전하게 종료
-        critique = f"평가 중 오류가 발생했습니다: {str(e)}"
+        # critique_node와 같이 오류 시 안전하게 종료
         state["done"] = True
         state = add_error(state, error_msg)
 
         return {
             "done": True,
-            "critique": critique
+            "critique": f"평가 중 오류가 발생했습니다: {str(e)}"
         }
 
 
@@ -0,0 +1,214 @@
+"""
+접근성 트리 기반 압축 관찰(observation) 생성
+CDP 접근성 트리(role, name, state)를 평탄화하고, 반복되는 nav/footer 랜드마크를 한 번만 남긴 뒤
+목표와의 관련도 순으로 토큰 예산을 채워 문서 순서대로 렌더링
+"""
+
+import os
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from agentq.state import estimate_tokens
+
+OBSERVATION_TOKEN_BUDGET = int(os.getenv("AGENTQ_OBS_TOKENS", "800"))
+
+INTERACTIVE_ROLES = {
+    "button", "link", "textbox", "searchbox", "combobox", "listbox", "option", "checkbox", "radio",
+    "switch", "slider", "spinbutton", "menuitem", "menuitemcheckbox", "menuitemradio", "tab", "treeitem",
+}
+LANDMARK_ROLES = {"banner", "navigation", "main", "contentinfo", "complementary", "search", "form", "region"}
+# 사이트 공통 틀이라 우선순위를 낮추는 랜드마크
+CHROME_LANDMARKS = {"banner", "navigation", "contentinfo", "complementary"}
+# 이름이 없으면 의미가 없는 구조용 역할 (자식은 계속 탐색)
+SKIP_ROLES = {"generic", "none", "presentation", "InlineTextBox", "LineBreak", "RootWebArea", "WebArea", "group", "list", "listitem", "paragraph", "Section"}
+STATE_PROPERTIES = ("checked", "selected", "expanded", "disabled", "required", "invalid")
+NAME_MAX_CHARS = 100
+
+_STOPWORDS = {
+    "the", "and", "for", "with", "from", "that", "this", "what", "which", "into", "your", "you",
+    "are", "was", "were", "have", "has", "find", "show", "tell", "please", "page", "website",
+}
+
+
+def set_observation_budget(tokens: Optional[int]) -> None:
+    """관찰 토큰 예산 변경 (None이면 유지)"""
+    global OBSERVATION_TOKEN_BUDGET
+    if tokens:
+        OBSERVATION_TOKEN_BUDGET = tokens
+
+
+def _ax_value(field: Optional[Dict[str, Any]]) -> str:
+    value = (field or {}).get("value")
+    return "" if value is None else str(value).strip()
+
+
+def flatten_ax_tree(ax_nodes: List[Dict[str, Any]], id_map: Optional[Dict[int, str]] = None) -> List[Dict[str, Any]]:
+    """CDP Accessibility.getFullAXTree 결과를 문서 순서의 노드 목록으로 평탄화
+
+    id_map: backendDOMNodeId → data-agentq-id (인터랙티브 요소를 액션 문법의 ID와 연결)
+    """
+    id_map = id_map or {}
+    by_id = {node["nodeId"]: node for node in ax_nodes}
+    child_ids = {child for node in ax_nodes for child in node.get("childIds", [])}
+    roots = [node for node in ax_nodes if node["nodeId"] not in child_ids]
+
+    flat: List[Dict[str, Any]] = []
+    landmark_count = 0
+
+    # (노드, 깊이, 랜드마크, 부모 이름) 스택으로 전위 순회
+    stack: List[Tuple[Dict[str, Any], int, str, str]] = [(root, 0, "", "") for root in reversed(roots)]
+    while stack:
+        node, depth, landmark, parent_name = stack.pop()
+        role = _ax_value(node.get("role"))
+        name = _ax_value(node.get("name"))
+        emitted = False
+
+        if not node.get("ignored"):
+            if role in LANDMARK_ROLES and (role != "region" or name):
+                landmark_count += 1
+                landmark = f"{role}#{landmark_count}"
+            # 링크/버튼 안의 StaticText는 부모 이름과 같으면 중복
+            is_text = role == "StaticText"
+            keep = (
+                role in INTERACTIVE_ROLES
+                or (role == "heading" and name)
+                or (is_text and len(name) > 1 and name not in parent_name)
+                or (role not in SKIP_ROLES and role not in LANDMARK_ROLES and not is_text and name)
+            )
+            if keep:
+                states = []
+                for prop in node.get("properties", []):
+                    value = (prop.get("value") or {}).get("value")
+                    if prop.get("name") in STATE_PROPERTIES and value not in (None, False, "false"):
+                        states.append(prop["name"] if value is True or value == "true" else f"{prop['name']}={value}")
+                flat.append({
+                    "role": "text" if is_text else role,
+                    "name": name[:NAME_MAX_CHARS],
+                    "value": _ax_value(node.get("value"))[:NAME_MAX_CHARS],
+                    "states": states,
+                    "id": id_map.get(node.get("backendDOMNodeId"), ""),
+                    "depth": depth,
+                    "landmark": landmark,
+                })
+                emitted = True
+
+        next_parent_name = name if emitted and name else parent_name
+        for child_id in reversed(node.get("childIds", [])):
+            child = by_id.get(child_id)
+            if child is not None:
+                stack.append((child, depth + (1 if emitted else 0), landmark, next_parent_name))
+    return flat
+
+
+def nodes_from_elements(elements: List[Dict[str, Any]], text: str) -> List[Dict[str, Any]]:
+    """접근성 트리를 못 얻었을 때 index_interactive_elements 결과와 본문 텍스트로 같은 형태의 노드 구성"""
+    nodes = []
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if len(line) > 1:
+            nodes.append({"role": "text", "name": line[:NAME_MAX_CHARS], "value": "", "states": [], "id": "", "depth": 0, "landmark": ""})
+    for el in elements or []:
+        role = el.get("role") or el.get("tag") or ""
+        if role == "input":
+            role = {"checkbox": "checkbox", "radio": "radio", "submit": "button", "button": "button"}.get(el.get("type"), "textbox")
+        name = el.get("text") or el.get("placeholder") or el.get("name") or el.get("dom_id") or ""
+        nodes.append({"role": role, "name": name[:NAME_MAX_CHARS], "value": "", "states": [], "id": el.get("id", ""), "depth": 0, "landmark": ""})
+    return nodes
+
+
+def _objective_terms(objective: str) -> Set[str]:
+    return {w for w in re.findall(r"\w+", (objective or "").lower()) if len(w) > 2 and w not in _STOPWORDS}
+
+
+def _relevance(node: Dict[str, Any], terms: Set[str]) -> float:
+    role = node["role"]
+    if role in INTERACTIVE_ROLES:
+        score = 2.0
+    elif role == "heading":
+        score = 1.5
+    else:
+        score = 1.0
+    words = set(re.findall(r"\w+", f"{node['name']} {node['value']}".lower()))
+    score += 2.0 * min(3, len(terms & words))
+    landmark_role = node["landmark"].split("#")[0]
+    if landmark_role in CHROME_LANDMARKS:
+        score -= 1.0
+    elif landmark_role == "main":
+        score += 0.5
+    return score
+
+
+def render_node(node: Dict[str, Any]) -> str:
+    line = f"[{node['id']}] " if node["id"] else ""
+    line += node["role"]
+    if node["name"]:
+        line += f' "{node["name"]}"'
+    if node["value"] and node["value"] != node["name"]:
+        line += f' = "{node["value"]}"'
+    if node["states"]:
+        line += f" ({', '.join(node['states'])})"
+    return line
+
+
+def _dedupe_landmarks(nodes: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """내용이 같은 랜드마크(반응형 중복 nav, 반복 footer 등)는 처음 것만 남김"""
+    members: Dict[str, List[int]] = {}
+    for index, node in enumerate(nodes):
+        if node["landmark"]:
+            members.setdefault(node["landmark"], []).append(index)
+
+    seen: Set[Tuple[str, Tuple[Tuple[str, str], ...]]] = set()
+    dropped: Set[int] = set()
+    for landmark, indexes in members.items():
+        signature = (landmark.split("#")[0], tuple((nodes[i]["role"], nodes[i]["name"]) for i in indexes))
+        if signature in seen:
+            dropped.update(indexes)
+        else:
+            seen.add(signature)
+    return [node for i, node in enumerate(nodes) if i not in dropped], len(dropped)
+
+
+def build_observation(
+    nodes: List[Dict[str, Any]],
+    objective: str,
+    token_budget: Optional[int] = None
+) -> Tuple[str, Dict[str, int]]:
+    """관련도 순으로 예산을 채운 뒤 문서 순서로 렌더링한 (관찰 텍스트, 통계) 반환"""
+    # 생략 안내 줄 몫은 미리 빼 둠
+    budget = (token_budget or OBSERVATION_TOKEN_BUDGET) - estimate_tokens("... 0000 less relevant nodes omitted")
+    nodes, deduped = _dedupe_landmarks(nodes)
+    terms = _objective_terms(objective)
+
+    lines = [render_node(node) for node in nodes]
+    ranked = sorted(range(len(nodes)), key=lambda i: (-_relevance(nodes[i], terms), i))
+
+    selected: Set[int] = set()
+    landmarks: Set[str] = set()
+    used = 0
+    for i in ranked:
+        cost = estimate_tokens(lines[i]) + 1
+        landmark = nodes[i]["landmark"]
+        if landmark and landmark not in landmarks:
+            cost += estimate_tokens(f"## {landmark.split('#')[0]}") + 1
+        if used + cost > budget:
+            continue
+        selected.add(i)
+        used += cost
+        if landmark:
+            landmarks.add(landmark)
+
+    rendered: List[str] = []
+    current_landmark = ""
+    for i in sorted(selected):
+        landmark = nodes[i]["landmark"]
+        if landmark != current_landmark:
+            if landmark or current_landmark:
+                rendered.append(f"## {landmark.split('#')[0] or 'page'}")
+            current_landmark = landmark
+        rendered.append(lines[i])
+    omitted = len(nodes) - len(selected)
+    if omitted:
+        rendered.append(f"... {omitted} less relevant nodes omitted")
+
+    text = "\n".join(rendered)
+    return text, {"nodes": len(nodes) + deduped, "kept": len(selected), "deduped": deduped, "tokens": estimate_tokens(text)}
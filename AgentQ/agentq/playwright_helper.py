@@ -4,8 +4,20 @@ Playwright 헬퍼 함수들
 """
 
 import asyncio
-from typing import Optional
+import os
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Union
 from playwright.async_api import async_playwright, Browser, Page, Playwright, BrowserContext
+from agentq.network_filter import NetworkFilter, NetworkPolicy
+from agentq.har_replay import HarReplayer
+from agentq.resource_cache import ResourceCache
+from agentq.observation import INTERACTIVE_ROLES, flatten_ax_tree, nodes_from_elements
+from agentq.screenshots import get_screenshot_service
+from agentq.startup import get_startup_profile
+from agentq.tracing import traced
+from agentq.waits import track_page, get_wait_timeouts
 
 
 # 전역 변수로 간단하게 관리
@@ -13,6 +25,44 @@ _playwright: Optional[Playwright] = None
 _browser: Optional[Browser] = None
 _page: Optional[Page] = None
 
+# 컨텍스트별로 설치한 라우트 계층 (롤아웃 등 복제 컨텍스트에 같은 계층을 다시 설치하기 위함)
+_route_layers: "weakref.WeakKeyDictionary[BrowserContext, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+
+
+async def attach_route_layers(
+    target: Union[BrowserContext, Page],
+    network_filter: Optional[NetworkFilter] = None,
+    har_replayer: Optional[HarReplayer] = None,
+    resource_cache: Optional[ResourceCache] = None
+) -> Optional[Dict[str, Any]]:
+    """HAR 재생기/리소스 캐시/요청 필터를 정해진 순서로 설치하고 리소스 캐시 통계(없으면 None) 반환
+
+    라우트는 나중에 등록된 것이 먼저 실행됨 → 재생기/캐시를 먼저 달아 필터가 넘긴 요청을 받게 함.
+    재생 중에는 HAR만 쓰도록 리소스 캐시를 달지 않습니다.
+    """
+    counters = None
+    if har_replayer:
+        await har_replayer.attach(target)
+    elif resource_cache:
+        counters = await resource_cache.attach(target)
+    if network_filter:
+        await network_filter.attach(target)
+    context = target.context if isinstance(target, Page) else target
+    _route_layers[context] = {"network_filter": network_filter, "har_replayer": har_replayer, "resource_cache": resource_cache}
+    return counters
+
+
+async def clone_route_layers(source: BrowserContext, target: BrowserContext) -> Optional[Dict[str, Any]]:
+    """source 컨텍스트에 설치된 것과 같은 라우트 계층을 target에 설치"""
+    layers = _route_layers.get(source)
+    if not layers:
+        return None
+    return await attach_route_layers(target, **layers)
+
+
+# 동시에 도는 코루틴(롤아웃 등)이 각자 다른 페이지에 도구를 적용하기 위한 태스크 단위 오버라이드
+_page_override: ContextVar[Optional[Page]] = ContextVar("agentq_page_override", default=None)
+
 
 class PlaywrightHelper:
     """Playwright 헬퍼 클래스 - 테스트 시스템과 통합용"""
@@ -23,10 +73,24 @@ class PlaywrightHelper:
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
         self.headless: bool = True
-
-    async def setup(self, headless: bool = True, debug_port: Optional[int] = None):
-        """브라우저 설정 및 시작"""
+        self.network_filter: Optional[NetworkFilter] = None
+        self.har_replayer: Optional[HarReplayer] = None
+        self.resource_cache: Optional[ResourceCache] = None
+        # 현재 태스크 컨텍스트의 리소스 캐시 통계 (태스크 전후 차이로 태스크별 적중률 계산)
+        self.resource_counters: Optional[Dict[str, Any]] = None
+        # self.context를 헬퍼가 직접 만들었는지 (CDP로 연결한 사용자 컨텍스트/페이지는 닫지 않음)
+        self.owns_context: bool = False
+
+    async def setup(
+        self,
+        headless: bool = True,
+        debug_port: Optional[int] = None,
+        network_policy: Optional[NetworkPolicy] = None,
+        resource_cache: Optional[ResourceCache] = None
+    ):
+        """브라우저 설정 및 시작 (network_policy가 주어지면 요청 필터, resource_cache가 주어지면 리소스 캐시 설치)"""
         self.headless = headless
+        self.resource_cache = resource_cache
 
         try:
             # Playwright 시작
@@ -42,6 +106,7 @@ class PlaywrightHelper:
                     self.page = contexts[0].pages[0]
                 else:
                     self.context = await self.browser.new_context()
+                    self.owns_context = True
                     self.page = await self.context.new_page()
             else:
                 # 새 브라우저 인스턴스 시작
@@ -50,26 +115,118 @@ class PlaywrightHelper:
                     args=['--no-sandbox', '--disable-dev-shm-usage']
                 )
                 self.context = await self.browser.new_context()
+                self.owns_context = True
                 self.page = await self.context.new_page()
 
+            # 대기 유틸리티가 진행 중 요청을 볼 수 있도록 첫 내비게이션 전에 추적 시작
+            track_page(self.page)
+
+            if network_policy:
+                self.network_filter = NetworkFilter(network_policy)
+            self.resource_counters = await attach_route_layers(
+                self.context or self.page, network_filter=self.network_filter, resource_cache=resource_cache
+            )
+
             print(f"✅ 브라우저 설정 완료 (headless: {headless})")
 
         except Exception as e:
             print(f"❌ 브라우저 설정 실패: {e}")
             raise
 
+    async def new_task_context(self, har_mode: Optional[str] = None, har_path: Optional[str] = None) -> Page:
+        """태스크마다 새 컨텍스트/페이지로 교체 (HAR 기록 또는 재생)
+
+        har_mode="record": har_path에 요청/응답을 본문까지 기록 (컨텍스트를 닫을 때 파일이 써짐)
+        har_mode="replay": har_path의 HAR로만 응답하고 실제 네트워크로는 나가지 않음
+        """
+        if har_mode not in (None, "record", "replay"):
+            raise ValueError(f"지원하지 않는 HAR 모드: {har_mode}")
+
+        # 이전 컨텍스트를 닫아야 기록 중이던 HAR이 저장됨 (헬퍼가 만든 컨텍스트만)
+        if self.context and self.owns_context:
+            await self.context.close()
+        if self.har_replayer:
+            print(f"📼 {self.har_replayer.summary()}")
+            self.har_replayer = None
+
+        if har_mode == "record":
+            os.makedirs(os.path.dirname(os.path.abspath(har_path)), exist_ok=True)
+            self.context = await self.browser.new_context(
+                record_har_path=har_path,
+                record_har_content="embed",
+                record_har_mode="full"
+            )
+        else:
+            self.context = await self.browser.new_context()
+        self.owns_context = True
+
+        # 기록 중에는 HAR에 실제 응답이 남도록 리소스 캐시를 달지 않음
+        if har_mode == "replay":
+            self.har_replayer = HarReplayer(har_path)
+        self.resource_counters = await attach_route_layers(
+            self.context,
+            network_filter=self.network_filter,
+            har_replayer=self.har_replayer,
+            resource_cache=self.resource_cache if har_mode is None else None
+        )
+
+        self.page = await self.context.new_page()
+        track_page(self.page)
+        set_current_page(self.page)
+        return self.page
+
+    async def open_snapshot_page(
+        self,
+        url: str,
+        storage_state: Dict[str, Any],
+        har_replayer: Optional[HarReplayer] = None
+    ) -> Page:
+        """저장해 둔 스토리지 상태(쿠키/로컬 스토리지)로 별도 컨텍스트를 열어 url을 다시 띄움
+
+        태스크 페이지를 다음 태스크가 계속 쓰는 동안 평가 등을 따로 돌리기 위한 용도이며,
+        호출자가 page.context.close()로 정리합니다.
+        """
+        context = await self.browser.new_context(storage_state=storage_state)
+        await attach_route_layers(
+            context, network_filter=self.network_filter, har_replayer=har_replayer, resource_cache=self.resource_cache
+        )
+        page = await context.new_page()
+        track_page(page)
+        try:
+            await page.goto(url, wait_until="load", timeout=30000)
+        except Exception:
+            await context.close()
+            raise
+        return page
+
+    def set_network_policy(self, network_policy: NetworkPolicy):
+        """태스크별 정책 교체 (라우트는 그대로 두고 판정 기준만 바꿈)"""
+        if self.network_filter:
+            self.network_filter.policy = network_policy
+
     async def cleanup(self):
         """리소스 정리"""
         try:
-            if self.page:
-                await self.page.close()
-            if self.context:
-                await self.context.close()
+            if self.network_filter and self.network_filter.totals["blocked"]:
+                totals = self.network_filter.totals
+                print(f"🚫 총 {totals['blocked']}건 요청 차단, 약 {totals['bytes'] / 1024 / 1024:.1f}MB 절감(추정)")
+            if self.har_replayer:
+                print(f"📼 {self.har_replayer.summary()}")
+            if self.resource_cache:
+                stats = self.resource_cache.summary()
+                print(f"📦 리소스 캐시: 적중 {stats['hits'] + stats['revalidated']}건 / 미스 {stats['misses']}건 "
+                      f"({stats['hit_ratio']*100:.1f}%), {stats['bytes_avoided'] / 1024 / 1024:.1f}MB 절감")
+            if self.owns_context:
+                if self.page:
+                    await self.page.close()
+                if self.context:
+                    await self.context.close()
             if self.browser:
                 await self.browser.close()
             if self.playwright:
                 await self.playwright.stop()
 
+            get_wait_timeouts().save()
             print("✅ Playwright 리소스 정리 완료")
 
         except Exception as e:
@@ -141,19 +298,19 @@ class PlaywrightHelper:
             print(f"❌ URL 가져오기 실패: {e}")
             return None
 
-    async def take_screenshot(self, path: str = "screenshot.png") -> bool:
-        """스크린샷 촬영"""
+    async def take_screenshot(self, path: str = "screenshot.png") -> Optional[str]:
+        """스크린샷 촬영 (실제로 저장되는 .jpg 경로 반환, 실패 시 None)"""
         try:
             if not self.page:
-                return False
+                return None
 
-            await self.page.screenshot(path=path)
+            path = await get_screenshot_service().capture(self.page, path, force=True)
             print(f"📸 스크린샷 저장: {path}")
-            return True
+            return path
 
         except Exception as e:
             print(f"❌ 스크린샷 실패: {e}")
-            return False
+            return None
 
     async def get_page_content(self) -> Optional[str]:
         """페이지 HTML 내용 가져오기"""
@@ -181,15 +338,19 @@ async def connect_to_chrome(debug_port: int = 9222) -> Optional[Page]:
     global _playwright, _browser, _page
 
     try:
+        profile = get_startup_profile()
+
         # Playwright 시작
         if not _playwright:
-            _playwright = await async_playwright().start()
+            with profile.phase("Playwright 시작"):
+                _playwright = await async_playwright().start()
 
         # Chrome에 연결
         if not _browser:
-            _browser = await _playwright.chromium.connect_over_cdp(
-                f"http://localhost:{debug_port}"
-            )
+            with profile.phase("Chrome CDP 연결"):
+                _browser = await _playwright.chromium.connect_over_cdp(
+                    f"http://localhost:{debug_port}"
+                )
 
         # 페이지 가져오기 또는 생성
         if not _page:
@@ -200,6 +361,7 @@ async def connect_to_chrome(debug_port: int = 9222) -> Optional[Page]:
                 context = await _browser.new_context()
                 _page = await context.new_page()
 
+        track_page(_page)
         print(f"✅ Chrome에 연결됨 (포트: {debug_port})")
         return _page
 
@@ -208,10 +370,35 @@ async def connect_to_chrome(debug_port: int = 9222) -> Optional[Page]:
         return None
 
 
+def set_current_page(page: Optional[Page]):
+    """전역 현재 페이지 지정 (PlaywrightHelper 등 외부에서 만든 페이지를 도구에 연결)"""
+    global _page
+    _page = page
+
+
+@contextmanager
+def use_page(page: Page):
+    """with 블록 안(현재 태스크)에서만 get_current_page()가 지정한 페이지를 반환"""
+    token = _page_override.set(page)
+    try:
+        yield page
+    finally:
+        _page_override.reset(token)
+
+
+def is_page_pinned() -> bool:
+    """현재 태스크가 use_page로 페이지를 고정해 쓰는 중인지 (이 경우 현재 페이지를 바꿔 끼울 수 없음)"""
+    return _page_override.get() is not None
+
+
 async def get_current_page() -> Optional[Page]:
     """현재 페이지 반환 (연결되지 않았으면 자동 연결 시도)"""
     global _page
 
+    override = _page_override.get()
+    if override:
+        return override
+
     if _page:
         return _page
 
@@ -219,6 +406,7 @@ async def get_current_page() -> Optional[Page]:
     return await connect_to_chrome()
 
 
+@traced("cdp.navigate_to")
 async def navigate_to(url: str) -> bool:
     """지정된 URL로 이동"""
     try:
@@ -235,20 +423,22 @@ async def navigate_to(url: str) -> bool:
         return False
 
 
-async def take_screenshot(path: str = "screenshot.png") -> bool:
-    """스크린샷 촬영"""
+@traced("cdp.take_screenshot")
+async def take_screenshot(path: str = "screenshot.png") -> Optional[str]:
+    """스크린샷 촬영 (실제로 저장되는 .jpg 경로 반환, 실패 시 None)"""
     try:
         page = await get_current_page()
         if not page:
-            return False
+            return None
 
-        await page.screenshot(path=path)
+        # 뷰포트만 축소 JPEG로 캡처하고 파일 쓰기는 백그라운드 큐에 맡김
+        path = await get_screenshot_service().capture(page, path, force=True)
         print(f"📸 스크린샷 저장: {path}")
-        return True
+        return path
 
     except Exception as e:
         print(f"❌ 스크린샷 실패: {e}")
-        return False
+        return None
 
 
 async def get_page_title() -> Optional[str]:
@@ -296,6 +486,7 @@ async def cleanup():
             await _playwright.stop()
             _playwright = None
 
+        get_wait_timeouts().save()
         print("✅ Playwright 리소스 정리 완료")
 
     except Exception as e:
@@ -303,6 +494,7 @@ async def cleanup():
 
 
 # 편의 함수들
+@traced("cdp.click_element")
 async def click_element(selector: str) -> bool:
     """요소 클릭"""
     try:
@@ -319,6 +511,7 @@ async def click_element(selector: str) -> bool:
         return False
 
 
+@traced("cdp.type_text")
 async def type_text(selector: str, text: str) -> bool:
     """텍스트 입력"""
     try:
@@ -335,6 +528,7 @@ async def type_text(selector: str, text: str) -> bool:
         return False
 
 
+@traced("cdp.get_page_content")
 async def get_page_content() -> Optional[str]:
     """페이지 HTML 내용 가져오기"""
     try:
@@ -348,6 +542,7 @@ async def get_page_content() -> Optional[str]:
         print(f"❌ 페이지 내용 가져오기 실패: {e}")
         return None
 
+@traced("cdp.index_interactive_elements")
 async def index_interactive_elements():
     try:
         page = await get_current_page()
@@ -385,6 +580,7 @@ async def index_interactive_elements():
         print(f"❌ index_interactive_elements 오류: {e}")
         return []
 
+@traced("cdp.click_by_agentq_id")
 async def click_by_agentq_id(agentq_id: str) -> bool:
     try:
         page = await get_current_page()
@@ -410,6 +606,7 @@ async def click_by_agentq_id(agentq_id: str) -> bool:
         print(f"❌ click_by_agentq_id 오류: {e}")
         return False
 
+@traced("cdp.set_input_by_agentq_id")
 async def set_input_by_agentq_id(agentq_id: str, text: str) -> bool:
     try:
         page = await get_current_page()
@@ -458,9 +655,11 @@ async def set_input_by_agentq_id(agentq_id: str, text: str) -> bool:
         print(f"❌ set_input_by_agentq_id 오류: {e}")
         return False
 
+@traced("cdp.clear_by_agentq_id")
 async def clear_by_agentq_id(agentq_id: str) -> bool:
     return await set_input_by_agentq_id(agentq_id, "")
 
+@traced("cdp.submit_by_agentq_id")
 async def submit_by_agentq_id(agentq_id: str) -> bool:
     try:
         page = await get_current_page()
@@ -491,7 +690,52 @@ async def submit_by_agentq_id(agentq_id: str) -> bool:
         print(f"❌ submit_by_agentq_id 오류: {e}")
         return False
 
-async def get_dom_snapshot():
+@traced("cdp.get_accessibility_nodes")
+async def get_accessibility_nodes(page: Page) -> Optional[List[Dict[str, Any]]]:
+    """CDP 접근성 트리를 평탄화한 노드 목록 (인터랙티브 노드에는 data-agentq-id 연결). CDP를 못 쓰면 None"""
+    try:
+        client = await page.context.new_cdp_session(page)
+    except Exception:
+        return None
+    try:
+        ax_nodes = (await client.send("Accessibility.getFullAXTree"))["nodes"]
+
+        # 인터랙티브 노드의 backendDOMNodeId → data-agentq-id (액션 문법의 ID)
+        backend_ids = [
+            node["backendDOMNodeId"] for node in ax_nodes
+            if not node.get("ignored") and "backendDOMNodeId" in node
+            and (node.get("role") or {}).get("value") in INTERACTIVE_ROLES
+        ]
+        id_map: Dict[int, str] = {}
+        if backend_ids:
+            await client.send("DOM.getDocument", {"depth": 0})
+            pushed = await client.send("DOM.pushNodesByBackendIdsToFrontend", {"backendNodeIds": backend_ids})
+            pairs = [(b, n) for b, n in zip(backend_ids, pushed["nodeIds"]) if n]
+            attributes = await asyncio.gather(
+                *(client.send("DOM.getAttributes", {"nodeId": n}) for _, n in pairs),
+                return_exceptions=True
+            )
+            for (backend_id, _), attrs in zip(pairs, attributes):
+                if isinstance(attrs, Exception):
+                    continue
+                values = dict(zip(attrs["attributes"][::2], attrs["attributes"][1::2]))
+                agentq_id = values.get("data-agentq-id") or (f"#{values['id']}" if values.get("id") else "")
+                if agentq_id:
+                    id_map[backend_id] = agentq_id
+        return flatten_ax_tree(ax_nodes, id_map)
+    except Exception as e:
+        print(f"⚠️ 접근성 트리 추출 실패, 텍스트 스냅샷으로 대체: {e}")
+        return None
+    finally:
+        try:
+            await client.detach()
+        except Exception:
+            pass
+
+
+@traced("cdp.get_dom_snapshot")
+async def get_dom_snapshot(include_ax: bool = True):
+    """페이지 스냅샷 (ax_nodes: 접근성 트리 노드, 없으면 elements/content로 구성)"""
     try:
         page = await get_current_page()
         if not page: return None
@@ -499,12 +743,16 @@ async def get_dom_snapshot():
         title = await page.title()
         url = page.url
         text = await page.evaluate("() => document.body.innerText.slice(0, 3000)")
-        return {"title": title, "url": url, "content": text, "elements": elements}
+        ax_nodes = await get_accessibility_nodes(page) if include_ax else None
+        if ax_nodes is None:
+            ax_nodes = nodes_from_elements(elements, text)
+        return {"title": title, "url": url, "content": text, "elements": elements, "ax_nodes": ax_nodes}
     except Exception as e:
         print(f"❌ get_dom_snapshot 오류: {e}")
         return None
 
 
+@traced("cdp.find_and_use_search_bar")
 async def find_and_use_search_bar(query: str) -> bool:
     """페이지 내에서 검색창을 찾아 검색을 시도"""
     try:
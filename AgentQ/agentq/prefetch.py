@@ -0,0 +1,139 @@
+"""
+후보 이동 대상 선행 로드
+thought_node가 낸 후보 중 링크 CLICK/NAVIGATE의 대상 URL을 critic 채점(과 롤아웃)이 도는 동안
+같은 컨텍스트의 백그라운드 페이지에서 미리 띄워 두고, 선택된 액션이 그 URL로 이동하면
+현재 페이지를 미리 로드된 페이지로 바꿔 끼워 전체 페이지 로드 대기를 없앰
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import urldefrag, urljoin
+
+from playwright.async_api import Page
+
+from agentq.prompt_utils import parse_command_line
+from agentq.waits import track_page
+
+# 한 번에 미리 띄울 후보 수 (LLM이 제안한 순서 기준 상위)
+PREFETCH_TOP_K = 2
+PREFETCH_TIMEOUT_MS = 15000
+# GET만으로도 상태가 바뀔 수 있는 링크는 미리 열지 않음
+PREFETCH_SKIP_PATTERNS = ("logout", "log-out", "signout", "sign-out", "delete", "remove", "unsubscribe", "cancel")
+
+# 링크 href (javascript:, # 등 실제 이동이 아닌 것은 None)
+LINK_HREF_JS = """(el) => {
+    const a = el.closest('a[href]');
+    if (!a || a.target === '_blank' || a.hasAttribute('download')) return null;
+    const href = a.getAttribute('href') || '';
+    if (!href || href.startsWith('#') || href.toLowerCase().startsWith('javascript:')) return null;
+    return a.href;
+}"""
+
+
+def normalize_url(url: str) -> str:
+    """프래그먼트와 끝의 / 차이는 같은 대상으로 봄"""
+    return urldefrag(url)[0].rstrip("/")
+
+
+async def resolve_target(page: Page, action: Optional[Dict[str, Any]]) -> Optional[str]:
+    """액션이 이동할 URL (링크가 아닌 클릭, 검색 등은 None)"""
+    if not action:
+        return None
+    url = None
+    if action.get("type") == "NAVIGATE":
+        url = urljoin(page.url, action.get("target", ""))
+    elif action.get("type") == "CLICK" and action.get("target"):
+        # 도구 실행기와 같은 방식으로 요소를 찾음 (agentq-id 또는 CSS 선택자)
+        target = action["target"]
+        loc = page.locator(f'[data-agentq-id="{target}"]' if action.get("by") == "agentq-id" else target)
+        try:
+            if await loc.count() == 0:
+                return None
+            url = await loc.first.evaluate(LINK_HREF_JS)
+        except Exception:
+            return None
+    if not url or not url.startswith(("http://", "https://")):
+        return None
+    if any(pattern in url.lower() for pattern in PREFETCH_SKIP_PATTERNS):
+        return None
+    return url
+
+
+class NavigationPrefetch:
+    """한 루프의 선행 로드 묶음 (URL별 백그라운드 페이지와 로드 태스크)"""
+
+    def __init__(self, source: Page):
+        self.source = source
+        self.started = time.perf_counter()
+        self._loads: Dict[str, Tuple[str, asyncio.Task]] = {}  # 정규화 URL → (원래 URL, 로드 태스크)
+
+    @classmethod
+    async def start(cls, source: Page, commands: List[str], top_k: int = PREFETCH_TOP_K) -> "NavigationPrefetch":
+        prefetch = cls(source)
+        for command in commands:
+            if len(prefetch._loads) >= top_k:
+                break
+            url = await resolve_target(source, parse_command_line(command))
+            if url and normalize_url(url) != normalize_url(source.url) and normalize_url(url) not in prefetch._loads:
+                prefetch._loads[normalize_url(url)] = (url, asyncio.create_task(prefetch._load(url)))
+        return prefetch
+
+    @property
+    def urls(self) -> List[str]:
+        return [url for url, _ in self._loads.values()]
+
+    async def _load(self, url: str) -> Tuple[Page, float]:
+        # 같은 컨텍스트라 쿠키/요청 필터/리소스 캐시가 그대로 적용됨
+        page = await self.source.context.new_page()
+        track_page(page)
+        started = time.perf_counter()
+        try:
+            await page.goto(url, wait_until="load", timeout=PREFETCH_TIMEOUT_MS)
+        except BaseException:
+            # 실패하거나 취소돼도(다른 후보가 선택됨) 백그라운드 페이지는 닫음
+            await page.close()
+            raise
+        return page, time.perf_counter() - started
+
+    async def take(self, url: str) -> Optional[Tuple[Page, float]]:
+        """url을 미리 로드했으면 (페이지, 액션 시점에 이미 끝나 있던 로드 시간) 반환
+
+        아직 로드 중이면 끝날 때까지 기다립니다 (메인 페이지에서 새로 로드하는 것보다 늦지 않음).
+        """
+        entry = self._loads.pop(normalize_url(url), None)
+        if not entry:
+            return None
+        task = entry[1]
+        waited = time.perf_counter()
+        try:
+            page, load_s = await task
+        except Exception:
+            return None
+        waited = time.perf_counter() - waited
+        return page, max(0.0, load_s - waited)
+
+    def discard(self) -> int:
+        """쓰지 않은 선행 로드를 취소하고 그 수(낭비된 로드)를 반환 (페이지 정리는 백그라운드)"""
+        tasks = [task for _, task in self._loads.values()]
+        self._loads.clear()
+        if tasks:
+            closing = asyncio.create_task(_close_loaded(tasks))
+            _closing.add(closing)
+            closing.add_done_callback(_closing.discard)
+        return len(tasks)
+
+
+# 폐기 중인 정리 태스크 (가비지 컬렉션되지 않도록 참조 유지)
+_closing: Set[asyncio.Task] = set()
+
+
+async def _close_loaded(tasks: List[asyncio.Task]):
+    for task in tasks:
+        task.cancel()
+    for result in await asyncio.gather(*tasks, return_exceptions=True):
+        if isinstance(result, tuple):
+            try:
+                await result[0].close()
+            except Exception:
+                pass
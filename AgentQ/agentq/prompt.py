@@ -17,13 +17,15 @@ Your goal is to achieve the user's objective by thinking step-by-step and execut
 1.  **Analyze the 'Previous observation'**: This is the most important information. Your next action must be a logical next step based on the result of the last action.
 2.  **Check for Errors**: If the observation indicates a failure, try a different command. Do not repeat a failing action.
 3.  **Stay on Task**: Ensure your commands directly contribute to the overall 'Objective'.
-4.  **Use the Page Content**: The observation contains the current page's content. Use it to decide which elements to interact with (e.g., which `data-agentq-id` to click or type in).
+4.  **Use the Page Outline**: The page outline lists the current page's most relevant elements. Use it to decide which elements to interact with (e.g., which `data-agentq-id` to click or type in).
 
 **Context:**
 - Objective: {objective}
 - Current URL: {current_url}
 - Plan: {plan}
 - Previous observation: {observation}
+- Page outline (accessibility tree, `[id]` is the data-agentq-id to use in commands):
+{page_outline}
 
 **Action Grammar:**
 - GOTO [URL=<http(s)://...>]
@@ -42,15 +44,20 @@ Based on your analysis, generate a concise thought, a list of 3-5 next possible
 
     "explanation": "You are AgentQ, an advanced AI agent that can interpret web interaction results.\n\nYou just executed an action and received an observation. Your task is to:\n1. Interpret what happened\n2. Explain the significance of the result\n3. Determine if this brings us closer to the objective\n\nCurrent context:\n- Objective: {objective}\n- Action taken: {action}\n- Observation: {observation}\n\nPlease provide a clear explanation of what happened and its significance.",
 
-    "critique": "You are AgentQ, an advanced AI agent that evaluates task completion.\n\nYour task is to determine if the objective has been accomplished based on the current state.\n\nCurrent context:\n- Objective: {objective}\n- Plan: {plan}\n- Loop count: {loop_count}/{max_loops}\n- Latest explanation: {explanation}\n- Scratchpad: {scratchpad}\n\nEvaluation criteria:\n1. Has the main objective been achieved?\n2. Is there sufficient information to provide a complete answer?\n3. Are we making progress or stuck in a loop?\n4. Should we continue or stop here?\n\nRespond with either:\n- \"CONTINUE\" if more actions are needed\n- \"COMPLETE\" if the objective has been accomplished\n\nProvide your reasoning.",
+    "critique": "You are AgentQ, an advanced AI agent that evaluates task completion.\n\nYour task is to determine if the objective has been accomplished based on the current state.\n\nCurrent context:\n- Objective: {objective}\n- Plan: {plan}\n- Scratchpad: {scratchpad}\n- Loop count: {loop_count}/{max_loops}\n- Latest explanation: {explanation}\n\nEvaluation criteria:\n1. Has the main objective been achieved?\n2. Is there sufficient information to provide a complete answer?\n3. Are we making progress or stuck in a loop?\n4. Should we continue or stop here?\n\nRespond with either:\n- \"CONTINUE\" if more actions are needed\n- \"COMPLETE\" if the objective has been accomplished\n\nProvide your reasoning.",
+
+    "reflect": "You are AgentQ, an advanced AI agent that interprets web interaction results and evaluates task completion.\n\nYou just executed an action and received an observation. In a single response:\n1. Explain what happened and whether it brings us closer to the objective\n2. Decide whether the objective has been fully accomplished (done)\n3. Give a short rationale for that decision\n\nCurrent context:\n- Objective: {objective}\n- Plan: {plan}\n- Scratchpad: {scratchpad}\n- Loop count: {loop_count}/{max_loops}\n- Action taken: {action}\n- Observation: {observation}\n\nSet done to true only if no further actions are needed to accomplish the objective.",
+
+    "summarize": "You are AgentQ's memory. Condense the earlier scratchpad entries given by the user (and the previous summary, if any) into one running summary for the objective below.\n\nObjective: {objective}\n\nKeep what was tried, what was observed, which URLs and element IDs mattered, and what is still left to do. Drop repeated or irrelevant details. Answer in at most {max_words} words, as plain text.",
 
     "critic": """You are AgentQ's self-critic. Your task is to rank the given candidate commands.
 
 You are given:
 - Objective: {objective}
+- Plan: {plan}
+- Scratchpad: {scratchpad}
 - Current URL: {current_url}
 - Page Title: {page_title}
-- Scratchpad: {scratchpad}
 - Latest observation: {observation}
 
 Scoring rules (0.0~1.0):
@@ -98,6 +105,16 @@ FEW_SHOT_EXAMPLES = {
             "decision": "COMPLETE",
             "reasoning": "사용자의 질문에 대한 정확한 답변을 얻었으므로 작업이 완료되었습니다."
         }
+    ],
+
+    "reflect": [
+        {
+            "action": "SEARCH: 프랑스 수도",
+            "observation": "검색 완료. 결과: 파리(Paris)는 프랑스의 수도이자 최대 도시입니다...",
+            "explanation": "Google 검색을 통해 프랑스의 수도가 파리라는 정보를 찾았습니다.",
+            "done": "true",
+            "rationale": "사용자의 질문에 대한 정확한 답변을 얻었으므로 작업이 완료되었습니다."
+        }
     ]
 }
 
@@ -138,6 +155,11 @@ def get_few_shot_examples(prompt_type: str, num_examples: int = 2) -> str:
             f"Example:\nObjective: {ex['objective']}\nExplanation: {ex['explanation']}\nDecision: {ex['decision']}\nReasoning: {ex['reasoning']}"
             for ex in examples
         ])
+    elif prompt_type == "reflect":
+        return "\n\n".join([
+            f"Example:\nAction: {ex['action']}\nObservation: {ex['observation']}\nExplanation: {ex['explanation']}\nDone: {ex['done']}\nRationale: {ex['rationale']}"
+            for ex in examples
+        ])
 
     return ""
 
@@ -169,5 +191,6 @@ def format_state_for_prompt(state: AgentState) -> Dict[str, str]:
         "max_loops": str(state["max_loops"]),
         "scratchpad": get_scratchpad_content(state),
         "current_url": state["current_url"] or "No current URL",
-        "page_title": state["page_title"] or "No page title"
+        "page_title": state["page_title"] or "No page title",
+        "page_outline": state.get("page_outline") or "Not captured yet (use GET_DOM)"
     }
@@ -6,6 +6,7 @@ import re
 from typing import Dict, List, Optional, Any
 from agentq.state import AgentState, get_scratchpad_content, add_to_scratchpad
 from agentq.prompt import build_prompt_with_examples, format_state_for_prompt
+from agentq.command_grammar import parse_command
 
 
 class PromptBuilder:
@@ -50,6 +51,15 @@ class PromptBuilder:
             **context
         )
 
+    def build_reflect_prompt(self, state: AgentState) -> str:
+        """Reflect(explanation + critique) 단계 프롬프트 구성"""
+        context = format_state_for_prompt(state)
+        return build_prompt_with_examples(
+            "reflect",
+            include_examples=self.include_examples,
+            **context
+        )
+
     def build_critic_prompt(self, state: AgentState) -> str:
         context = format_state_for_prompt(state)
         return build_prompt_with_examples(
@@ -110,13 +120,13 @@ class ScratchpadManager:
         """포맷된 스크래치패드 내용 반환"""
         return get_scratchpad_content(state, max_entries)
 
+_OUTPUT_BLOCK = re.compile(r'(?mi)^(PLAN|THOUGHT|COMMANDS|STATUS)\s*:\s*')
+
 def split_output_blocks(response: str) -> dict:
-    import re
     blocks = {"PLAN": "", "THOUGHT": "", "COMMANDS": "", "STATUS": ""}
     if not response:
         return blocks
-    pattern = r'(?mi)^(PLAN|THOUGHT|COMMANDS|STATUS)\s*:\s*'
-    parts = re.split(pattern, response)
+    parts = _OUTPUT_BLOCK.split(response)
     if len(parts) < 3:
         return blocks
     current = None
@@ -156,118 +166,8 @@ def extract_commands_and_status(response: str):
     return cmds, status
 
 def parse_command_line(cmd: str):
-    import re
-    if not cmd:
-        return None
-    c = cmd.strip()
-
-    # NAVIGATE / GOTO
-    m = re.match(r'^(?:GOTO|GO TO|NAVIGATE)\s*\[\s*URL\s*=\s*<([^>\]]+)>\s*\]\s*$', c, re.I)
-    if m:
-        return {"type": "NAVIGATE", "target": m.group(1).strip()}
-    # NAVIGATE / GOTO (tolerant forms without angle brackets)
-    m = re.match(r'^(?:GOTO|GO TO|NAVIGATE)\s*\[\s*URL\s*=\s*([^\]\s]+)\s*\]\s*$', c, re.I)
-    if m:
-        return {"type": "NAVIGATE", "target": m.group(1).strip()}
-    m = re.match(r'^(?:GOTO|GO TO|NAVIGATE)\s+(https?://\S+)\s*$', c, re.I)
-    if m:
-        return {"type": "NAVIGATE", "target": m.group(1).strip()}
-    m = re.match(r'^(?:NAVIGATE|GOTO)\s*:\s*(.+)$', c, re.I)
-    if m:
-        return {"type": "NAVIGATE", "target": m.group(1).strip()}
-
-    # SEARCH  (handles [TEXT=...] or "SEARCH: query")
-    m = re.match(
-        r'''^SEARCH\s*
-            (?:
-               \[\s*(?:TEXT\s*=\s*)?([^\]]+?)\s*\]      # bracket form
-              |
-               :\s*([^\n\r#]+?)\s*$                     # colon form to end-of-line
-            )''', c, re.I | re.X)
-    if m:
-        q = (m.group(1) or m.group(2) or "").strip()
-        # trim trailing parenthetical/period/comment tails
-        q = re.sub(r'\s*\(.*?\)\s*$', '', q)
-        q = re.sub(r'\s*[\.\)]\s*$', '', q)
-        q = re.sub(r'\s+#.*$', '', q)
-        q = re.sub(r'\s{2,}', ' ', q).strip()
-        return {"type": "SEARCH", "content": q}
-
-    # CLICK  (ID or selector)
-    m = re.match(r'^CLICK\s*\[\s*(?:ID|SELECTOR)?\s*=\s*([^\]]+)\s*\]\s*$', c, re.I)
-    if m:
-        tgt = m.group(1).strip()
-        # If target format is ID=foo or starts with ID=
-        id_match = re.match(r'^ID\s*=\s*(.+)$', tgt, re.I)
-        if id_match:
-            return {"type": "CLICK", "target": id_match.group(1).strip(), "by": "agentq-id"}
-        # otherwise treat as generic selector
-        return {"type": "CLICK", "target": tgt}
-    m = re.match(r'^CLICK\s*:\s*(.+)$', c, re.I)
-    if m:
-        tgt = m.group(1).strip()
-        id_match = re.match(r'^ID\s*=\s*(.+)$', tgt, re.I)
-        if id_match:
-            return {"type": "CLICK", "target": id_match.group(1).strip(), "by": "agentq-id"}
-        return {"type": "CLICK", "target": tgt}
-
-    # TYPE  ([ID][TEXT=...]  or  TYPE: selector || text)
-    m = re.match(r'^TYPE\s*\[\s*([^\]]+)\s*\]\s*\[\s*(?:TEXT\s*=\s*)?([^\]]+)\s*\]\s*$', c, re.I)
-    if m:
-        tgt = m.group(1).strip()
-        txt = m.group(2).strip()
-        id_match = re.match(r'^ID\s*=\s*(.+)$', tgt, re.I)
-        if id_match:
-            return {"type": "TYPE", "target": id_match.group(1).strip(), "content": txt, "by": "agentq-id"}
-        return {"type": "TYPE", "target": tgt, "content": txt}
-    m = re.match(r'^TYPE\s*:\s*(.+?)\s*\|\|\s*(.+)$', c, re.I)
-    if m:
-        tgt = m.group(1).strip()
-        txt = m.group(2).strip()
-        id_match = re.match(r'^ID\s*=\s*(.+)$', tgt, re.I)
-        if id_match:
-            return {"type": "TYPE", "target": id_match.group(1).strip(), "content": txt, "by": "agentq-id"}
-        return {"type": "TYPE", "target": tgt, "content": txt}
-
-    # SUBMIT / CLEAR
-    m = re.match(r'^SUBMIT\s*\[\s*ID\s*=\s*([^\]]+)\s*\]\s*$', c, re.I)
-    if m:
-        return {"type": "SUBMIT", "target": m.group(1).strip(), "by": "agentq-id"}
-    m = re.match(r'^CLEAR\s*\[\s*ID\s*=\s*([^\]]+)\s*\]\s*$', c, re.I)
-    if m:
-        return {"type": "CLEAR", "target": m.group(1).strip(), "by": "agentq-id"}
-
-    # SCROLL
-    m = re.match(r'^SCROLL\s*\[\s*(UP|DOWN)\s*\]\s*$', c, re.I)
-    if m:
-        return {"type": "SCROLL", "target": m.group(1).lower()}
-    m = re.match(r'^SCROLL\s*:\s*(up|down)\s*$', c, re.I)
-    if m:
-        return {"type": "SCROLL", "target": m.group(1).lower()}
-
-    # GET_DOM
-    if re.match(r'^(GET[_\s-]?DOM)\s*$', c, re.I):
-        return {"type": "GET_DOM"}
-
-    # SCREENSHOT [PATH=...]
-    m = re.match(r'^SCREENSHOT(?:\s*\[\s*PATH\s*=\s*([^\]]+)\s*\])?\s*$', c, re.I)
-    if m:
-        return {"type": "SCREENSHOT", "target": (m.group(1) or "screenshot.png").strip()}
-
-    # WAIT: seconds
-    m = re.match(r'^WAIT\s*:\s*(\d+)\s*$', c, re.I)
-    if m:
-        return {"type": "WAIT", "content": m.group(1).strip()}
-    m = re.match(r'^WAIT\s*\[\s*SECONDS\s*=\s*(\d+)\s*\]\s*$', c, re.I)
-    if m:
-        return {"type": "WAIT", "content": m.group(1).strip()}
-
-    # ASK USER HELP
-    m = re.match(r'^ASK\s*USER\s*HELP\s*\[\s*TEXT\s*=\s*(.+?)\s*\]\s*$', c, re.I)
-    if m:
-        return {"type": "ASK_USER_HELP", "content": m.group(1).strip()}
-
-    return None
+    # 문법은 command_grammar에 미리 컴파일되어 있음 (잘못된 커맨드의 오류 위치는 parse_command로)
+    return parse_command(cmd).action
 
 def extract_action_from_response(response: str):
     # Prefer first item in COMMANDS block
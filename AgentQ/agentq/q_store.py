@@ -0,0 +1,164 @@
+"""
+세션 간 유지되는 Q-값 저장소 (MCTS-lite 액션 선택용)
+(사이트 도메인, 정규화된 URL 패턴, 커맨드 템플릿) 단위로 SQLite에 누적
+"""
+
+import os
+import re
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qsl
+
+# 하루 지날 때마다 과거 방문 수(N)에 곱해지는 감쇠율 → 오래된 평균일수록 새 보상에 빨리 밀려남
+Q_DECAY_PER_DAY = 0.9
+DEFAULT_Q_STORE_PATH = os.getenv("AGENTQ_Q_STORE_PATH", ".agentq/q_values.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS q_values (
+    domain TEXT NOT NULL,
+    url_pattern TEXT NOT NULL,
+    command_template TEXT NOT NULL,
+    q REAL NOT NULL,
+    n REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (domain, url_pattern, command_template)
+)
+"""
+
+
+def normalize_domain(url: Optional[str]) -> str:
+    """URL에서 www. 를 뗀 호스트만 추출"""
+    host = (urlparse(url or "").hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def normalize_url_pattern(url: Optional[str]) -> str:
+    """경로의 숫자/해시 세그먼트와 쿼리 값을 지워 같은 종류의 페이지를 하나로 묶음
+
+    예: /r/cote-nyc/12345?covers=2&date=2024-01-01 → /r/cote-nyc/{n}?covers&date
+    """
+    parsed = urlparse(url or "")
+    segments = []
+    for seg in parsed.path.rstrip("/").split("/"):
+        if re.fullmatch(r"\d+|[0-9a-f]{8,}|[0-9a-f-]{36}", seg, re.I):
+            seg = "{n}"
+        segments.append(seg)
+    path = "/".join(segments) or "/"
+    keys = sorted({k for k, _ in parse_qsl(parsed.query, keep_blank_values=True)})
+    return f"{path}?{'&'.join(keys)}" if keys else path
+
+
+def element_identities(ax_nodes: List[Dict[str, Any]]) -> Dict[str, str]:
+    """data-agentq-id → 페이지를 다시 띄워도 유지되는 요소 식별자 (역할 + 접근성 이름)
+
+    같은 역할/이름의 요소가 여러 개면 문서 순서로 #2, #3 ...을 붙여 구분합니다.
+    """
+    identities: Dict[str, str] = {}
+    seen: Dict[str, int] = {}
+    for node in ax_nodes or []:
+        agentq_id = node.get("id") or ""
+        if not re.fullmatch(r"el_\d+", agentq_id):
+            continue
+        name = re.sub(r"\s+", " ", (node.get("name") or "").strip())
+        identity = f'{node.get("role") or "element"}:"{name}"'
+        seen[identity] = seen.get(identity, 0) + 1
+        identities[agentq_id] = identity if seen[identity] == 1 else f"{identity}#{seen[identity]}"
+    return identities
+
+
+def normalize_command(cmd: str, identities: Optional[Dict[str, str]] = None) -> str:
+    """페이지마다 새로 매겨지는 data-agentq-id 번호를 요소 식별자로 바꾼 커맨드 템플릿
+
+    식별자를 모르는 ID는 그대로 둡니다 (서로 다른 요소가 한 Q-값을 나눠 갖지 않도록).
+    """
+    c = re.sub(r"\s+", " ", (cmd or "").strip())
+    if identities:
+        c = re.sub(r"\bel_\d+\b", lambda m: identities.get(m.group(0), m.group(0)), c)
+    verb, _, rest = c.partition(" ")
+    return f"{verb.upper()} {rest}".strip()
+
+
+class QValueStore:
+    """SQLite 기반 Q-값 저장소
+
+    페이지 패턴 단위로 한 번에 읽어 메모리에 캐시하므로, 같은 페이지 패턴에 머무는 동안의
+    조회는 딕셔너리 접근만으로 끝납니다. 갱신은 캐시와 DB에 함께 씁니다.
+    """
+
+    def __init__(self, path: str = DEFAULT_Q_STORE_PATH, decay_per_day: float = Q_DECAY_PER_DAY):
+        self.path = path
+        self.decay_per_day = decay_per_day
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+        # (domain, url_pattern) → {command_template: (q, n, updated_at)}
+        self._cache: Dict[Tuple[str, str], Dict[str, Tuple[float, float, float]]] = {}
+
+    def _load_page(self, domain: str, url_pattern: str) -> Dict[str, Tuple[float, float, float]]:
+        key = (domain, url_pattern)
+        if key not in self._cache:
+            rows = self._conn.execute(
+                "SELECT command_template, q, n, updated_at FROM q_values WHERE domain = ? AND url_pattern = ?",
+                key,
+            ).fetchall()
+            self._cache[key] = {tpl: (q, n, ts) for tpl, q, n, ts in rows}
+        return self._cache[key]
+
+    def _decayed_n(self, n: float, updated_at: float, now: float) -> float:
+        days = max(0.0, now - updated_at) / 86400.0
+        return n * (self.decay_per_day ** days)
+
+    def get_many(
+        self, url: Optional[str], commands: Iterable[str], identities: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Dict[str, float]]:
+        """현재 페이지의 후보 커맨드들에 대한 {cmd: {"Q", "N"}}를 한 번에 조회 (identities: element_identities 결과)"""
+        page = self._load_page(normalize_domain(url), normalize_url_pattern(url))
+        now = time.time()
+        stats = {}
+        for cmd in commands:
+            entry = page.get(normalize_command(cmd, identities))
+            if entry:
+                q, n, ts = entry
+                stats[cmd] = {"Q": q, "N": self._decayed_n(n, ts, now)}
+        return stats
+
+    def update(
+        self, url: Optional[str], cmd: str, reward: float, identities: Optional[Dict[str, str]] = None
+    ) -> Dict[str, float]:
+        """감쇠된 방문 수를 기준으로 증분 평균 갱신"""
+        domain, url_pattern = normalize_domain(url), normalize_url_pattern(url)
+        template = normalize_command(cmd, identities)
+        page = self._load_page(domain, url_pattern)
+        now = time.time()
+
+        q, n, ts = page.get(template, (0.0, 0.0, now))
+        n = self._decayed_n(n, ts, now) + 1
+        q = q + (reward - q) / n
+        page[template] = (q, n, now)
+
+        self._conn.execute(
+            "INSERT OR REPLACE INTO q_values (domain, url_pattern, command_template, q, n, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (domain, url_pattern, template, q, n, now),
+        )
+        self._conn.commit()
+        return {"Q": q, "N": n}
+
+    def close(self):
+        self._conn.close()
+
+
+# 전역 Q-값 저장소 인스턴스
+_q_store: Optional[QValueStore] = None
+
+
+def get_q_store() -> QValueStore:
+    """Q-값 저장소 싱글톤 인스턴스 반환"""
+    global _q_store
+    if _q_store is None:
+        _q_store = QValueStore()
+    return _q_store
@@ -0,0 +1,363 @@
+"""
+정적 리소스 디스크 캐시
+page.route를 쓰면 Chromium의 HTTP 캐시가 꺼지므로(요청 필터/HAR 재생이 라우트를 씀) 매 컨텍스트·매 태스크가
+같은 JS 번들/CSS/이미지를 다시 받게 됨. Cache-Control/Expires/Vary를 지키면서 이런 하위 리소스를 디스크에 저장해
+모든 컨텍스트와 워커 프로세스가 함께 쓰도록 함
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from playwright.async_api import BrowserContext, Page, Route
+
+RESOURCE_CACHE_DIR = os.getenv("AGENTQ_RESOURCE_CACHE_DIR", ".agentq/resource_cache")
+RESOURCE_CACHE_MAX_MB = int(os.getenv("AGENTQ_RESOURCE_CACHE_MAX_MB", "512"))
+# 서비스 모드/--pool-size 브라우저에도 캐시를 달지 여부
+ENABLE_RESOURCE_CACHE = os.getenv("AGENTQ_RESOURCE_CACHE", "0") == "1"
+
+# 캐시 대상 하위 리소스 타입 (문서/XHR은 상태에 따라 달라지므로 항상 네트워크로)
+CACHEABLE_RESOURCE_TYPES = {"script", "stylesheet", "image", "font"}
+CACHEABLE_STATUSES = {200, 203}
+MAX_ENTRY_BYTES = 10 * 1024 * 1024
+# Cache-Control/Expires가 없을 때 Last-Modified 기준 휴리스틱 유효기간 (경과 시간의 10%, 최대 하루)
+HEURISTIC_FRACTION = 0.1
+HEURISTIC_MAX_S = 24 * 3600
+EVICT_TARGET_RATIO = 0.9
+# 저장된 본문은 이미 풀린 상태이고, 공유 캐시이므로 쿠키는 다시 내보내지 않음
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "set-cookie"}
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Union[str, bool]]:
+    """'max-age=60, no-cache' → {"max-age": "60", "no-cache": True}"""
+    directives: Dict[str, Union[str, bool]] = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip().strip('"') if arg else True
+    return directives
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _seconds(value: Union[str, bool, None]) -> Optional[int]:
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness_lifetime(headers: Dict[str, str], now: Optional[float] = None) -> Optional[float]:
+    """응답이 저장 시점부터 신선한 시간(초). 저장하면 안 되는 응답이면 None
+
+    공유 캐시 규칙을 따릅니다: no-store/private, Vary: *, Set-Cookie 응답은 저장하지 않고
+    s-maxage > max-age > Expires - Date > Last-Modified 휴리스틱 순으로 유효기간을 정하며,
+    no-cache는 저장하되 매번 재검증(유효기간 0)합니다. Age 헤더만큼은 이미 지난 것으로 봅니다.
+    """
+    now = now or time.time()
+    cc = parse_cache_control(headers.get("cache-control"))
+    if "no-store" in cc or "private" in cc or headers.get("vary", "").strip() == "*" or "set-cookie" in headers:
+        return None
+    if "no-cache" in cc:
+        return 0.0
+
+    age = _seconds(headers.get("age")) or 0
+    for directive in ("s-maxage", "max-age"):
+        if directive in cc:
+            seconds = _seconds(cc[directive])
+            if seconds is not None:
+                return max(0.0, seconds - age)
+
+    date = _http_date(headers.get("date")) or now
+    expires = headers.get("expires")
+    if expires is not None:
+        expires_at = _http_date(expires)
+        # 잘못된 Expires 값(예: "0")은 이미 만료된 것으로 취급
+        return max(0.0, (expires_at or 0.0) - date - age)
+
+    last_modified = _http_date(headers.get("last-modified"))
+    if last_modified and last_modified < date:
+        return max(0.0, min((date - last_modified) * HEURISTIC_FRACTION, HEURISTIC_MAX_S) - age)
+    return 0.0 if ("etag" in headers) else None
+
+
+def _vary_names(headers: Dict[str, str]) -> List[str]:
+    return sorted({name.strip().lower() for name in headers.get("vary", "").split(",") if name.strip()})
+
+
+def _vary_values(names: List[str], request_headers: Dict[str, str]) -> Dict[str, str]:
+    return {name: " ".join(request_headers.get(name, "").split()) for name in names}
+
+
+def new_counters() -> Dict[str, Any]:
+    """attach 대상(컨텍스트/페이지)별 통계"""
+    return {"hits": 0, "revalidated": 0, "misses": 0, "stored": 0, "bytes_avoided": 0}
+
+
+def counters_delta(after: Dict[str, Any], before: Dict[str, Any]) -> Dict[str, Any]:
+    """태스크 전후 통계 차이에 적중률을 붙여 반환"""
+    delta = {key: after[key] - before.get(key, 0) for key in after}
+    served = delta["hits"] + delta["revalidated"]
+    lookups = served + delta["misses"]
+    delta["hit_ratio"] = served / lookups if lookups else 0.0
+    return delta
+
+
+class ResourceCache:
+    """URL + Vary 헤더 값으로 색인하는 공유 하위 리소스 캐시
+
+    메타데이터(URL 해시별 JSON, Vary 조합마다 변형 하나)와 본문(내용 해시, 같은 번들은 한 번만 저장)을
+    따로 저장합니다. 쓰기는 임시 파일 → 교체라 여러 워커 프로세스가 같은 폴더를 동시에 써도 되고,
+    용량 초과 시 mtime이 오래된 파일부터 지웁니다(LRU 근사, 조회 시 mtime 갱신).
+    만료된 항목은 ETag/Last-Modified가 있으면 조건부 요청으로 재검증해 304면 본문을 재사용합니다.
+    """
+
+    def __init__(self, cache_dir: str = RESOURCE_CACHE_DIR, max_bytes: int = RESOURCE_CACHE_MAX_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._total_bytes = sum(os.path.getsize(p) for p in self._entry_paths())
+        self.totals = new_counters()
+        self.totals["evictions"] = 0
+
+    # ---- 디스크 저장소 ----
+
+    def _meta_path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, "meta", key[:2], f"{key}.json")
+
+    def _body_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, "body", digest[:2], digest)
+
+    def _entry_paths(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".tmp"):
+                    yield os.path.join(root, name)
+
+    def _write(self, path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        previous = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(tmp_path, path)
+        self._total_bytes += len(data) - previous
+
+    def _read_variants(self, url: str) -> List[Dict[str, Any]]:
+        try:
+            with open(self._meta_path(url), "r", encoding="utf-8") as f:
+                return json.load(f)["variants"]
+        except (OSError, ValueError, KeyError):
+            return []
+
+    def _write_variants(self, url: str, variants: List[Dict[str, Any]]):
+        data = json.dumps({"url": url, "variants": variants}, ensure_ascii=False)
+        self._write(self._meta_path(url), data.encode("utf-8"))
+
+    def lookup(self, url: str, request_headers: Dict[str, str]) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        """요청 헤더와 Vary 값이 맞는 변형과 본문 (신선도는 호출자가 확인)"""
+        for variant in self._read_variants(url):
+            if _vary_values(variant["vary_names"], request_headers) != variant["vary"]:
+                continue
+            body_path = self._body_path(variant["body"])
+            try:
+                with open(body_path, "rb") as f:
+                    body = f.read()
+                os.utime(body_path)
+                os.utime(self._meta_path(url))
+            except OSError:
+                # 본문만 먼저 지워진 경우 → 미스
+                return None
+            return variant, body
+        return None
+
+    def store(
+        self,
+        url: str,
+        request_headers: Dict[str, str],
+        status: int,
+        headers: Dict[str, str],
+        body: bytes,
+        lifetime: float
+    ):
+        digest = hashlib.sha256(body).hexdigest()
+        body_path = self._body_path(digest)
+        if not os.path.exists(body_path):
+            self._write(body_path, body)
+        vary_names = _vary_names(headers)
+        variant = {
+            "vary_names": vary_names,
+            "vary": _vary_values(vary_names, request_headers),
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() not in DROPPED_HEADERS},
+            "body": digest,
+            "size": len(body),
+            "stored_at": time.time(),
+            "expires_at": time.time() + lifetime,
+        }
+        variants = [v for v in self._read_variants(url) if v["vary"] != variant["vary"] or v["vary_names"] != vary_names]
+        self._write_variants(url, variants + [variant])
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def refresh(self, url: str, variant: Dict[str, Any], headers: Dict[str, str], lifetime: float):
+        """304 재검증 결과로 헤더와 만료 시각 갱신"""
+        variant["headers"].update({k: v for k, v in headers.items() if k.lower() not in DROPPED_HEADERS})
+        variant["expires_at"] = time.time() + lifetime
+        variants = [v for v in self._read_variants(url) if v["vary"] != variant["vary"]]
+        self._write_variants(url, variants + [variant])
+
+    def _evict(self):
+        entries = []
+        for path in self._entry_paths():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICT_TARGET_RATIO
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.totals["evictions"] += 1
+        self._total_bytes = total
+
+    # ---- 라우트 ----
+
+    async def attach(self, target: Union[BrowserContext, Page]) -> Dict[str, Any]:
+        """컨텍스트(권장) 또는 페이지에 캐시 라우트를 설치하고 그 대상의 통계 dict 반환
+
+        캐시 대상이 아닌 요청은 route.fallback()으로 넘기므로, 요청 필터처럼 먼저 판단해야 하는
+        라우트는 이 뒤에 등록해야 합니다(나중에 등록한 라우트가 먼저 실행됨).
+        """
+        counters = new_counters()
+
+        async def handle(route: Route):
+            await self._handle(route, counters)
+
+        await target.route("**/*", handle)
+        return counters
+
+    def _count(self, counters: Dict[str, Any], key: str, amount: int = 1):
+        counters[key] += amount
+        self.totals[key] += amount
+
+    async def _handle(self, route: Route, counters: Dict[str, Any]):
+        request = route.request
+        request_cc = parse_cache_control(request.headers.get("cache-control"))
+        if (
+            request.method != "GET"
+            or request.resource_type not in CACHEABLE_RESOURCE_TYPES
+            or "range" in request.headers
+            or "authorization" in request.headers
+            or "no-store" in request_cc
+        ):
+            await route.fallback()
+            return
+
+        cached = await asyncio.to_thread(self.lookup, request.url, request.headers)
+        if cached and "no-cache" not in request_cc:
+            variant, body = cached
+            if variant["expires_at"] > time.time():
+                self._count(counters, "hits")
+                self._count(counters, "bytes_avoided", variant["size"])
+                await route.fulfill(status=variant["status"], headers=variant["headers"], body=body)
+                return
+            if await self._revalidate(route, variant, body, counters):
+                return
+
+        try:
+            response = await route.fetch()
+        except Exception:
+            # 네트워크 오류 등은 브라우저가 직접 처리하도록 넘김
+            await route.fallback()
+            return
+        await self._fulfill_and_store(route, response, counters)
+
+    async def _fulfill_and_store(self, route: Route, response: Any, counters: Dict[str, Any]):
+        """네트워크 응답으로 요청을 처리하고 캐시할 수 있으면 저장 (같은 Vary 변형은 교체)"""
+        request = route.request
+        try:
+            body = await response.body()
+        except Exception:
+            await route.fallback()
+            return
+        self._count(counters, "misses")
+        headers = response.headers
+        await route.fulfill(
+            status=response.status,
+            headers={k: v for k, v in headers.items() if k.lower() not in DROPPED_HEADERS},
+            body=body
+        )
+
+        lifetime = freshness_lifetime(headers)
+        if response.status in CACHEABLE_STATUSES and lifetime is not None and len(body) <= MAX_ENTRY_BYTES:
+            await asyncio.to_thread(self.store, request.url, request.headers, response.status, headers, body, lifetime)
+            self._count(counters, "stored")
+
+    async def _revalidate(self, route: Route, variant: Dict[str, Any], body: bytes, counters: Dict[str, Any]) -> bool:
+        """만료된 항목을 조건부 요청으로 확인해 응답 (처리했으면 True)
+
+        304면 캐시 본문으로 응답하고 만료 시각을 갱신하며, 서버가 새 본문(200 등)을 주면 다시 요청하지 않고
+        그 응답으로 처리하면서 캐시 항목을 교체합니다.
+        """
+        validators = {}
+        if "etag" in variant["headers"]:
+            validators["if-none-match"] = variant["headers"]["etag"]
+        if "last-modified" in variant["headers"]:
+            validators["if-modified-since"] = variant["headers"]["last-modified"]
+        if not validators:
+            return False
+        try:
+            response = await route.fetch(headers={**route.request.headers, **validators})
+        except Exception:
+            return False
+        if response.status != 304:
+            await self._fulfill_and_store(route, response, counters)
+            return True
+        lifetime = freshness_lifetime({**variant["headers"], **response.headers}) or 0.0
+        await asyncio.to_thread(self.refresh, route.request.url, variant, response.headers, lifetime)
+        self._count(counters, "revalidated")
+        self._count(counters, "bytes_avoided", variant["size"])
+        await route.fulfill(status=variant["status"], headers=variant["headers"], body=body)
+        return True
+
+    def summary(self) -> Dict[str, Any]:
+        served = self.totals["hits"] + self.totals["revalidated"]
+        lookups = served + self.totals["misses"]
+        return {
+            **self.totals,
+            "hit_ratio": served / lookups if lookups else 0.0,
+            "size_mb": self._total_bytes / 1024 / 1024,
+        }
+
+
+_resource_cache: Optional[ResourceCache] = None
+
+
+def get_resource_cache() -> ResourceCache:
+    """프로세스 전역 리소스 캐시 (같은 폴더를 쓰는 워커 프로세스끼리는 디스크로 공유)"""
+    global _resource_cache
+    if _resource_cache is None:
+        _resource_cache = ResourceCache()
+    return _resource_cache
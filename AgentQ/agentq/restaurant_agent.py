@@ -3,10 +3,10 @@
 OpenTable 등 예약 사이트에 특화된 기능
 """
 
-import asyncio
 from typing import Dict, Any, Optional
 from agentq.playwright_helper import get_current_page, navigate_to
 from agentq.web_selectors import OpenTableHelper, get_selector_for_site
+from agentq.waits import wait_for_page_settle
 
 
 class RestaurantReservationAgent:
@@ -38,12 +38,11 @@ class RestaurantReservationAgent:
             if not success:
                 return {"success": False, "message": "OpenTable 접속 실패"}
             
-            await asyncio.sleep(3)  # 페이지 로딩 대기
-            
             # 2. 페이지 구조 분석
             page = await get_current_page()
             if not page:
                 return {"success": False, "message": "페이지 접근 실패"}
+            await wait_for_page_settle(page)
             
             # 검색 입력 필드 찾기
             search_selectors = [
@@ -95,8 +94,9 @@ class RestaurantReservationAgent:
             print(f"   검색어 입력: {query}")
             
             # 4. 검색 실행 (Enter 키 또는 버튼 클릭)
+            url_before = page.url
             await page.press(search_input, 'Enter')
-            await asyncio.sleep(3)
+            await wait_for_page_settle(page, old_url=url_before)
             
             # 5. 결과 확인
             current_url = page.url
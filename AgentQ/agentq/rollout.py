@@ -0,0 +1,160 @@
+"""
+MCTS 롤아웃: 상위 후보 커맨드를 복제한 브라우저 컨텍스트에서 실제로 실행해 보고
+결과 페이지를 critic으로 평가하여 메인 컨텍스트에서 실행할 승자를 고름
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from agentq.state import AgentState
+from agentq.llm_utils import get_llm_manager
+from agentq.prompt_utils import get_prompt_builder, parse_command_line
+from agentq.playwright_helper import (
+    get_current_page, use_page, index_interactive_elements, get_dom_snapshot, clone_route_layers
+)
+from agentq.prefetch import PREFETCH_SKIP_PATTERNS
+from agentq.tools import get_tool_executor
+
+# 외부에 부작용을 남기거나(폼 제출) 페이지를 바꾸지 않는 액션은 롤아웃하지 않음
+ROLLOUT_SKIP_TYPES = {"SUBMIT", "ASK_USER_HELP", "SCREENSHOT", "WAIT", "GET_DOM"}
+ROLLOUT_NAV_TIMEOUT_MS = 15000
+
+# 클릭 대상이 서버 상태를 바꿀 수 있으면 그 이유 (폼 제출 버튼, GET이 아닌/스크립트 링크), 아니면 null
+CLICK_SIDE_EFFECT_JS = """(el) => {
+    const submitter = el.closest('button, input[type=submit], input[type=image]');
+    if (submitter && submitter.form) {
+        const type = (submitter.getAttribute('type') || 'submit').toLowerCase();
+        if (type === 'submit' || type === 'image') return 'form submit';
+    }
+    const a = el.closest('a');
+    if (a) {
+        const method = (a.getAttribute('data-method') || 'get').toLowerCase();
+        if (method !== 'get') return method.toUpperCase() + ' link';
+        if ((a.getAttribute('href') || '').toLowerCase().startsWith('javascript:')) return 'script link';
+        return 'href:' + a.href;
+    }
+    return el.hasAttribute('onclick') ? 'script handler' : null;
+}"""
+
+
+async def _click_side_effect(page, action: Dict[str, Any]) -> Optional[str]:
+    """CLICK을 롤아웃하면 안 되는 이유 (대상을 확인할 수 없어도 안전하게 제외)"""
+    target = action.get("target")
+    if not target:
+        return "no target"
+    loc = page.locator(f'[data-agentq-id="{target}"]' if action.get("by") == "agentq-id" else target)
+    try:
+        if await loc.count() == 0:
+            return "target not found"
+        reason = await loc.first.evaluate(CLICK_SIDE_EFFECT_JS)
+    except Exception:
+        return "target not inspectable"
+    if reason and reason.startswith("href:"):
+        href = reason[len("href:"):].lower()
+        return "state-changing link" if any(pattern in href for pattern in PREFETCH_SKIP_PATTERNS) else None
+    return reason
+
+
+async def _rollout_one(browser, source_context, storage_state: Dict[str, Any], url: str, cmd: str) -> Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]:
+    """새 컨텍스트에 현재 상태(스토리지 + URL)를 복원한 뒤 커맨드 하나를 실행"""
+    context = await browser.new_context(storage_state=storage_state)
+    try:
+        # 메인 컨텍스트와 같은 요청 필터/HAR 재생/리소스 캐시 라우트를 설치
+        await clone_route_layers(source_context, context)
+        page = await context.new_page()
+        await page.goto(url, wait_until="load", timeout=ROLLOUT_NAV_TIMEOUT_MS)
+        with use_page(page):
+            # 같은 DOM이면 메인 페이지와 같은 순서로 data-agentq-id가 매겨짐
+            await index_interactive_elements()
+            result = await get_tool_executor().execute_action(parse_command_line(cmd))
+            snapshot = await get_dom_snapshot(include_ax=False)
+        return cmd, result, snapshot
+    finally:
+        await context.close()
+
+
+async def _score_outcomes(state: AgentState, outcomes: List[Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]]) -> Dict[str, float]:
+    """각 커맨드가 도달한 페이지를 critic 한 번의 호출로 채점"""
+    from agentq.nodes import CriticOutput
+
+    lines = []
+    for cmd, result, snapshot in outcomes:
+        snapshot = snapshot or {}
+        lines.append(
+            f"- {cmd}\n"
+            f"  result: {'ok' if result.get('success') else 'failed'} - {result.get('message', '')[:100]}\n"
+            f"  url: {snapshot.get('url', '')} | title: {snapshot.get('title', '')}\n"
+            f"  content: {(snapshot.get('content') or '')[:300]}"
+        )
+
+    critic_output = await get_llm_manager().invoke_structured_with_system(
+        system_prompt=get_prompt_builder().build_critic_prompt(state),
+        user_message="Each command below was tried in a sandbox. Rank the commands by the page it led to:\n" + "\n".join(lines),
+        schema_model=CriticOutput
+    )
+    if not critic_output or not critic_output.scores:
+        return {}
+    allowed = {cmd.strip() for cmd, _, _ in outcomes}
+    scores: Dict[str, float] = {}
+    for item in critic_output.scores:
+        key = item.cmd.strip()
+        if key in allowed and key not in scores:
+            scores[key] = max(0.0, min(1.0, item.score))
+    return scores
+
+
+async def run_rollouts(state: AgentState, candidates: List[str], budget_s: float) -> Optional[str]:
+    """상위 후보들을 병렬 롤아웃해 승자 커맨드를 반환 (롤아웃 불가/전부 실패 시 None)
+
+    budget_s는 이 단계 전체(컨텍스트 복제, 실행, 채점)의 벽시계 상한입니다.
+    시간 안에 끝나지 않은 롤아웃은 취소되고 평가에서 제외됩니다.
+    """
+    page = await get_current_page()
+    browser = page.context.browser if page else None
+    if not browser:
+        return None
+
+    runnable = []
+    for c in candidates:
+        action = parse_command_line(c) or {}
+        if action.get("type") in ROLLOUT_SKIP_TYPES | {None}:
+            continue
+        # 부작용이 있는 클릭은 복제 컨텍스트에서도 실제 서버 상태를 바꾸므로 롤아웃하지 않음
+        if action["type"] == "CLICK":
+            reason = await _click_side_effect(page, action)
+            if reason:
+                print(f"   롤아웃 제외 ({reason}): {c}")
+                continue
+        runnable.append(c)
+    if len(runnable) < 2:
+        return None
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + budget_s
+    storage_state = await page.context.storage_state()
+
+    tasks = [asyncio.create_task(_rollout_one(browser, page.context, storage_state, page.url, c)) for c in runnable]
+    done, pending = await asyncio.wait(tasks, timeout=max(0.0, deadline - loop.time()))
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    outcomes = [t.result() for t in done if not t.cancelled() and t.exception() is None]
+    outcomes = [o for o in outcomes if o[1].get("success")]
+    print(f"   롤아웃 {len(runnable)}개 중 {len(outcomes)}개 성공 (시간 초과 {len(pending)}개)")
+    if not outcomes:
+        return None
+    if len(outcomes) == 1:
+        return outcomes[0][0]
+
+    try:
+        scores = await asyncio.wait_for(_score_outcomes(state, outcomes), timeout=max(0.1, deadline - loop.time()))
+    except asyncio.TimeoutError:
+        print("   롤아웃 채점이 예산을 초과해 건너뜁니다.")
+        return None
+    if not scores:
+        return None
+
+    print(f"   롤아웃 점수: {scores}")
+    # 동점이면 원래 랭킹 순서를 유지
+    return max(runnable, key=lambda c: scores.get(c.strip(), -1.0))
@@ -0,0 +1,92 @@
+"""
+스크래치패드 누적 요약 (롤링 요약)
+접히지 않은 항목이 토큰 예산을 넘으면 오래된 항목을 기존 요약과 합쳐 백그라운드에서 요약하고,
+다음 thought_node 시작 시 끝난 요약만 반영해 임계 경로에서 요약 LLM 호출을 기다리지 않음
+"""
+
+import asyncio
+from typing import Dict, List
+
+from agentq.state import AgentState, SCRATCHPAD_TOKEN_BUDGET, get_unfolded_entries
+from agentq.llm_utils import get_llm_manager
+from agentq.prompt import get_system_prompt
+from agentq.tracing import span
+
+# 접을 때 예산 대비 이만큼의 최근 항목은 원문으로 남김 (매 루프마다 다시 접지 않도록 여유를 둠)
+SCRATCHPAD_KEEP_RATIO = 0.5
+
+# 세션별 진행 중인 요약 태스크 (LangGraph 상태에 Task를 넣지 않기 위해 모듈에 보관)
+_pending_folds: Dict[str, asyncio.Task] = {}
+
+
+async def _summarize(objective: str, previous: str, entries: List[str], folded_upto: int):
+    """(새 요약, 요약에 반영된 앞쪽 항목 수) 반환"""
+    user_message = ""
+    if previous:
+        user_message += f"Previous summary:\n{previous}\n\n"
+    user_message += "Entries to fold:\n" + "\n".join(f"- {entry}" for entry in entries)
+
+    with span("scratchpad.fold", entries=len(entries)):
+        response = await get_llm_manager().invoke_with_system(
+            system_prompt=get_system_prompt(
+                "summarize", objective=objective, max_words=max(50, SCRATCHPAD_TOKEN_BUDGET // 6)
+            ),
+            user_message=user_message
+        )
+    return response.strip(), folded_upto
+
+
+def start_scratchpad_fold(state: AgentState) -> None:
+    """예산을 넘었으면 오래된 항목 요약을 백그라운드로 시작 (세션당 하나만 진행)"""
+    key = state.get("session_id") or ""
+    if key in _pending_folds:
+        return
+
+    entries = get_unfolded_entries(state)
+    total = sum(tokens for _, _, tokens in entries)
+    if total <= SCRATCHPAD_TOKEN_BUDGET:
+        return
+
+    # 남길 토큰이 예산*비율 이하가 될 때까지 앞에서부터 접음 (최소 한 항목은 원문으로 남김)
+    keep_tokens = SCRATCHPAD_TOKEN_BUDGET * SCRATCHPAD_KEEP_RATIO
+    to_fold: List[str] = []
+    folded_upto = state.get("scratchpad_folded", 0)
+    for index, entry, tokens in entries[:-1]:
+        if total <= keep_tokens:
+            break
+        to_fold.append(entry)
+        total -= tokens
+        folded_upto = index + 1
+    if not to_fold:
+        return
+
+    _pending_folds[key] = asyncio.create_task(
+        _summarize(state["objective"], state.get("scratchpad_summary"), to_fold, folded_upto)
+    )
+
+
+def apply_scratchpad_fold(state: AgentState) -> bool:
+    """끝난 요약이 있으면 상태에 반영 (진행 중이면 기다리지 않고 False)"""
+    key = state.get("session_id") or ""
+    task = _pending_folds.get(key)
+    if task is None or not task.done():
+        return False
+    _pending_folds.pop(key)
+    if task.cancelled() or task.exception():
+        print(f"⚠️ 스크래치패드 요약 실패: {None if task.cancelled() else task.exception()}")
+        return False
+
+    summary, folded_upto = task.result()
+    if not summary:
+        return False
+    state["scratchpad_summary"] = summary
+    state["scratchpad_folded"] = folded_upto
+    print(f"   🗜️ 스크래치패드 앞쪽 {folded_upto}개 항목을 요약으로 접음")
+    return True
+
+
+def discard_scratchpad_fold(state: AgentState) -> None:
+    """종료된 세션의 진행 중인 요약 정리"""
+    task = _pending_folds.pop(state.get("session_id") or "", None)
+    if task and not task.done():
+        task.cancel()
@@ -0,0 +1,183 @@
+"""
+비동기 스크린샷 서비스
+뷰포트만 잘라 축소된 JPEG로 캡처하고, 디스크 쓰기는 제한된 백그라운드 큐에서 스레드로 처리해
+에이전트 루프의 임계 경로에서 인코딩/파일 I/O를 뺌
+"""
+
+import asyncio
+import base64
+import io
+import os
+import time
+import weakref
+from typing import Any, Dict, Optional, Set, Tuple
+
+from pydantic import BaseModel
+from playwright.async_api import CDPSession, Page
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow는 선택 의존성 (Chromium이 아닐 때 축소용)
+    Image = None
+
+SCREENSHOT_POLICIES = ("always", "on_failure", "off")
+
+
+class ScreenshotConfig(BaseModel):
+    """스크린샷 정책/인코딩 설정"""
+    # always: 매 액션 후, on_failure: 실패한 액션/태스크만, off: 명시적 SCREENSHOT 커맨드만
+    policy: str = os.getenv("AGENTQ_SCREENSHOT_POLICY", "off")
+    quality: int = int(os.getenv("AGENTQ_SCREENSHOT_QUALITY", "70"))
+    max_width: int = int(os.getenv("AGENTQ_SCREENSHOT_MAX_WIDTH", "1024"))
+    queue_size: int = 16
+
+
+class ScreenshotService:
+    """캡처는 브라우저에서 축소/JPEG 인코딩까지 끝내고, 파일 쓰기는 큐 워커가 담당
+
+    큐가 가득 차면 capture는 자리가 날 때까지 기다립니다(디스크가 느릴 때 메모리가 무한히 늘지 않도록).
+    """
+
+    def __init__(self, config: Optional[ScreenshotConfig] = None):
+        self.config = config or ScreenshotConfig()
+        if self.config.policy not in SCREENSHOT_POLICIES:
+            raise ValueError(f"지원하지 않는 스크린샷 정책: {self.config.policy}")
+        self.output_dir = "."
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._pending: Set[asyncio.Task] = set()
+        self._cdp_sessions: "weakref.WeakKeyDictionary[Page, CDPSession]" = weakref.WeakKeyDictionary()
+        self.stats = {"captured": 0, "skipped": 0, "bytes": 0, "capture_s": 0.0, "write_s": 0.0}
+
+    def should_capture(self, failed: bool = False) -> bool:
+        policy = self.config.policy
+        return policy == "always" or (policy == "on_failure" and failed)
+
+    def _resolve_path(self, path: str) -> str:
+        root, _ = os.path.splitext(path)
+        if not os.path.isabs(root) and os.path.dirname(root) == "":
+            root = os.path.join(self.output_dir, root)
+        return root + ".jpg"
+
+    async def _grab(self, page: Page) -> Tuple[bytes, bool]:
+        """(JPEG 바이트, 이미 축소됐는지) 반환"""
+        browser = page.context.browser
+        if browser and browser.browser_type.name == "chromium":
+            # 클립(문서 좌표 기준)을 현재 스크롤 위치의 뷰포트로 잡고, scale로 브라우저 쪽에서 축소해
+            # 파이썬에서 디코딩/리사이즈할 필요가 없음
+            width, height, x, y = await page.evaluate(
+                "() => [window.innerWidth, window.innerHeight, window.scrollX, window.scrollY]"
+            )
+            scale = min(1.0, self.config.max_width / width) if width else 1.0
+            session = self._cdp_sessions.get(page)
+            if session is None:
+                session = await page.context.new_cdp_session(page)
+                self._cdp_sessions[page] = session
+            result = await session.send("Page.captureScreenshot", {
+                "format": "jpeg",
+                "quality": self.config.quality,
+                "clip": {"x": x, "y": y, "width": width, "height": height, "scale": scale},
+            })
+            return base64.b64decode(result["data"]), True
+        data = await page.screenshot(type="jpeg", quality=self.config.quality, full_page=False, scale="css")
+        return data, False
+
+    def _downscale(self, data: bytes) -> bytes:
+        if Image is None:
+            return data
+        with Image.open(io.BytesIO(data)) as img:
+            if img.width <= self.config.max_width:
+                return data
+            height = round(img.height * self.config.max_width / img.width)
+            out = io.BytesIO()
+            img.resize((self.config.max_width, height)).save(out, format="JPEG", quality=self.config.quality)
+            return out.getvalue()
+
+    def _write(self, path: str, data: bytes, scaled: bool):
+        if not scaled:
+            data = self._downscale(data)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        self.stats["bytes"] += len(data)
+
+    async def _run_writer(self):
+        while True:
+            path, data, scaled = await self._queue.get()
+            started = time.perf_counter()
+            try:
+                await asyncio.to_thread(self._write, path, data, scaled)
+            except Exception as e:
+                print(f"❌ 스크린샷 저장 실패 ({path}): {e}")
+            finally:
+                self.stats["write_s"] += time.perf_counter() - started
+                self._queue.task_done()
+
+    def _ensure_writer(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue(maxsize=self.config.queue_size)
+            self._worker = asyncio.create_task(self._run_writer())
+
+    async def capture(self, page: Optional[Page], path: str, failed: bool = False, force: bool = False) -> Optional[str]:
+        """정책에 맞으면 캡처해 쓰기 큐에 넣고 최종 파일 경로(.jpg)를 반환. force는 정책 무시"""
+        if not page or not (force or self.should_capture(failed)):
+            self.stats["skipped"] += 1
+            return None
+
+        started = time.perf_counter()
+        data, scaled = await self._grab(page)
+        self.stats["capture_s"] += time.perf_counter() - started
+        self.stats["captured"] += 1
+
+        path = self._resolve_path(path)
+        self._ensure_writer()
+        await self._queue.put((path, data, scaled))
+        return path
+
+    def capture_in_background(self, page: Optional[Page], path: str, failed: bool = False):
+        """캡처 자체도 기다리지 않음 (액션 직후 LLM 호출과 겹쳐 실행)"""
+        if not page or not self.should_capture(failed):
+            self.stats["skipped"] += 1
+            return
+        task = asyncio.create_task(self.capture(page, path, failed))
+        self._pending.add(task)
+        task.add_done_callback(self._on_background_done)
+
+    def _on_background_done(self, task: asyncio.Task):
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception():
+            print(f"⚠️ 백그라운드 스크린샷 실패: {task.exception()}")
+
+    async def flush(self):
+        """진행 중인 캡처와 쓰기 큐가 모두 끝날 때까지 대기"""
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        await self.flush()
+        if self._worker:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+
+    def summary(self) -> Dict[str, Any]:
+        captured = self.stats["captured"]
+        return {
+            **self.stats,
+            "avg_capture_s": self.stats["capture_s"] / captured if captured else 0.0,
+            "avg_kb": self.stats["bytes"] / 1024 / captured if captured else 0.0,
+        }
+
+
+# 전역 스크린샷 서비스 인스턴스
+_screenshot_service: Optional[ScreenshotService] = None
+
+
+def get_screenshot_service() -> ScreenshotService:
+    """스크린샷 서비스 싱글톤 인스턴스 반환"""
+    global _screenshot_service
+    if _screenshot_service is None:
+        _screenshot_service = ScreenshotService()
+    return _screenshot_service
@@ -0,0 +1,374 @@
+"""
+AgentQ 서비스 모드 (의존성 없는 ASGI 앱)
+
+    POST /sessions                 {"objective": "...", "max_loops": 5} → 202 {"session_id", ...}
+                                   대기열이 가득 차면 429 + Retry-After
+    GET  /sessions/{id}            상태/결과 요약
+    GET  /sessions/{id}/events     이벤트 스트림 (text/event-stream, 처음부터 재생 후 이어서 전달)
+    POST /sessions/{id}/cancel     대기 중이면 제외, 실행 중이면 취소
+    GET  /health                   대기열/실행 중 세션/브라우저 풀 상태
+
+대기열은 크기가 정해진 asyncio.Queue이고, 브라우저 풀 크기만큼의 워커가 세션을 하나씩 꺼내
+풀에서 빌린 페이지(use_page)와 공유 LLMManager로 실행합니다. 실행은 uvicorn 등 ASGI 서버가
+필요합니다 (`python main.py --serve`).
+"""
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from agentq.browser_pool import BROWSER_POOL_SIZE, BrowserPool
+from agentq.events import AgentEvent, RunFinished
+from agentq.graph import AgentQExecutor
+from agentq.llm_utils import get_llm_manager, setup_default_llms
+from agentq.network_filter import NetworkPolicy
+from agentq.playwright_helper import use_page
+from agentq.resource_cache import ENABLE_RESOURCE_CACHE, counters_delta, get_resource_cache
+from agentq.startup import get_startup_profile
+
+SERVER_QUEUE_SIZE = int(os.getenv("AGENTQ_SERVER_QUEUE", "16"))
+# 끝난 세션은 이 개수까지만 보관 (오래된 것부터 제거)
+MAX_FINISHED_SESSIONS = 200
+MAX_REQUEST_BYTES = 64 * 1024
+SSE_KEEPALIVE_S = 15.0
+RETRY_AFTER_S = 5
+
+FINISHED_STATUSES = {"done", "incomplete", "cancelled", "error"}
+
+
+class Session:
+    """제출된 실행 하나 (이벤트는 모두 보관해 늦게 붙은 구독자도 처음부터 받음)"""
+
+    def __init__(self, objective: str, max_loops: int):
+        self.id = uuid.uuid4().hex[:12]
+        self.objective = objective
+        self.max_loops = max_loops
+        self.status = "queued"
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.events: List[AgentEvent] = []
+        self.result: Optional[RunFinished] = None
+        self.task: Optional[asyncio.Task] = None
+        # 이 세션 컨텍스트의 리소스 캐시 통계 (캐시를 켰을 때만)
+        self.resource_counters: Optional[Dict[str, Any]] = None
+        # publish마다 새 Event로 교체 → 이전 Event를 기다리던 구독자가 모두 깨어남
+        self.changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def publish(self, event: AgentEvent):
+        self.events.append(event)
+        if isinstance(event, RunFinished):
+            self.result = event
+            self.status = event.status
+            self.finished_at = time.time()
+        elif self.status == "queued":
+            self.status = "running"
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    def summary(self) -> Dict[str, Any]:
+        result = self.result
+        return {
+            "session_id": self.id,
+            "objective": self.objective,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "events": len(self.events),
+            "loop_count": result.loop_count if result else None,
+            "explanation": result.explanation if result else None,
+            "error": result.error if result else None,
+            "resource_cache": counters_delta(self.resource_counters, {}) if self.resource_counters else None,
+        }
+
+
+class AgentQServer:
+    """ASGI 앱: 요청 대기열 + 워커 + 브라우저 컨텍스트 풀"""
+
+    def __init__(
+        self,
+        pool_size: int = BROWSER_POOL_SIZE,
+        queue_size: int = SERVER_QUEUE_SIZE,
+        headless: bool = True,
+        block_requests: bool = True,
+        fused_reflection: Optional[bool] = None,
+        startup_profile: bool = False
+    ):
+        self.pool = BrowserPool(
+            size=pool_size, headless=headless,
+            network_policy=NetworkPolicy() if block_requests else None,
+            resource_cache=get_resource_cache() if ENABLE_RESOURCE_CACHE else None
+        )
+        self.queue_size = queue_size
+        self.queue: Optional["asyncio.Queue[Session]"] = None
+        self.executor = AgentQExecutor(fused_reflection=fused_reflection)
+        self.sessions: Dict[str, Session] = {}
+        self._workers: List[asyncio.Task] = []
+        self.startup_profile = startup_profile
+
+    # --- 수명 주기 ---
+
+    async def startup(self):
+        profile = get_startup_profile()
+        if not get_llm_manager().list_models():
+            with profile.phase("LLM 등록"):
+                setup_default_llms()
+        self.executor.compile()
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        await self.pool.start()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.pool.size)]
+        print(f"🛰️ AgentQ 서비스 준비 완료 (워커 {self.pool.size}개, 대기열 {self.queue_size})")
+        if self.startup_profile:
+            print("\n" + profile.report())
+
+    async def shutdown(self):
+        for session in self.sessions.values():
+            if session.task and not session.task.done():
+                session.task.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        await self.pool.close()
+        print("🛑 AgentQ 서비스 종료")
+
+    async def _worker(self):
+        while True:
+            session = await self.queue.get()
+            try:
+                if session.finished:  # 대기 중에 취소됨
+                    continue
+                async with self.pool.acquire() as page:
+                    # 재생성 중인 컨텍스트를 기다리는 동안 취소됐을 수 있으므로 다시 확인
+                    if session.finished:
+                        continue
+                    session.resource_counters = self.pool.resource_counters(page)
+                    # 세션별 태스크로 실행해 취소가 워커까지 번지지 않게 함
+                    session.task = asyncio.create_task(self._run_session(session, page))
+                    await asyncio.gather(session.task, return_exceptions=True)
+                    if not session.finished:
+                        # 태스크가 시작되기 전에 취소되면 _run_session이 종료 이벤트를 내지 못함
+                        session.publish(RunFinished(session_id=session.id, status="cancelled"))
+            finally:
+                self.queue.task_done()
+                # 실행/오류/취소(대기 중 취소 포함) 모두 여기서 보관 개수 제한
+                self._prune_sessions()
+
+    async def _run_session(self, session: Session, page):
+        session.status = "running"
+        with use_page(page):
+            try:
+                async for event in self.executor.iter_events(session.objective, session.max_loops, session.id):
+                    session.publish(event)
+            except asyncio.CancelledError:
+                session.publish(RunFinished(session_id=session.id, status="cancelled"))
+                raise
+            except Exception as e:
+                session.publish(RunFinished(session_id=session.id, status="error", error=str(e)))
+
+    def _prune_sessions(self):
+        finished = sorted((s for s in self.sessions.values() if s.finished), key=lambda s: s.finished_at)
+        for session in finished[:max(0, len(finished) - MAX_FINISHED_SESSIONS)]:
+            self.sessions.pop(session.id, None)
+
+    # --- 세션 조작 ---
+
+    def submit(self, objective: str, max_loops: int) -> Session:
+        """대기열에 세션 추가 (가득 차면 asyncio.QueueFull)"""
+        session = Session(objective, max_loops)
+        self.queue.put_nowait(session)
+        self.sessions[session.id] = session
+        return session
+
+    def cancel(self, session: Session) -> bool:
+        """취소 요청 (이미 끝났으면 False)"""
+        if session.finished:
+            return False
+        if session.task and not session.task.done():
+            session.task.cancel()
+        else:
+            session.publish(RunFinished(session_id=session.id, status="cancelled"))
+        return True
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queue.qsize() if self.queue else 0,
+            "queue_size": self.queue_size,
+            "running": len([s for s in self.sessions.values() if s.status == "running"]),
+            "sessions": len(self.sessions),
+            "pool": self.pool.summary(),
+            "resource_cache": self.pool.resource_cache.summary() if self.pool.resource_cache else None,
+        }
+
+    # --- ASGI ---
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        method = scope["method"]
+        parts = [p for p in scope["path"].split("/") if p]
+        try:
+            if parts == ["health"] and method == "GET":
+                await _send_json(send, 200, self.health())
+            elif parts == ["sessions"] and method == "POST":
+                await self._handle_submit(receive, send)
+            elif len(parts) >= 2 and parts[0] == "sessions":
+                session = self.sessions.get(parts[1])
+                if session is None:
+                    await _send_json(send, 404, {"error": "unknown session"})
+                elif len(parts) == 2 and method == "GET":
+                    await _send_json(send, 200, session.summary())
+                elif parts[2:] == ["events"] and method == "GET":
+                    await self._stream_events(session, receive, send)
+                elif parts[2:] == ["cancel"] and method == "POST":
+                    if self.cancel(session):
+                        await _send_json(send, 202, {"session_id": session.id, "status": "cancelling"})
+                    else:
+                        await _send_json(send, 409, {"error": "session already finished", "status": session.status})
+                else:
+                    await _send_json(send, 405, {"error": "method not allowed"})
+            else:
+                await _send_json(send, 404, {"error": "not found"})
+        except Exception as e:
+            print(f"❌ 요청 처리 오류 ({method} {scope['path']}): {e}")
+            await _send_json(send, 500, {"error": str(e)})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _handle_submit(self, receive, send):
+        body, too_large = await _read_body(receive)
+        if too_large:
+            await _send_json(send, 413, {"error": "request body too large"})
+            return
+        try:
+            payload = json.loads(body or b"{}")
+            objective = str(payload["objective"]).strip()
+            max_loops = int(payload.get("max_loops", 5))
+            if not objective or max_loops < 1:
+                raise ValueError("objective must be non-empty and max_loops >= 1")
+        except (ValueError, KeyError, TypeError) as e:
+            await _send_json(send, 400, {"error": f"invalid request: {e}"})
+            return
+
+        try:
+            session = self.submit(objective, max_loops)
+        except asyncio.QueueFull:
+            await _send_json(
+                send, 429, {"error": "queue full", "queued": self.queue.qsize()},
+                headers=[(b"retry-after", str(RETRY_AFTER_S).encode())]
+            )
+            return
+        await _send_json(send, 202, {
+            "session_id": session.id,
+            "status": session.status,
+            "queued": self.queue.qsize(),
+            "events_url": f"/sessions/{session.id}/events",
+        })
+
+    async def _stream_events(self, session: Session, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        })
+        disconnected = asyncio.create_task(_wait_disconnect(receive))
+        index = 0
+        try:
+            while True:
+                while index < len(session.events):
+                    await send({"type": "http.response.body", "body": session.events[index].to_sse(), "more_body": True})
+                    index += 1
+                if session.finished:
+                    break
+                changed = asyncio.create_task(session.changed.wait())
+                done, _ = await asyncio.wait(
+                    {changed, disconnected}, timeout=SSE_KEEPALIVE_S, return_when=asyncio.FIRST_COMPLETED
+                )
+                changed.cancel()
+                if disconnected in done:
+                    return
+                if not done:
+                    await send({"type": "http.response.body", "body": b": keep-alive\n\n", "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            disconnected.cancel()
+
+
+async def _read_body(receive) -> Tuple[bytes, bool]:
+    """(본문, 크기 초과 여부)"""
+    body = b""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return body, False
+        body += message.get("body", b"")
+        if len(body) > MAX_REQUEST_BYTES:
+            return b"", True
+        if not message.get("more_body"):
+            return body, False
+
+
+async def _wait_disconnect(receive):
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def _send_json(send, status: int, payload: Dict[str, Any], headers: Optional[List[Tuple[bytes, bytes]]] = None):
+    body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())] + (headers or []),
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    pool_size: int = BROWSER_POOL_SIZE,
+    queue_size: int = SERVER_QUEUE_SIZE,
+    headless: bool = True,
+    block_requests: bool = True,
+    startup_profile: bool = False
+) -> int:
+    """uvicorn으로 서비스 실행 (uvicorn이 없으면 안내 후 1 반환)"""
+    try:
+        import uvicorn
+    except ImportError:
+        print("❌ 서비스 모드에는 uvicorn이 필요합니다: pip install uvicorn")
+        return 1
+    app = AgentQServer(
+        pool_size=pool_size, queue_size=queue_size, headless=headless,
+        block_requests=block_requests, startup_profile=startup_profile
+    )
+    uvicorn.run(app, host=host, port=port, lifespan="on")
+    return 0
@@ -11,6 +11,7 @@ from agentq.playwright_helper import (
     get_page_title, get_page_url
 )
 from agentq.models import Action, ActionType
+from agentq.waits import wait_for_page_settle
 
 
 async def execute_action(action: Action) -> Dict[str, Any]:
@@ -46,11 +47,11 @@ async def execute_action(action: Action) -> Dict[str, Any]:
             result["message"] = f"텍스트 입력: {action.content}" if success else "텍스트 입력 실패"
             
         elif action.type == ActionType.SCREENSHOT:
-            path = action.target or "screenshot.png"
-            success = await take_screenshot(path)
-            result["success"] = success
-            result["message"] = f"스크린샷 저장: {path}" if success else "스크린샷 실패"
-            result["data"] = path if success else None
+            # 요청 경로가 아니라 실제로 저장되는 경로(.jpg)를 돌려줌
+            path = await take_screenshot(action.target or "screenshot.png")
+            result["success"] = path is not None
+            result["message"] = f"스크린샷 저장: {path}" if path else "스크린샷 실패"
+            result["data"] = path
             
         elif action.type == ActionType.GET_DOM:
             content = await get_page_content()
@@ -63,7 +64,9 @@ async def execute_action(action: Action) -> Dict[str, Any]:
             search_url = f"https://www.google.com/search?q={action.content}"
             success = await navigate_to(search_url)
             if success:
-                await asyncio.sleep(2)  # 페이지 로딩 대기
+                page = await get_current_page()
+                if page:
+                    await wait_for_page_settle(page)
                 content = await get_page_content()
                 result["success"] = True
                 result["message"] = f"검색 완료: {action.content}"
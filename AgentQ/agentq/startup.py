@@ -0,0 +1,48 @@
+"""
+시작 단계 시간 측정 (--startup-profile)
+import, LLM 클라이언트 생성, Playwright 시작, 브라우저 실행/연결, 컨텍스트 준비 등을 구간별로 기록
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+# 시간을 따로 보여 줄 무거운 의존성 (import 여부로 지연 import가 지켜졌는지 확인)
+PROVIDER_MODULES = ("langchain_openai", "langchain_ollama")
+
+
+class StartupProfile:
+    """프로세스 시작부터의 구간별 소요 시간"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: List[Tuple[str, float, float]] = []  # (이름, 시작 오프셋, 소요 시간)
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, started - self.started, time.perf_counter() - started))
+
+    def report(self, title: str = "시작 시간 분석") -> str:
+        lines = [f"⏱️ {title}", f"  {'구간':<36} {'시작(초)':>9} {'소요(초)':>9}"]
+        for name, offset, duration in sorted(self.phases, key=lambda p: p[1]):
+            lines.append(f"  {name:<36} {offset:>9.3f} {duration:>9.3f}")
+        lines.append(f"  {'전체 경과':<36} {'':>9} {time.perf_counter() - self.started:>9.3f}")
+        loaded = [m for m in PROVIDER_MODULES if m in sys.modules]
+        lines.append(f"  로드된 LLM 제공자 모듈: {', '.join(loaded) if loaded else '없음'}")
+        return "\n".join(lines)
+
+
+_profile: Optional[StartupProfile] = None
+
+
+def get_startup_profile() -> StartupProfile:
+    """프로세스 전역 프로파일 (처음 호출된 시점이 기준)"""
+    global _profile
+    if _profile is None:
+        _profile = StartupProfile()
+    return _profile
@@ -2,12 +2,20 @@
 LangGraph AgentState 정의
 """
 
+import os
 from typing import List, Optional, Dict, Any, Annotated
 from typing_extensions import TypedDict
 from langgraph.graph.message import add_messages
 from pydantic import BaseModel
 from enum import Enum
 
+# 프롬프트에 넣는 스크래치패드 토큰 예산 (넘으면 오래된 항목을 요약으로 접음)
+SCRATCHPAD_TOKEN_BUDGET = int(os.getenv("AGENTQ_SCRATCHPAD_TOKENS", "1200"))
+# 요약이 반영되기 전까지 프리픽스를 유지하며 허용하는 초과 배수 (요약이 계속 실패할 때의 상한)
+SCRATCHPAD_OVERFLOW_RATIO = 2
+# 프롬프트 템플릿의 Plan 필드로 항상 들어가므로 스크래치패드 본문/요약 대상에서 빼는 항목
+PINNED_SCRATCHPAD_PREFIXES = ("[PLAN]",)
+
 
 class ActionType(Enum):
     """액션 타입 정의"""
@@ -62,22 +70,32 @@ class AgentState(TypedDict):
     current_url: Optional[str]  # 현재 페이지 URL
     page_title: Optional[str]   # 현재 페이지 제목
     page_content: Optional[str] # 현재 페이지 내용 (요약)
+    page_outline: Optional[str] # 접근성 트리 기반 압축 관찰 (관찰 토큰 예산 이내)
 
     # 탐색/선택 보조 정보
     candidate_commands: Optional[List[str]]
     critic_scores: Optional[List[float]]
     q_stats: Optional[Dict[str, Any]]
     last_command: Optional[str]
+    last_command_url: Optional[str]  # last_command를 고른 시점의 URL (Q-값 저장 키)
+    element_identities: Optional[Dict[str, str]]  # 현재 페이지의 data-agentq-id → 역할+이름 (Q-값 커맨드 템플릿용)
+    last_command_identities: Optional[Dict[str, str]]  # last_command를 고른 시점의 element_identities
     status: Optional[str]
     min_loops: int
     no_progress_streak: int
     last_progress_fingerprint: Optional[str]
 
+    # 루프별 지연 측정 (노드가 제자리 append, 테스트 러너 요약용)
+    loop_metrics: List[Dict[str, Any]]
+
     # 메시지 히스토리 (LangGraph 메시지 관리)
     messages: Annotated[List[Dict[str, Any]], add_messages]
 
     # 스크래치패드 (중간 결과 저장)
     scratchpad: List[str]
+    scratchpad_tokens: List[int]  # 항목별 추정 토큰 수 (scratchpad와 같은 길이, 제자리 append)
+    scratchpad_summary: Optional[str]  # 접힌 앞쪽 항목들의 누적 요약
+    scratchpad_folded: int  # 요약에 반영된 앞쪽 항목 수
 
     # 에러 정보
     last_error: Optional[str]
@@ -111,16 +129,24 @@ class AgentState(TypedDict):
             current_url=None,
             page_title=None,
             page_content=None,
+            page_outline=None,
             candidate_commands=[],
             critic_scores=[],
             q_stats={},
             last_command=None,
+            last_command_url=None,
+            element_identities={},
+            last_command_identities={},
             status=None,
             min_loops=3,
             no_progress_streak=0,
             last_progress_fingerprint=None,
+            loop_metrics=[],
             messages=[],
             scratchpad=[],
+            scratchpad_tokens=[],
+            scratchpad_summary=None,
+            scratchpad_folded=0,
             last_error=None,
             error_count=0,
             session_id=session_id,
@@ -128,16 +154,70 @@ class AgentState(TypedDict):
         )
 
 
+def estimate_tokens(text: str) -> int:
+    """토크나이저 없이 쓰는 토큰 수 추정 (UTF-8 4바이트 ≈ 1토큰, 한글은 다소 과대 추정)"""
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+def is_pinned_entry(entry: str) -> bool:
+    return entry.startswith(PINNED_SCRATCHPAD_PREFIXES)
+
+
+def get_scratchpad_tokens(state: AgentState) -> List[int]:
+    """항목별 토큰 수 (scratchpad에 직접 append된 항목이 있으면 채워 넣음)"""
+    tokens = state.setdefault("scratchpad_tokens", [])
+    for entry in state["scratchpad"][len(tokens):]:
+        tokens.append(estimate_tokens(entry))
+    return tokens
+
+
 def add_to_scratchpad(state: AgentState, content: str) -> AgentState:
     """스크래치패드에 내용 추가"""
+    get_scratchpad_tokens(state)
     state["scratchpad"].append(content)
+    state["scratchpad_tokens"].append(estimate_tokens(content))
     return state
 
 
-def get_scratchpad_content(state: AgentState, max_entries: int = 10) -> str:
-    """스크래치패드 내용을 문자열로 반환"""
-    recent_entries = state["scratchpad"][-max_entries:]
-    return "\n".join(f"- {entry}" for entry in recent_entries)
+def get_unfolded_entries(state: AgentState) -> List[tuple]:
+    """아직 요약에 접히지 않은 (인덱스, 항목, 토큰 수) 목록 (고정 항목 제외)"""
+    tokens = get_scratchpad_tokens(state)
+    folded = state.get("scratchpad_folded", 0)
+    return [
+        (i, entry, tokens[i])
+        for i, entry in enumerate(state["scratchpad"])
+        if i >= folded and not is_pinned_entry(entry)
+    ]
+
+
+def get_scratchpad_content(
+    state: AgentState,
+    max_entries: Optional[int] = None,
+    token_budget: Optional[int] = None
+) -> str:
+    """스크래치패드 내용을 문자열로 반환
+
+    누적 요약을 맨 앞에 두고 그 뒤로 접히지 않은 항목을 시간순으로 이어 붙여, 요약이 바뀌기 전까지는
+    루프마다 앞부분이 그대로 유지되고 뒤에만 항목이 늘어납니다(서버 측 프롬프트 프리픽스 캐시 적중).
+    예산을 넘어도 요약이 반영될 때까지는 앞 항목을 버리지 않아 프리픽스가 유지되고,
+    요약이 계속 실패해 예산*SCRATCHPAD_OVERFLOW_RATIO를 넘을 때만 오래된 항목부터 뺍니다.
+    """
+    limit = (token_budget or SCRATCHPAD_TOKEN_BUDGET) * SCRATCHPAD_OVERFLOW_RATIO
+    summary = state.get("scratchpad_summary")
+    recent = get_unfolded_entries(state)
+    if max_entries:
+        recent = recent[-max_entries:]
+
+    used = (estimate_tokens(summary) if summary else 0) + sum(tokens for _, _, tokens in recent)
+    start = 0
+    while start < len(recent) - 1 and used > limit:
+        used -= recent[start][2]
+        start += 1
+    kept = [entry for _, entry, _ in recent[start:]]
+
+    lines = [f"- [SUMMARY] {summary}"] if summary else []
+    lines += [f"- {entry}" for entry in kept]
+    return "\n".join(lines)
 
 
 def increment_loop_count(state: AgentState) -> AgentState:
@@ -5,13 +5,17 @@
 import asyncio
 from typing import Dict, Any, Optional, List
 from agentq.playwright_helper import (
-    get_current_page, navigate_to, take_screenshot,
+    get_current_page, navigate_to,
     click_element, type_text, get_page_content,
     get_page_title, get_page_url,
     index_interactive_elements, get_dom_snapshot,
     click_by_agentq_id, set_input_by_agentq_id, submit_by_agentq_id, clear_by_agentq_id,
-    find_and_use_search_bar
+    find_and_use_search_bar, set_current_page, is_page_pinned
 )
+from agentq.waits import wait_for_page_settle
+from agentq.screenshots import get_screenshot_service
+
+GOOGLE_RESULT_SELECTOR = 'div[data-ved] h3, .g h3, .rc h3'
 
 
 class WebTool:
@@ -65,9 +69,10 @@ class WebTool:
             success = await navigate_to(search_url)
             
             if success:
-                await asyncio.sleep(2)  # 페이지 로딩 대기
                 page = await get_current_page()
                 if page:
+                    # 검색 결과 제목이 뜰 때까지 대기 (결과가 없으면 도메인별 타임아웃까지)
+                    await wait_for_page_settle(page, selector=GOOGLE_RESULT_SELECTOR)
                     search_results = await page.evaluate("""
                         () => {
                             const results = [];
@@ -138,13 +143,13 @@ class WebTool:
     
     @staticmethod
     async def capture_screenshot(path: str = "screenshot.png") -> Dict[str, Any]:
-        """스크린샷 촬영"""
+        """스크린샷 촬영 (축소 JPEG, 파일은 백그라운드에서 저장되며 실제 경로를 반환)"""
         try:
-            success = await take_screenshot(path)
+            saved_path = await get_screenshot_service().capture(await get_current_page(), path, force=True)
             return {
-                "success": success,
-                "message": f"스크린샷 {'저장' if success else '실패'}: {path}",
-                "data": path if success else None
+                "success": bool(saved_path),
+                "message": f"스크린샷 {'저장' if saved_path else '실패'}: {saved_path or path}",
+                "data": saved_path
             }
         except Exception as e:
             return {
@@ -319,11 +324,34 @@ def set_playwright_helper(helper):
     """PlaywrightHelper 인스턴스 설정 (테스트 시스템 통합용)"""
     global _playwright_helper
     _playwright_helper = helper
+    # 도구들이 get_current_page()로 테스트 러너의 페이지를 사용하도록 연결
+    set_current_page(helper.page if helper else None)
 
 def get_playwright_helper():
     """현재 설정된 PlaywrightHelper 반환"""
     return _playwright_helper
 
+async def swap_current_page(page) -> bool:
+    """현재 페이지를 (같은 컨텍스트에서 미리 로드한) page로 교체하고 이전 페이지를 닫음
+
+    미리 로드한 페이지는 new_page()로 만든 별도 탭이라 이전 페이지의 뒤로 가기 기록을 잇지 않으며,
+    이전 탭을 남겨 두면 실행 내내 스크립트가 도는 백그라운드 탭이 되므로 바로 닫습니다.
+    use_page로 페이지가 고정된 태스크(서비스 세션, 롤아웃)에서는 교체하지 않고 False 반환
+    """
+    if is_page_pinned():
+        return False
+    previous = await get_current_page()
+    set_current_page(page)
+    if _playwright_helper:
+        _playwright_helper.page = page
+    try:
+        await page.bring_to_front()
+        if previous and previous is not page:
+            await previous.close()
+    except Exception as e:
+        print(f"⚠️ 이전 페이지 정리 실패: {e}")
+    return True
+
 def get_tool_executor() -> ToolExecutor:
     """도구 실행기 싱글톤 인스턴스 반환"""
     global _tool_executor
@@ -0,0 +1,179 @@
+"""
+노드/LLM/CDP 단위 스팬 트레이싱
+태스크(실행) 하나가 Tracer 하나이고, 현재 스팬은 contextvar로 추적해 asyncio 태스크로 갈라진
+작업(선행 스냅샷, 병렬 critic 등)도 부모 스팬 아래에 기록됨
+"""
+
+import functools
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class Span:
+    """시간 구간 하나 (이름, 부모, 소요 시간, 토큰 수, 임의 속성)"""
+
+    def __init__(self, name: str, parent_id: Optional[str], attrs: Dict[str, Any]):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attrs = attrs
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.duration_s: Optional[float] = None
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.error: Optional[str] = None
+
+    def end(self):
+        self.duration_s = time.perf_counter() - self._started
+
+    def to_dict(self, trace_id: str) -> Dict[str, Any]:
+        return {
+            "trace_id": trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_s": self.duration_s,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "error": self.error,
+            "attrs": self.attrs,
+        }
+
+
+class Tracer:
+    """한 번의 실행에서 끝난 스팬을 모아 JSONL로 기록"""
+
+    def __init__(self, trace_id: Optional[str] = None, path: Optional[str] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex[:16]
+        self.path = path
+        self.spans: List[Span] = []
+        # 스팬 시작/종료 시 호출되는 콜백 (phase: "start" | "end"), 이벤트 스트림 등에서 사용
+        self.listeners: List[Callable[[str, Span], None]] = []
+
+    def notify(self, phase: str, current: Span):
+        for listener in self.listeners:
+            try:
+                listener(phase, current)
+            except Exception as e:
+                print(f"⚠️ 스팬 리스너 오류: {e}")
+
+    def records(self) -> List[Dict[str, Any]]:
+        return [s.to_dict(self.trace_id) for s in self.spans]
+
+    def write(self, path: Optional[str] = None):
+        path = path or self.path
+        if not path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for record in self.records():
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+
+_current_tracer: ContextVar[Optional[Tracer]] = ContextVar("agentq_tracer", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("agentq_span", default=None)
+
+
+def start_trace(trace_id: Optional[str] = None, path: Optional[str] = None) -> Tracer:
+    """현재 컨텍스트(와 이후 생성되는 태스크)에 새 트레이서 설정"""
+    tracer = Tracer(trace_id, path)
+    _current_tracer.set(tracer)
+    _current_span.set(None)
+    return tracer
+
+
+def end_trace() -> Optional[Tracer]:
+    """트레이서를 해제하고 JSONL로 기록 (path가 있을 때)"""
+    tracer = _current_tracer.get()
+    if tracer:
+        tracer.write()
+        _current_tracer.set(None)
+    return tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _current_tracer.get()
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """스팬 구간. 활성 트레이서가 없으면 아무 것도 하지 않음"""
+    tracer = _current_tracer.get()
+    if tracer is None:
+        yield None
+        return
+    parent = _current_span.get()
+    current = Span(name, parent.span_id if parent else None, attrs)
+    token = _current_span.set(current)
+    tracer.notify("start", current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end()
+        _current_span.reset(token)
+        tracer.spans.append(current)
+        tracer.notify("end", current)
+
+
+def traced(name: str):
+    """async 함수 전체를 스팬으로 감싸는 데코레이터"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def set_span_attrs(**attrs):
+    current = _current_span.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+def record_tokens(input_tokens: Optional[int], output_tokens: Optional[int]):
+    """현재 스팬에 토큰 사용량 누적"""
+    current = _current_span.get()
+    if current is not None:
+        current.input_tokens += input_tokens or 0
+        current.output_tokens += output_tokens or 0
+
+
+def record_usage(message: Any):
+    """LangChain AIMessage.usage_metadata에서 토큰 수를 읽어 기록"""
+    usage = getattr(message, "usage_metadata", None) or {}
+    record_tokens(usage.get("input_tokens"), usage.get("output_tokens"))
+
+
+def summarize_spans(records: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """스팬 이름별 횟수/총 시간/토큰 집계"""
+    summary: Dict[str, Dict[str, float]] = {}
+    for r in records:
+        s = summary.setdefault(r["name"], {"count": 0, "total_s": 0.0, "input_tokens": 0, "output_tokens": 0, "errors": 0})
+        s["count"] += 1
+        s["total_s"] += r.get("duration_s") or 0.0
+        s["input_tokens"] += r.get("input_tokens") or 0
+        s["output_tokens"] += r.get("output_tokens") or 0
+        s["errors"] += 1 if r.get("error") else 0
+    return summary
+
+
+def merge_span_summaries(summaries: Iterable[Dict[str, Dict[str, float]]]) -> Dict[str, Dict[str, float]]:
+    merged: Dict[str, Dict[str, float]] = {}
+    for summary in summaries:
+        for name, s in summary.items():
+            m = merged.setdefault(name, {k: 0 for k in s})
+            for k, v in s.items():
+                m[k] = m.get(k, 0) + v
+    return merged
@@ -0,0 +1,265 @@
+"""
+열 기반 궤적 저장소
+태스크 결과의 루프 지표에서 (태스크, 루프, 후보 커맨드, critic 점수, Q, 보상, 시간) 행을 뽑아
+Parquet 조각 파일로 추가 저장하고, 전체 상태를 읽지 않고 필요한 열만 읽어 성공률/커맨드별 Q를 계산
+(pyarrow가 없으면 같은 행을 JSONL 조각으로 저장하고 같은 질의 함수로 읽음)
+"""
+
+import json
+import os
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # 선택 의존성: pip install pyarrow
+    pa = None
+
+TRAJECTORY_DIR = os.getenv("AGENTQ_TRAJECTORY_DIR", ".agentq/trajectories")
+
+# 반복이 많은 문자열 열은 사전 인코딩 (커맨드/URL/액션 타입은 태스크 사이에서도 크게 겹침)
+STRING_COLUMNS = ["run_id", "task_id", "node", "command", "action_type", "url"]
+FLOAT_COLUMNS = [
+    "critic_score", "q", "ucb", "reward", "score",
+    "loop_s", "thought_llm_s", "critic_s", "post_action_llm_s", "dom_wait_s",
+]
+INT_COLUMNS = ["loop", "visits"]
+BOOL_COLUMNS = ["chosen", "progress", "loop_done", "task_done"]
+# 루프 지표에서 그대로 옮기는 시간 열
+TIMING_COLUMNS = ["loop_s", "thought_llm_s", "critic_s", "post_action_llm_s", "dom_wait_s"]
+
+if pa is not None:
+    SCHEMA = pa.schema(
+        [(name, pa.dictionary(pa.int32(), pa.string())) for name in STRING_COLUMNS]
+        + [(name, pa.int32()) for name in INT_COLUMNS]
+        + [(name, pa.float32()) for name in FLOAT_COLUMNS]
+        + [(name, pa.bool_()) for name in BOOL_COLUMNS]
+        + [("ts", pa.float64())]
+    )
+
+
+def rows_from_task_result(task_result: Dict[str, Any], run_id: str) -> List[Dict[str, Any]]:
+    """태스크 결과 하나 → 루프별 후보 커맨드 행 (선택된 커맨드 행에만 보상/완료/시간을 채움)"""
+    rows = []
+    ts = time.time()
+    for metrics in task_result.get("loop_metrics", []):
+        chosen_command = metrics.get("command")
+        candidates = metrics.get("candidates") or ([{"command": chosen_command}] if chosen_command else [])
+        for candidate in candidates:
+            chosen = candidate.get("command") == chosen_command
+            row = {
+                "run_id": run_id,
+                "task_id": str(task_result.get("task_id")),
+                "loop": metrics.get("loop"),
+                "node": metrics.get("chosen_by", "thought") if chosen else "thought",
+                "command": candidate.get("command"),
+                "action_type": metrics.get("action_type") if chosen else None,
+                "url": metrics.get("url"),
+                "chosen": chosen,
+                "critic_score": candidate.get("critic_score"),
+                "q": candidate.get("q"),
+                "visits": candidate.get("visits"),
+                "ucb": candidate.get("ucb"),
+                "reward": metrics.get("reward") if chosen else None,
+                "progress": metrics.get("progress") if chosen else None,
+                "loop_done": metrics.get("done") if chosen else None,
+                "task_done": task_result.get("done"),
+                "score": task_result.get("score"),
+                "ts": ts,
+            }
+            for key in TIMING_COLUMNS:
+                row[key] = metrics.get(key) if chosen else None
+            rows.append(row)
+    if not rows:
+        # 루프 없이 끝난 태스크(시작 전 오류 등)도 성공률 분모에 들어가도록 태스크 행 하나를 남김
+        rows.append({
+            "run_id": run_id, "task_id": str(task_result.get("task_id")), "loop": 0, "chosen": True,
+            "task_done": task_result.get("done"), "score": task_result.get("score"), "ts": ts,
+        })
+    return rows
+
+
+class TrajectoryStore:
+    """root/<run_id>/part-*.parquet 조각을 추가만 하는 저장소 (조각 하나 = 태스크 하나)
+
+    조각 파일은 쓰고 나면 바꾸지 않으므로 여러 샤드 워커가 같은 run_id로 동시에 써도 되고,
+    조각이 많아지면 compact()로 실행별 파일 하나로 합칠 수 있습니다.
+    """
+
+    def __init__(self, run_id: str, root: str = TRAJECTORY_DIR):
+        self.run_id = run_id
+        self.root = root
+        self.run_dir = os.path.join(root, run_id)
+        os.makedirs(self.run_dir, exist_ok=True)
+        self.rows_written = 0
+
+    def append_task(self, task_result: Dict[str, Any]) -> int:
+        """태스크 결과의 행을 조각 하나로 저장하고 행 수 반환"""
+        rows = rows_from_task_result(task_result, self.run_id)
+        if rows:
+            self._write(rows, f"part-{task_result.get('task_id')}-{uuid.uuid4().hex[:8]}")
+            self.rows_written += len(rows)
+        return len(rows)
+
+    def _write(self, rows: List[Dict[str, Any]], name: str):
+        path = os.path.join(self.run_dir, name)
+        if pa is not None:
+            tmp_path = f"{path}.parquet.{os.getpid()}.tmp"
+            pq.write_table(pa.Table.from_pylist(rows, schema=SCHEMA), tmp_path, compression="zstd")
+            os.replace(tmp_path, f"{path}.parquet")
+        else:
+            tmp_path = f"{path}.jsonl.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, f"{path}.jsonl")
+
+    def compact(self) -> Optional[str]:
+        """이 실행의 Parquet 조각을 파일 하나로 합침 (pyarrow 필요)"""
+        if pa is None:
+            return None
+        parts = [os.path.join(self.run_dir, n) for n in os.listdir(self.run_dir) if n.startswith("part-") and n.endswith(".parquet")]
+        if len(parts) < 2:
+            return None
+        table = ds.dataset(parts, format="parquet", schema=SCHEMA).to_table()
+        path = os.path.join(self.run_dir, f"compacted-{uuid.uuid4().hex[:8]}.parquet")
+        pq.write_table(table.combine_chunks().unify_dictionaries(), path, compression="zstd")
+        for part in parts:
+            os.remove(part)
+        return path
+
+
+def _files(root: str, suffix: str, run_ids: Optional[Iterable[str]]) -> List[str]:
+    wanted = set(run_ids) if run_ids else None
+    paths = []
+    for run_id in sorted(os.listdir(root)) if os.path.isdir(root) else []:
+        run_dir = os.path.join(root, run_id)
+        if (wanted is None or run_id in wanted) and os.path.isdir(run_dir):
+            paths += [os.path.join(run_dir, n) for n in sorted(os.listdir(run_dir)) if n.endswith(suffix)]
+    return paths
+
+
+def read_columns(
+    columns: List[str],
+    root: str = TRAJECTORY_DIR,
+    run_ids: Optional[Iterable[str]] = None,
+    chosen_only: bool = False
+) -> Dict[str, List[Any]]:
+    """필요한 열만 읽어 {열 이름: 값 목록} 반환 (Parquet 조각은 열 단위로만 읽고, JSONL 조각은 같은 열만 남김)"""
+    data: Dict[str, List[Any]] = {name: [] for name in columns}
+    parquet_files = _files(root, ".parquet", run_ids)
+    if parquet_files and pa is not None:
+        dataset = ds.dataset(parquet_files, format="parquet", schema=SCHEMA)
+        table = dataset.to_table(columns=columns, filter=ds.field("chosen") if chosen_only else None)
+        for name in columns:
+            data[name] += table.column(name).to_pylist()
+    for path in _files(root, ".jsonl", run_ids):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                if chosen_only and not row.get("chosen"):
+                    continue
+                for name in columns:
+                    data[name].append(row.get(name))
+    return data
+
+
+def success_rates(root: str = TRAJECTORY_DIR, run_ids: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """실행(run_id)별 태스크 수, 성공 수(score == 1), 성공률, 평균 루프 수"""
+    data = read_columns(["run_id", "task_id", "loop", "score"], root, run_ids, chosen_only=True)
+    tasks: Dict[tuple, Dict[str, Any]] = {}
+    for run_id, task_id, loop, score in zip(data["run_id"], data["task_id"], data["loop"], data["score"]):
+        task = tasks.setdefault((run_id, task_id), {"score": score, "loops": 0})
+        task["loops"] = max(task["loops"], loop or 0)
+
+    runs: Dict[str, Dict[str, Any]] = {}
+    for (run_id, _), task in tasks.items():
+        run = runs.setdefault(run_id, {"tasks": 0, "passed": 0, "loops": 0})
+        run["tasks"] += 1
+        run["passed"] += int(task["score"] == 1)
+        run["loops"] += task["loops"]
+    for run in runs.values():
+        run["success_rate"] = run["passed"] / run["tasks"]
+        run["avg_loops"] = run.pop("loops") / run["tasks"]
+    return runs
+
+
+def command_q_stats(
+    root: str = TRAJECTORY_DIR,
+    run_ids: Optional[Iterable[str]] = None,
+    min_visits: int = 1
+) -> List[Dict[str, Any]]:
+    """커맨드별 제안 횟수, 선택 횟수, 평균 critic 점수, 경험적 Q(선택됐을 때 평균 보상), 태스크 성공 비율
+
+    행 수가 많을 때를 위해 Parquet은 pyarrow group_by로 집계하고, JSONL은 같은 값을 파이썬으로 집계합니다.
+    """
+    columns = ["command", "chosen", "critic_score", "reward", "score"]
+    if pa is not None and not _files(root, ".jsonl", run_ids):
+        parquet_files = _files(root, ".parquet", run_ids)
+        if not parquet_files:
+            return []
+        table = ds.dataset(parquet_files, format="parquet", schema=SCHEMA).to_table(columns=columns)
+        table = table.set_column(0, "command", pc.cast(table.column("command"), pa.string()))
+        table = table.append_column("chosen_i", pc.cast(table.column("chosen"), pa.int32()))
+        table = table.append_column(
+            "success_i", pc.cast(pc.and_(table.column("chosen"), pc.equal(table.column("score"), 1.0)), pa.int32())
+        )
+        grouped = table.group_by("command").aggregate([
+            ("chosen", "count"), ("chosen_i", "sum"), ("critic_score", "mean"), ("reward", "mean"), ("success_i", "sum"),
+        ]).to_pylist()
+        stats = [{
+            "command": g["command"],
+            "proposed": g["chosen_count"],
+            "visits": g["chosen_i_sum"],
+            "critic_mean": g["critic_score_mean"],
+            # reward는 선택된 행에만 있으므로 평균이 곧 선택됐을 때의 평균 보상
+            "q": g["reward_mean"],
+            "success_rate": g["success_i_sum"] / g["chosen_i_sum"] if g["chosen_i_sum"] else None,
+        } for g in grouped]
+    else:
+        data = read_columns(columns, root, run_ids)
+        acc: Dict[str, Dict[str, Any]] = {}
+        for command, chosen, critic, reward, score in zip(*(data[c] for c in columns)):
+            a = acc.setdefault(command, {"proposed": 0, "visits": 0, "critic": [], "reward": [], "success": 0})
+            a["proposed"] += 1
+            if critic is not None:
+                a["critic"].append(critic)
+            if chosen:
+                a["visits"] += 1
+                a["success"] += int(score == 1)
+                if reward is not None:
+                    a["reward"].append(reward)
+        stats = [{
+            "command": command,
+            "proposed": a["proposed"],
+            "visits": a["visits"],
+            "critic_mean": sum(a["critic"]) / len(a["critic"]) if a["critic"] else None,
+            "q": sum(a["reward"]) / len(a["reward"]) if a["reward"] else None,
+            "success_rate": a["success"] / a["visits"] if a["visits"] else None,
+        } for command, a in acc.items()]
+
+    stats = [s for s in stats if s["command"] is not None and s["visits"] >= min_visits]
+    stats.sort(key=lambda s: (s["visits"], s["q"] or 0.0), reverse=True)
+    return stats
+
+
+if __name__ == "__main__":
+    # python -m agentq.trajectory_store [run_id ...]
+    import sys
+    from tabulate import tabulate
+
+    selected = sys.argv[1:] or None
+    runs = success_rates(run_ids=selected)
+    print(tabulate(
+        [[run_id, r["tasks"], r["passed"], f"{r['success_rate']*100:.1f}%", f"{r['avg_loops']:.1f}"] for run_id, r in runs.items()],
+        headers=["실행", "태스크", "성공", "성공률", "평균 루프"], tablefmt="grid"
+    ))
+    print(tabulate(
+        [[s["command"][:60], s["proposed"], s["visits"], f"{s['critic_mean'] or 0:.2f}", f"{s['q'] or 0:.2f}",
+          f"{(s['success_rate'] or 0)*100:.0f}%"] for s in command_q_stats(run_ids=selected)[:30]],
+        headers=["커맨드", "제안", "선택", "critic 평균", "Q", "성공 비율"], tablefmt="grid"
+    ))
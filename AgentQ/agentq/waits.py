@@ -0,0 +1,224 @@
+"""
+고정 sleep 대신 구체적인 조건을 기다리는 대기 유틸리티
+(네트워크 유휴 + 조용한 구간, 선택자 등장, URL 변경) 과 도메인별 적응형 타임아웃
+"""
+
+import asyncio
+import json
+import os
+import weakref
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from playwright.async_api import Page, Request, TimeoutError as PlaywrightTimeoutError
+
+DEFAULT_QUIET_MS = 500
+DEFAULT_TIMEOUT_S = 10.0
+MIN_TIMEOUT_S = 2.0
+MAX_TIMEOUT_S = 30.0
+# 이보다 오래 열린 요청(롱폴링, 분석 비콘 등)은 유휴 판정에서 제외
+STALE_REQUEST_S = 5.0
+IGNORED_RESOURCE_TYPES = {"websocket", "eventsource"}
+WAIT_TIMEOUTS_PATH = os.getenv("AGENTQ_WAIT_TIMEOUTS_PATH", ".agentq/wait_timeouts.json")
+
+
+def _domain(url: Optional[str]) -> str:
+    return (urlparse(url or "").hostname or "").lower()
+
+
+class AdaptiveTimeouts:
+    """도메인별 대기 시간을 학습해 타임아웃을 정함
+
+    TCP 재전송 타이머처럼 관측된 대기 시간의 지수 이동 평균과 평균 편차를 유지하고
+    `평균 + 4 * 편차`를 [MIN_TIMEOUT_S, MAX_TIMEOUT_S] 범위로 잘라 사용합니다.
+    """
+
+    def __init__(self, path: str = WAIT_TIMEOUTS_PATH, alpha: float = 0.125, beta: float = 0.25):
+        self.path = path
+        self.alpha = alpha
+        self.beta = beta
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._dirty = False
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self._stats = json.load(f)
+
+    def timeout_for(self, url: Optional[str]) -> float:
+        stats = self._stats.get(_domain(url))
+        if not stats:
+            return DEFAULT_TIMEOUT_S
+        return max(MIN_TIMEOUT_S, min(MAX_TIMEOUT_S, stats["mean"] + 4 * stats["dev"]))
+
+    def record(self, url: Optional[str], elapsed_s: float):
+        domain = _domain(url)
+        if not domain:
+            return
+        stats = self._stats.get(domain)
+        if stats is None:
+            self._stats[domain] = {"mean": elapsed_s, "dev": elapsed_s / 2, "n": 1}
+        else:
+            stats["dev"] = (1 - self.beta) * stats["dev"] + self.beta * abs(elapsed_s - stats["mean"])
+            stats["mean"] = (1 - self.alpha) * stats["mean"] + self.alpha * elapsed_s
+            stats["n"] += 1
+        self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self._stats, f, ensure_ascii=False, indent=2)
+        self._dirty = False
+
+
+class _RequestTracker:
+    """페이지의 진행 중 요청과 마지막 네트워크 활동 시각 추적"""
+
+    def __init__(self, page: Page):
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        self.inflight: Dict[Request, float] = {}
+        self.last_activity = loop.time()
+        self.activity = asyncio.Event()
+        page.on("request", self._on_request)
+        page.on("requestfinished", self._on_done)
+        page.on("requestfailed", self._on_done)
+
+    def _on_request(self, request: Request):
+        if request.resource_type in IGNORED_RESOURCE_TYPES:
+            return
+        self.inflight[request] = self._loop.time()
+        self._touch()
+
+    def _on_done(self, request: Request):
+        if self.inflight.pop(request, None) is not None:
+            self._touch()
+
+    def _touch(self):
+        self.last_activity = self._loop.time()
+        self.activity.set()
+
+    def busy(self) -> bool:
+        self.drop_stale()
+        return bool(self.inflight)
+
+    def drop_stale(self):
+        """STALE_REQUEST_S를 넘긴 요청은 끝나지 않아도 추적에서 뺌 (오래 사는 페이지에 쌓이지 않도록)"""
+        now = self._loop.time()
+        for request, started in list(self.inflight.items()):
+            if now - started >= STALE_REQUEST_S:
+                del self.inflight[request]
+
+    def next_stale_at(self) -> Optional[float]:
+        """진행 중 요청 중 가장 오래된 것이 유휴 판정에서 빠지는 시각"""
+        if not self.inflight:
+            return None
+        return min(self.inflight.values()) + STALE_REQUEST_S
+
+
+_trackers: "weakref.WeakKeyDictionary[Page, _RequestTracker]" = weakref.WeakKeyDictionary()
+
+
+def track_page(page: Page) -> _RequestTracker:
+    """페이지에 요청 추적기를 (한 번만) 설치. 내비게이션 전에 호출할수록 정확함"""
+    tracker = _trackers.get(page)
+    if tracker is None:
+        tracker = _RequestTracker(page)
+        _trackers[page] = tracker
+    return tracker
+
+
+async def wait_for_network_idle(page: Page, quiet_ms: int = DEFAULT_QUIET_MS, timeout_s: Optional[float] = None) -> bool:
+    """load 이벤트 이후 진행 중 요청이 없는 상태가 quiet_ms 동안 이어지면 True"""
+    tracker = track_page(page)
+    loop = asyncio.get_running_loop()
+    timeout_s = timeout_s or get_wait_timeouts().timeout_for(page.url)
+    deadline = loop.time() + timeout_s
+    quiet_s = quiet_ms / 1000
+
+    try:
+        await page.wait_for_load_state("load", timeout=timeout_s * 1000)
+    except PlaywrightTimeoutError:
+        return False
+
+    while True:
+        # 상태 확인 전에 비워야 확인 직후의 활동을 놓치지 않음
+        tracker.activity.clear()
+        now = loop.time()
+        if now >= deadline:
+            return False
+        if tracker.busy():
+            # 다른 활동이 없어도 가장 오래된 요청이 오래된 요청으로 빠지는 시점에는 다시 확인
+            wait_s = min(deadline, tracker.next_stale_at()) - now
+        else:
+            quiet_left = quiet_s - (now - tracker.last_activity)
+            if quiet_left <= 0:
+                return True
+            wait_s = min(quiet_left, deadline - now)
+        try:
+            await asyncio.wait_for(tracker.activity.wait(), timeout=wait_s)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def wait_for_selector(page: Page, selector: str, timeout_s: Optional[float] = None) -> bool:
+    """선택자가 화면에 나타나면 True"""
+    timeout_s = timeout_s or get_wait_timeouts().timeout_for(page.url)
+    try:
+        await page.wait_for_selector(selector, state="visible", timeout=timeout_s * 1000)
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
+async def wait_for_url_change(page: Page, old_url: str, timeout_s: Optional[float] = None) -> bool:
+    """URL이 old_url에서 바뀌면 True"""
+    timeout_s = timeout_s or get_wait_timeouts().timeout_for(old_url)
+    try:
+        await page.wait_for_url(lambda url: url != old_url, wait_until="commit", timeout=timeout_s * 1000)
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
+async def wait_for_page_settle(
+    page: Page,
+    selector: Optional[str] = None,
+    old_url: Optional[str] = None,
+    quiet_ms: int = DEFAULT_QUIET_MS,
+    timeout_s: Optional[float] = None
+) -> bool:
+    """페이지가 안정될 때까지 대기하고 걸린 시간을 도메인별 타임아웃 학습에 반영
+
+    old_url이 주어지면 먼저 URL 변경을, selector가 주어지면 그 요소의 등장을,
+    아니면 네트워크 유휴를 기다립니다. 조건을 만족하지 못하면 타임아웃까지 기다린 뒤 False.
+    """
+    timeouts = get_wait_timeouts()
+    timeout_s = timeout_s or timeouts.timeout_for(old_url or page.url)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    settled = True
+    if old_url is not None:
+        settled = await wait_for_url_change(page, old_url, timeout_s)
+    remaining = max(0.1, timeout_s - (loop.time() - started))
+    if settled and selector:
+        settled = await wait_for_selector(page, selector, remaining)
+    elif settled:
+        settled = await wait_for_network_idle(page, quiet_ms, remaining)
+
+    # 실패한 대기도 표본으로 넣어 다음 타임아웃이 늘어나도록 함
+    timeouts.record(page.url, loop.time() - started)
+    return settled
+
+
+# 전역 적응형 타임아웃 인스턴스
+_wait_timeouts: Optional[AdaptiveTimeouts] = None
+
+
+def get_wait_timeouts() -> AdaptiveTimeouts:
+    """적응형 타임아웃 싱글톤 인스턴스 반환"""
+    global _wait_timeouts
+    if _wait_timeouts is None:
+        _wait_timeouts = AdaptiveTimeouts()
+    return _wait_timeouts
@@ -11,27 +11,59 @@ from typing import Optional
 # 프로젝트 루트를 Python 경로에 추가
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from agentq.graph import get_agentq_executor
-from agentq.llm_utils import setup_default_llms, test_llm_connection
-from agentq.playwright_helper import connect_to_chrome, cleanup
+from agentq.startup import get_startup_profile
 
+# 가장 먼저 프로파일을 만들어 import 시간부터 기록 (--startup-profile)
+with get_startup_profile().phase("import agentq"):
+    from agentq.graph import get_agentq_executor
+    from agentq.llm_utils import get_llm_manager, setup_default_llms, test_llm_connection
+    from agentq.playwright_helper import connect_to_chrome, cleanup, use_page
 
-async def setup_environment():
-    """환경 설정 및 초기화"""
-    print("🔧 AgentQ 환경 설정 중...")
-    
-    # 1. LLM 설정
+# --pool-size로 띄운 브라우저 컨텍스트 풀 (없으면 9222 포트의 Chrome에 CDP로 연결)
+_browser_pool = None
+
+
+async def _setup_llm() -> bool:
+    profile = get_startup_profile()
     print("\n1️⃣ LLM 설정...")
-    setup_default_llms()
+    with profile.phase("LLM 등록"):
+        setup_default_llms()
+    
+    # 제공자 패키지 import와 클라이언트 생성은 스레드에서 (브라우저 준비와 겹침)
+    with profile.phase("LLM 워밍업"):
+        await asyncio.to_thread(get_llm_manager().warm_up)
     
     # LLM 연결 테스트
-    llm_available = await test_llm_connection()
+    with profile.phase("LLM 연결 테스트"):
+        llm_available = await test_llm_connection()
     if not llm_available:
         print("❌ LLM 연결에 실패했습니다.")
         print("💡 해결 방법:")
         print("   - OpenAI: OPENAI_API_KEY 환경변수 설정")
         print("   - Ollama: ollama serve 명령으로 서버 실행")
         return False
+    return True
+
+
+async def _setup_browser(pool_size: Optional[int], headless: bool) -> bool:
+    global _browser_pool
+    if pool_size:
+        from agentq.browser_pool import BrowserPool
+        from agentq.resource_cache import ENABLE_RESOURCE_CACHE, get_resource_cache
+        print(f"\n2️⃣ 브라우저 컨텍스트 풀 준비 ({pool_size}개)...")
+        _browser_pool = BrowserPool(
+            size=pool_size, headless=headless,
+            resource_cache=get_resource_cache() if ENABLE_RESOURCE_CACHE else None
+        )
+        try:
+            await _browser_pool.start()
+        except Exception as e:
+            print(f"❌ 브라우저 실행에 실패했습니다: {e}")
+            print("💡 해결 방법: playwright install chromium")
+            await _browser_pool.close()
+            _browser_pool = None
+            return False
+        return True
     
     # 2. Chrome 연결
     print("\n2️⃣ Chrome 연결...")
@@ -44,61 +76,67 @@ async def setup_environment():
         return False
     
     print("✅ Chrome 연결 성공")
+    return True
+
+
+async def setup_environment(pool_size: Optional[int] = None, headless: bool = True):
+    """환경 설정 및 초기화 (LLM 준비와 브라우저 준비를 동시에 진행)"""
+    print("🔧 AgentQ 환경 설정 중...")
+    
+    with get_startup_profile().phase("환경 설정 (LLM ∥ 브라우저)"):
+        llm_ok, browser_ok = await asyncio.gather(
+            _setup_llm(),
+            _setup_browser(pool_size, headless)
+        )
+    if not (llm_ok and browser_ok):
+        return False
     
     print("\n🎯 AgentQ 준비 완료!")
     return True
 
 
+async def release_environment():
+    """setup_environment로 준비한 브라우저 리소스 정리"""
+    global _browser_pool
+    if _browser_pool:
+        await _browser_pool.close()
+        _browser_pool = None
+    await cleanup()
+
+
 async def run_agentq(
     user_input: str, 
     max_loops: int = 5, 
     stream: bool = False,
-    session_id: Optional[str] = None
+    session_id: Optional[str] = None,
+    trace_path: Optional[str] = None,
+    prepared: bool = False,
+    pool_size: Optional[int] = None,
+    headless: bool = True,
+    startup_profile: bool = False
 ):
-    """AgentQ 실행"""
+    """AgentQ 실행
+
+    prepared: 이미 setup_environment를 마친 경우(대화형 모드) 설정/정리를 건너뜀
+    """
     
     # 환경 설정
-    if not await setup_environment():
-        return False
+    if not prepared:
+        ready = await setup_environment(pool_size, headless)
+        if startup_profile:
+            print("\n" + get_startup_profile().report())
+        if not ready:
+            await release_environment()
+            return False
     
     try:
-        # AgentQ 실행기 가져오기
-        executor = get_agentq_executor()
-        
-        if stream:
-            # 스트리밍 실행
-            await executor.stream_execute(
-                user_input=user_input,
-                max_loops=max_loops,
-                session_id=session_id
-            )
+        if _browser_pool:
+            # 풀에서 새 컨텍스트를 빌려 이 명령만 그 페이지에서 실행 (이전 명령의 쿠키/스토리지 없음)
+            async with _browser_pool.acquire() as page:
+                with use_page(page):
+                    await _execute(user_input, max_loops, stream, session_id, trace_path)
         else:
-            # 일반 실행
-            final_state = await executor.execute(
-                user_input=user_input,
-                max_loops=max_loops,
-                session_id=session_id
-            )
-            
-            # 결과 출력
-            print("\n" + "="*60)
-            print("📋 최종 결과")
-            print("="*60)
-            
-            if final_state.get("explanation"):
-                print(f"💬 답변: {final_state['explanation']}")
-            
-            if final_state.get("current_url"):
-                print(f"🌐 최종 URL: {final_state['current_url']}")
-            
-            if final_state.get("page_title"):
-                print(f"📄 페이지 제목: {final_state['page_title']}")
-            
-            print(f"🔄 실행된 루프: {final_state['loop_count']}/{final_state['max_loops']}")
-            
-            if final_state.get("last_error"):
-                print(f"⚠️ 마지막 오류: {final_state['last_error']}")
-        
+            await _execute(user_input, max_loops, stream, session_id, trace_path)
         return True
         
     except Exception as e:
@@ -106,13 +144,66 @@ async def run_agentq(
         return False
     
     finally:
-        # 리소스 정리
-        print("\n🧹 리소스 정리 중...")
-        await cleanup()
+        if not prepared:
+            # 리소스 정리
+            print("\n🧹 리소스 정리 중...")
+            await release_environment()
+
+
+async def _execute(
+    user_input: str,
+    max_loops: int,
+    stream: bool,
+    session_id: Optional[str],
+    trace_path: Optional[str]
+):
+    # AgentQ 실행기 가져오기
+    executor = get_agentq_executor()
+    
+    if stream:
+        # 스트리밍 실행
+        await executor.stream_execute(
+            user_input=user_input,
+            max_loops=max_loops,
+            session_id=session_id,
+            trace_path=trace_path
+        )
+        return
+    
+    # 일반 실행
+    final_state = await executor.execute(
+        user_input=user_input,
+        max_loops=max_loops,
+        session_id=session_id,
+        trace_path=trace_path
+    )
+    
+    # 결과 출력
+    print("\n" + "="*60)
+    print("📋 최종 결과")
+    print("="*60)
+    
+    if final_state.get("explanation"):
+        print(f"💬 답변: {final_state['explanation']}")
+    
+    if final_state.get("current_url"):
+        print(f"🌐 최종 URL: {final_state['current_url']}")
+    
+    if final_state.get("page_title"):
+        print(f"📄 페이지 제목: {final_state['page_title']}")
+    
+    print(f"🔄 실행된 루프: {final_state['loop_count']}/{final_state['max_loops']}")
+    
+    if final_state.get("last_error"):
+        print(f"⚠️ 마지막 오류: {final_state['last_error']}")
 
 
-async def interactive_mode():
-    """대화형 모드"""
+async def interactive_mode(
+    pool_size: Optional[int] = None,
+    headless: bool = True,
+    startup_profile: bool = False
+):
+    """대화형 모드 (환경은 한 번만 준비하고 명령마다 재사용)"""
     print("🤖 AgentQ 대화형 모드")
     print("=" * 40)
     print("명령어:")
@@ -122,7 +213,11 @@ async def interactive_mode():
     print("=" * 40)
     
     # 환경 설정
-    if not await setup_environment():
+    ready = await setup_environment(pool_size, headless)
+    if startup_profile:
+        print("\n" + get_startup_profile().report())
+    if not ready:
+        await release_environment()
         return
     
     executor = get_agentq_executor()
@@ -131,7 +226,8 @@ async def interactive_mode():
     try:
         while True:
             print("\n" + "-" * 40)
-            user_input = input("🎯 명령을 입력하세요: ").strip()
+            # input()은 블로킹이므로 스레드에서 (대기 중에도 이벤트 루프의 백그라운드 작업이 진행됨)
+            user_input = (await asyncio.to_thread(input, "🎯 명령을 입력하세요: ")).strip()
             
             if not user_input:
                 continue
@@ -156,13 +252,13 @@ AgentQ 사용법:
             
             # AgentQ 실행
             print(f"\n🚀 실행 중: {user_input}")
-            await run_agentq(user_input, session_id=session_id)
+            await run_agentq(user_input, session_id=session_id, prepared=True)
     
     except KeyboardInterrupt:
         print("\n\n👋 사용자가 중단했습니다.")
     
     finally:
-        await cleanup()
+        await release_environment()
 
 
 def main():
@@ -194,22 +290,96 @@ def main():
         help="세션 ID (선택사항)"
     )
     
+    parser.add_argument(
+        "--trace",
+        type=str,
+        help="노드/LLM/CDP 스팬을 기록할 JSONL 경로 (선택사항)"
+    )
+    
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="HTTP 서비스 모드로 실행 (제출/이벤트 스트림/취소 API, uvicorn 필요)"
+    )
+    
+    parser.add_argument(
+        "--host",
+        type=str,
+        default="127.0.0.1",
+        help="서비스 모드 바인드 주소 (기본값: 127.0.0.1)"
+    )
+    
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8000,
+        help="서비스 모드 포트 (기본값: 8000)"
+    )
+    
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=None,
+        metavar="N",
+        help="9222 포트 Chrome 대신 Chromium을 직접 띄우고 컨텍스트 N개를 미리 준비 (명령마다 새 컨텍스트 사용). "
+             "서비스 모드에서는 동시 실행 세션 수 (기본값: AGENTQ_BROWSER_POOL_SIZE 또는 2)"
+    )
+    
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=None,
+        help="서비스 모드 대기열 크기, 가득 차면 429 응답 (기본값: AGENTQ_SERVER_QUEUE 또는 16)"
+    )
+    
+    parser.add_argument(
+        "--headed",
+        action="store_true",
+        help="--pool-size/서비스 모드 브라우저를 화면에 띄워 실행"
+    )
+    
+    parser.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="import/LLM 준비/브라우저 실행·연결 구간별 시작 시간 출력"
+    )
+    
     args = parser.parse_args()
+    if args.pool_size is not None and args.pool_size < 1:
+        parser.error("--pool-size는 1 이상이어야 합니다")
     
     print("🤖 AgentQ - Advanced AI Web Agent")
     print("=" * 50)
     
-    if args.command:
+    if args.serve:
+        from agentq.server import serve, BROWSER_POOL_SIZE, SERVER_QUEUE_SIZE
+        sys.exit(serve(
+            host=args.host,
+            port=args.port,
+            pool_size=args.pool_size or BROWSER_POOL_SIZE,
+            queue_size=args.queue_size or SERVER_QUEUE_SIZE,
+            headless=not args.headed,
+            startup_profile=args.startup_profile
+        ))
+    elif args.command:
         # 단일 명령 실행
         asyncio.run(run_agentq(
             user_input=args.command,
             max_loops=args.max_loops,
             stream=args.stream,
-            session_id=args.session_id
+            session_id=args.session_id,
+            trace_path=args.trace,
+            pool_size=args.pool_size,
+            headless=not args.headed,
+            startup_profile=args.startup_profile
         ))
     else:
         # 대화형 모드
-        asyncio.run(interactive_mode())
+        asyncio.run(interactive_mode(
+            pool_size=args.pool_size,
+            headless=not args.headed,
+            startup_profile=args.startup_profile
+        ))
 
 
 if __name__ == "__main__":
@@ -7,11 +7,124 @@ import asyncio
 import argparse
 import sys
 import os
+import time
 
 # 프로젝트 루트를 Python 경로에 추가
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from test.agentq_test_runner import AgentQTestRunner
+from test.agentq_test_runner import AgentQTestRunner, shard_results_dir
+
+
+def print_reflection_comparison(runs):
+    """split/fused 모드별 루프당 지연과 액션 후 LLM 시간 비교 출력"""
+    print(f"\n{'='*60}")
+    print("🪞 Reflection 모드 비교 (루프당 평균)")
+    for mode, results in runs.items():
+        loops = [m for r in results for m in r.get("loop_metrics", []) if "loop_s" in m]
+        if not loops:
+            print(f"  {mode}: 측정된 루프 없음")
+            continue
+        loop_s = sum(m["loop_s"] for m in loops) / len(loops)
+        post_s = sum(m.get("post_action_llm_s", 0.0) for m in loops) / len(loops)
+        passed = len([r for r in results if r["score"] == 1])
+        print(f"  {mode:<6} 루프 {loop_s:.2f}초, 액션 후 LLM {post_s:.2f}초, 성공 {passed}/{len(results)} ({len(loops)}개 루프)")
+
+
+def build_worker_argv(args, shard_index: int, results_id: str):
+    """샤드 워커용 인자 (목업 사이트는 오케스트레이터가 한 번만 띄우므로 제외)"""
+    argv = [
+        "--file", args.file,
+        "--min", str(args.min),
+        "--headless", str(args.headless),
+        "--wait", str(args.wait),
+        "--block-requests", str(args.block_requests),
+        "--har-dir", args.har_dir,
+        "--screenshots", args.screenshots,
+        "--results-id", results_id,
+        "--shards", str(args.shards),
+        "--shard-index", str(shard_index),
+    ]
+    if args.max is not None:
+        argv += ["--max", str(args.max)]
+    if args.har_mode:
+        argv += ["--har-mode", args.har_mode]
+    if args.mock_llm:
+        argv.append("--mock-llm")
+    if args.llm_cache:
+        argv.append("--llm-cache")
+    if args.resource_cache:
+        argv.append("--resource-cache")
+    if args.nav_prefetch:
+        argv.append("--nav-prefetch")
+    if args.reflection:
+        argv += ["--reflection", args.reflection]
+    if args.obs_budget:
+        argv += ["--obs-budget", args.obs_budget]
+    if args.resume:
+        argv.append("--resume")
+    return argv
+
+
+def print_budget_comparison(runs):
+    """관찰 토큰 예산별 성공률, 루프 수, 페이지 개요/LLM 입력 토큰 비교 출력"""
+    print(f"\n{'='*60}")
+    print("🔭 관찰 토큰 예산 비교")
+    for budget, results in runs.items():
+        if not results:
+            print(f"  {budget:>6}: 결과 없음")
+            continue
+        loops = [m for r in results for m in r.get("loop_metrics", []) if "obs_tokens" in m]
+        obs_tokens = sum(m["obs_tokens"] for m in loops) / len(loops) if loops else 0.0
+        llm_tokens = sum(r.get("spans", {}).get("llm", {}).get("input_tokens", 0) for r in results) / len(results)
+        passed = len([r for r in results if r["score"] == 1])
+        avg_loops = sum(r["loop_count"] for r in results) / len(results)
+        print(f"  {budget:>6} 성공 {passed}/{len(results)}, 평균 루프 {avg_loops:.1f}, "
+              f"개요 {obs_tokens:.0f}토큰/루프, LLM 입력 {llm_tokens:.0f}토큰/태스크")
+
+
+async def run_shards(args) -> int:
+    """샤드 워커 K개를 별도 프로세스로 실행하고 태스크별 JSONL을 합쳐 요약"""
+    from test.test_utils import load_config
+
+    results_id = args.results_id or f"agentq_test_{int(time.time())}"
+    results_dir = shard_results_dir(results_id)
+    os.makedirs(results_dir, exist_ok=True)
+    print(f"🧩 {args.shards}개 샤드 실행 (결과 ID: {results_id}, 로그: {results_dir}/shard_<i>.log)")
+
+    mock_server = None
+    if args.mock_site:
+        from test.mock_site import start_mock_site, stop_mock_site
+        mock_server = start_mock_site()
+
+    script = os.path.abspath(__file__)
+    log_files = []
+    try:
+        workers = []
+        for shard_index in range(args.shards):
+            log_file = open(os.path.join(results_dir, f"shard_{shard_index}.log"), "a", encoding="utf-8")
+            log_files.append(log_file)
+            workers.append(await asyncio.create_subprocess_exec(
+                sys.executable, script, *build_worker_argv(args, shard_index, results_id),
+                stdout=log_file, stderr=asyncio.subprocess.STDOUT
+            ))
+        exit_codes = await asyncio.gather(*(worker.wait() for worker in workers))
+    finally:
+        for log_file in log_files:
+            log_file.close()
+        if mock_server:
+            stop_mock_site(mock_server)
+
+    for shard_index, code in enumerate(exit_codes):
+        if code != 0:
+            print(f"⚠️ 샤드 {shard_index} 종료 코드 {code} (--resume으로 남은 태스크만 다시 실행 가능)")
+
+    # 파일 순서대로 결과를 합쳐 요약 및 저장
+    configs = load_config(args.file)[args.min:args.max]
+    task_ids = [str(c.get("task_id")) for c in configs]
+    results = AgentQTestRunner().merge_shard_results(results_id, task_ids)
+    passed = len([r for r in results if r["score"] == 1])
+    print(f"\n🎉 샤드 실행 완료! {len(results)}/{len(task_ids)}개 태스크 결과, 성공 {passed}개")
+    return 0 if all(code == 0 for code in exit_codes) and len(results) == len(task_ids) else 1
 
 
 async def main():
@@ -27,6 +140,11 @@ async def main():
   python run_agentq_tests.py --min 0 --max 3          # 처음 3개 태스크만 실행
   python run_agentq_tests.py --headless False         # 브라우저 UI 표시
   python run_agentq_tests.py --file test/tasks/two_tasks.json  # 특정 파일 사용
+  python run_agentq_tests.py --file test/tasks/local_opentable_tasks.json --mock-site --mock-llm  # 오프라인 벤치마크
+  python run_agentq_tests.py --reflection both           # split/fused 루프 지연 비교
+  python run_agentq_tests.py --obs-budget 400,800,1600   # 관찰 토큰 예산별 성공률/토큰 비교
+  python run_agentq_tests.py --shards 4                  # 4개 프로세스로 나눠 실행 후 결과 합치기
+  python run_agentq_tests.py --results-id run1 --resume  # 중단된 실행에서 끝나지 않은 태스크만 실행
         """
     )
     
@@ -62,7 +180,82 @@ async def main():
         "--wait",
         type=int,
         default=2,
-        help="태스크 간 대기 시간(초) (기본값: 2)"
+        help="태스크 간 네트워크 유휴 대기 상한(초) (기본값: 2)"
+    )
+    
+    parser.add_argument(
+        "--block-requests",
+        type=lambda x: x.lower() == 'true',
+        default=True,
+        help="이미지/폰트/미디어/트래커 요청 차단 (기본값: True)"
+    )
+    
+    parser.add_argument(
+        "--har-mode",
+        type=str,
+        choices=["record", "replay"],
+        default=None,
+        help="record: 태스크별 트래픽을 HAR로 기록, replay: 기록된 HAR로 네트워크 없이 재실행"
+    )
+    
+    parser.add_argument(
+        "--har-dir",
+        type=str,
+        default="test/har",
+        help="HAR 파일 디렉토리 (기본값: test/har)"
+    )
+    
+    parser.add_argument(
+        "--mock-llm",
+        action="store_true",
+        help="스크립트형 목업 LLM 사용 (LLM 호출 없이 루프 처리량 측정)"
+    )
+    
+    parser.add_argument(
+        "--mock-site",
+        action="store_true",
+        help="로컬 목업 예약 사이트 실행 (test/tasks/local_opentable_tasks.json 용)"
+    )
+    
+    parser.add_argument(
+        "--screenshots",
+        type=str,
+        choices=["always", "on_failure", "off"],
+        default="on_failure",
+        help="스크린샷 정책: always(매 액션), on_failure(실패한 액션/태스크만), off (기본값: on_failure)"
+    )
+    
+    parser.add_argument(
+        "--llm-cache",
+        action="store_true",
+        help="LLM 응답 디스크 캐시 사용 (.agentq/llm_cache, 같은 프롬프트 재실행 시 모델 호출 생략)"
+    )
+    
+    parser.add_argument(
+        "--resource-cache",
+        action="store_true",
+        help="JS/CSS/이미지/폰트를 Cache-Control에 따라 디스크 캐시에서 제공 (.agentq/resource_cache, 샤드 워커끼리 공유)"
+    )
+    
+    parser.add_argument(
+        "--nav-prefetch",
+        action="store_true",
+        help="critic 채점 동안 링크 CLICK/NAVIGATE 후보의 대상 페이지를 백그라운드 탭에 미리 로드 (적중률/낭비된 로드 출력)"
+    )
+    
+    parser.add_argument(
+        "--reflection",
+        type=str,
+        choices=["split", "fused", "both"],
+        default=None,
+        help="split: explanation → critique 두 번 호출, fused: reflect 한 번 호출, both: 두 모드를 차례로 실행해 비교 (기본값: AGENTQ_FUSED_REFLECTION 설정)"
+    )
+    
+    parser.add_argument(
+        "--obs-budget",
+        type=str,
+        default=None,
+        help="페이지 개요(접근성 트리) 토큰 예산. 쉼표로 여러 개 주면 예산별로 차례로 실행해 비교 (기본값: AGENTQ_OBS_TOKENS 또는 800)"
     )
     
     parser.add_argument(
@@ -72,8 +265,43 @@ async def main():
         help="테스트 결과 ID (기본값: 자동 생성)"
     )
     
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="태스크를 K개 샤드로 나눠 프로세스별로 실행 (기본값: 1)"
+    )
+    
+    parser.add_argument(
+        "--shard-index",
+        type=int,
+        default=None,
+        help="이 프로세스가 실행할 샤드 번호 (지정하지 않고 --shards > 1이면 모든 샤드를 띄우고 결과를 합침)"
+    )
+    
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="--results-id의 태스크별 결과(JSONL)에 있는 태스크는 건너뜀"
+    )
+    
     args = parser.parse_args()
     
+    if args.shards < 1 or (args.shard_index is not None and not 0 <= args.shard_index < args.shards):
+        print(f"❌ 잘못된 샤드 설정: --shards {args.shards} --shard-index {args.shard_index}")
+        return 1
+    if args.resume and not args.results_id:
+        print("❌ --resume에는 이어서 실행할 --results-id가 필요합니다.")
+        return 1
+    try:
+        budgets = [int(b) for b in args.obs_budget.split(",")] if args.obs_budget else [None]
+    except ValueError:
+        print(f"❌ 잘못된 --obs-budget: {args.obs_budget}")
+        return 1
+    if args.shards > 1 and (args.reflection == "both" or len(budgets) > 1):
+        print("❌ --reflection both / 여러 --obs-budget은 샤드 실행과 함께 사용할 수 없습니다.")
+        return 1
+    
     # 테스트 파일 존재 확인
     if not os.path.exists(args.file):
         print(f"❌ 테스트 파일을 찾을 수 없습니다: {args.file}")
@@ -91,20 +319,73 @@ async def main():
     print(f"📊 태스크 범위: {args.min} ~ {args.max or '끝까지'}")
     print(f"🖥️ 헤드리스 모드: {args.headless}")
     print(f"⏱️ 대기 시간: {args.wait}초")
+    print(f"🚫 요청 차단: {args.block_requests}")
+    print(f"📸 스크린샷 정책: {args.screenshots}")
+    if args.har_mode:
+        print(f"📼 HAR {args.har_mode}: {args.har_dir}")
+    if args.mock_llm or args.mock_site:
+        print(f"🧪 목업 LLM: {args.mock_llm}, 목업 사이트: {args.mock_site}")
+    if args.reflection:
+        print(f"🪞 Reflection 모드: {args.reflection}")
+    if args.obs_budget:
+        print(f"🔭 관찰 토큰 예산: {args.obs_budget}")
+    if args.shards > 1:
+        print(f"🧩 샤드: {args.shards}개" + (f" 중 {args.shard_index}번" if args.shard_index is not None else ""))
+    if args.resume:
+        print(f"⏭️ 이어서 실행: {args.results_id}")
     print("=" * 60)
     
+    if args.shards > 1 and args.shard_index is None:
+        return await run_shards(args)
+    
+    # 목업 사이트는 설정별 실행 루프 밖에서 한 번만 띄움 (실행마다 같은 포트로 다시 띄우지 않도록)
+    mock_server = None
+    if args.mock_site:
+        from test.mock_site import start_mock_site, stop_mock_site
+        mock_server = start_mock_site()
+    
     try:
-        # 테스트 실행기 생성 및 실행
-        runner = AgentQTestRunner()
-        
-        results = await runner.run_tests(
-            test_file=args.file,
-            min_task_index=args.min,
-            max_task_index=args.max,
-            test_results_id=args.results_id,
-            headless=args.headless,
-            wait_time=args.wait
-        )
+        # 테스트 실행기 생성 및 실행 (both/여러 예산이면 같은 태스크를 설정별로 차례로 실행)
+        modes = ["split", "fused"] if args.reflection == "both" else [args.reflection]
+        runs = {}
+        budget_runs = {}
+        base_results_id = args.results_id or f"agentq_test_{int(time.time())}"
+        for mode, budget in [(mode, budget) for mode in modes for budget in budgets]:
+            runner = AgentQTestRunner()
+            results_id = args.results_id
+            if len(modes) > 1 or len(budgets) > 1:
+                suffix = "_".join(str(part) for part in (mode, budget and f"obs{budget}") if part)
+                # 설정별 ID = 실행 ID + 설정 (--results-id를 주면 고정되어 --resume이 이전 결과를 찾음)
+                results_id = f"{base_results_id}_{suffix}"
+            mode_results = await runner.run_tests(
+                test_file=args.file,
+                min_task_index=args.min,
+                max_task_index=args.max,
+                test_results_id=results_id,
+                headless=args.headless,
+                wait_time=args.wait,
+                block_requests=args.block_requests,
+                har_mode=args.har_mode,
+                har_dir=args.har_dir,
+                mock_llm=args.mock_llm,
+                mock_site=False,
+                screenshot_policy=args.screenshots,
+                llm_cache=args.llm_cache,
+                reflection=mode,
+                resource_cache=args.resource_cache,
+                nav_prefetch=args.nav_prefetch,
+                obs_budget=budget,
+                num_shards=args.shards,
+                shard_index=args.shard_index or 0,
+                resume=args.resume
+            )
+            runs.setdefault(mode, []).extend(mode_results)
+            budget_runs.setdefault(budget or "기본", []).extend(mode_results)
+        results = [r for mode_results in runs.values() for r in mode_results]
+        if len(runs) > 1:
+            print_reflection_comparison(runs)
+        if len(budget_runs) > 1:
+            print_budget_comparison(budget_runs)
         
         # 최종 결과 출력
         print(f"\n🎉 테스트 완료! 총 {len(results)}개 태스크 실행됨")
@@ -126,6 +407,10 @@ async def main():
         import traceback
         traceback.print_exc()
         return 1
+    
+    finally:
+        if mock_server:
+            stop_mock_site(mock_server)
 
 
 if __name__ == "__main__":
@@ -12,10 +12,18 @@ from playwright.async_api import async_playwright, Page, Browser
 from tabulate import tabulate
 from termcolor import colored
 
-from agentq.graph import get_agentq_executor
+from agentq.graph import AgentQExecutor, get_agentq_executor
+from agentq.llm_utils import get_llm_manager, setup_default_llms
 from agentq.state import AgentState
 from agentq.playwright_helper import PlaywrightHelper
-from test.evaluators import evaluator_router
+from agentq.network_filter import NetworkPolicy
+from agentq.resource_cache import counters_delta, get_resource_cache
+from agentq.trajectory_store import TrajectoryStore
+from agentq.waits import wait_for_network_idle, get_wait_timeouts
+from agentq.screenshots import get_screenshot_service
+from agentq.tracing import merge_span_summaries, summarize_spans
+from agentq import nodes, observation
+from test.evaluators import EvalSnapshot, evaluator_router
 from test.test_utils import (
     get_formatted_current_timestamp,
     load_config,
@@ -26,6 +34,37 @@ from test.test_utils import (
 TEST_TASKS = "test/tasks"
 TEST_LOGS = "test/logs"
 TEST_RESULTS = "test/results"
+TEST_HAR = "test/har"
+
+
+def shard_results_dir(test_results_id: str) -> str:
+    """태스크별 결과 JSONL(shard_<i>.jsonl)이 쌓이는 폴더"""
+    return os.path.join(TEST_RESULTS, test_results_id)
+
+
+def append_task_result(path: str, task_result: Dict[str, Any]):
+    """평가가 끝난 태스크 결과를 한 줄씩 추가 (중간에 죽어도 끝난 태스크는 남음)"""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(task_result, ensure_ascii=False, default=str) + "\n")
+
+
+def load_task_results(test_results_id: str) -> Dict[str, Dict[str, Any]]:
+    """모든 샤드의 JSONL에서 task_id별 최신 결과 로드 (쓰다 만 마지막 줄은 무시)"""
+    results: Dict[str, Dict[str, Any]] = {}
+    results_dir = shard_results_dir(test_results_id)
+    if not os.path.isdir(results_dir):
+        return results
+    for name in sorted(os.listdir(results_dir)):
+        if not name.endswith(".jsonl"):
+            continue
+        with open(os.path.join(results_dir, name), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    continue
+                results[str(result["task_id"])] = result
+    return results
 
 
 class AgentQTestRunner:
@@ -36,11 +75,20 @@ class AgentQTestRunner:
         self.playwright_helper = None
         self.browser = None
         self.page = None
+        self.block_requests = True
+        self.har_mode: Optional[str] = None
+        self.har_dir = TEST_HAR
+        self.results_jsonl: Optional[str] = None
+        self.trajectory_store: Optional[TrajectoryStore] = None
     
-    async def setup_browser(self, headless: bool = True):
-        """브라우저 초기화"""
+    async def setup_browser(self, headless: bool = True, block_requests: bool = True, resource_cache: bool = False):
+        """브라우저 초기화 (block_requests: 이미지/폰트/미디어/트래커 요청 차단, resource_cache: 정적 리소스 디스크 캐시)"""
         self.playwright_helper = PlaywrightHelper()
-        await self.playwright_helper.setup(headless=headless)
+        await self.playwright_helper.setup(
+            headless=headless,
+            network_policy=NetworkPolicy(enabled=block_requests),
+            resource_cache=get_resource_cache() if resource_cache else None
+        )
         self.browser = self.playwright_helper.browser
         self.page = self.playwright_helper.page
         print("✅ 브라우저 초기화 완료")
@@ -85,6 +133,7 @@ class AgentQTestRunner:
             "loop_count": state.get("loop_count"),
             "done": state.get("done"),
             "scratchpad": state.get("scratchpad", []),
+            "scratchpad_summary": state.get("scratchpad_summary"),
             "last_error": state.get("last_error"),
             "current_url": state.get("current_url"),
             "page_title": state.get("page_title")
@@ -97,9 +146,20 @@ class AgentQTestRunner:
     async def execute_single_task(
         self, 
         task_config: Dict[str, Any],
-        logs_dir: str
+        logs_dir: str,
+        screenshots_dir: Optional[str] = None
     ) -> Dict[str, Any]:
-        """단일 태스크 실행"""
+        """단일 태스크 실행 후 평가까지 (평가를 다음 태스크와 겹치지 않는 순차 실행용)"""
+        task_result, snapshot = await self.run_single_task(task_config, logs_dir)
+        await self.evaluate_task(task_config, task_result, snapshot, screenshots_dir)
+        return task_result
+
+    async def run_single_task(
+        self, 
+        task_config: Dict[str, Any],
+        logs_dir: str
+    ) -> Tuple[Dict[str, Any], EvalSnapshot]:
+        """단일 태스크 실행 (평가 전 결과와 평가용 스냅샷 반환)"""
         
         # 태스크 설정 검증
         task_config_validator(task_config)
@@ -111,6 +171,23 @@ class AgentQTestRunner:
         print(f"\n🎯 태스크 {task_id} 실행 시작")
         print(f"📝 의도: {intent}")
         print(f"🌐 시작 URL: {start_url}")
+
+        # HAR 기록/재생: 태스크마다 컨텍스트를 새로 열어 태스크별 HAR 파일 하나에 대응
+        if self.har_mode:
+            har_path = os.path.join(self.har_dir, f"task_{task_id}.har")
+            if self.har_mode == "replay" and not os.path.exists(har_path):
+                raise FileNotFoundError(f"재생할 HAR 파일이 없습니다 (먼저 --har-mode record로 기록): {har_path}")
+            self.page = await self.playwright_helper.new_task_context(self.har_mode, har_path)
+            print(f"📼 HAR {self.har_mode}: {har_path}")
+
+        # 태스크별 요청 차단 정책 (스크린샷 평가 태스크는 이미지 등 허용)
+        self.playwright_helper.set_network_policy(
+            NetworkPolicy.for_task(task_config, enabled=self.block_requests)
+        )
+        
+        # 리소스 캐시 통계는 컨텍스트 단위로 쌓이므로 태스크 전후 차이로 계산
+        resource_counters = self.playwright_helper.resource_counters
+        resource_before = dict(resource_counters) if resource_counters else {}
         
         # 시작 URL로 이동
         if start_url:
@@ -125,11 +202,15 @@ class AgentQTestRunner:
             import agentq.tools as tools
             tools.set_playwright_helper(self.playwright_helper)
             
+            self.executor.last_trace = None
             final_state = await self.executor.execute(
                 user_input=intent,
                 max_loops=5,
-                session_id=f"task_{task_id}"
+                session_id=f"task_{task_id}",
+                trace_path=os.path.join(logs_dir, "trace.jsonl")
             )
+            # 선행 로드된 페이지로 교체됐을 수 있으므로 헬퍼의 현재 페이지를 따라감
+            self.page = self.playwright_helper.page
             
             end_time = time.time()
             execution_time = end_time - start_time
@@ -168,29 +249,85 @@ class AgentQTestRunner:
             "agentq_explanation": final_state.get("explanation", ""),
             "loop_count": final_state.get("loop_count", 0),
             "done": final_state.get("done", False),
-            "error": final_state.get("last_error")
+            "error": final_state.get("last_error"),
+            "loop_metrics": [
+                {k: v for k, v in m.items() if k != "started"}
+                for m in final_state.get("loop_metrics", [])
+            ],
+            "obs_budget": observation.OBSERVATION_TOKEN_BUDGET,
+            # 스팬 이름별 횟수/시간/토큰 (전체 스팬은 logs_dir/trace.jsonl)
+            "spans": summarize_spans(self.executor.last_trace.records()) if self.executor.last_trace else {}
         }
+        if resource_counters:
+            cache_stats = counters_delta(resource_counters, resource_before)
+            task_result["resource_cache"] = cache_stats
+            print(f"📦 리소스 캐시: 적중 {cache_stats['hits'] + cache_stats['revalidated']}건 / 미스 {cache_stats['misses']}건 "
+                  f"({cache_stats['hit_ratio']*100:.1f}%), {cache_stats['bytes_avoided'] / 1024:.0f}KB 절감")
         
-        # 평가 실행
+        # 평가는 라이브 페이지가 아니라 이 시점의 스냅샷에서 (다음 태스크가 바로 페이지를 쓸 수 있도록)
+        snapshot = await EvalSnapshot.capture(self.page, self.playwright_helper.har_replayer)
+        return task_result, snapshot
+
+    async def evaluate_task(
+        self,
+        task_config: Dict[str, Any],
+        task_result: Dict[str, Any],
+        snapshot: EvalSnapshot,
+        screenshots_dir: Optional[str] = None
+    ):
+        """스냅샷을 복원한 별도 컨텍스트에서 평가하고 task_result에 score/reason 기록
+
+        URL/문자열 평가만 있는 태스크는 페이지를 열지 않고 스냅샷의 마지막 URL로 평가합니다.
+        """
+        task_id = task_result["task_id"]
+        page = None
+        started = time.perf_counter()
         try:
             evaluator = evaluator_router(task_config)
+            if evaluator.requires_page:
+                page = await self.playwright_helper.open_snapshot_page(
+                    snapshot.url, snapshot.storage_state, snapshot.har_replayer
+                )
             evaluator_result = await evaluator(
                 task_config=task_config,
-                page=self.page,
+                page=page or snapshot,
                 client=None,  # CDP 세션 없음
-                answer=final_state.get("explanation", "")
+                answer=task_result["agentq_explanation"]
             )
             
             task_result["score"] = evaluator_result["score"]
             task_result["reason"] = evaluator_result["reason"]
             
         except Exception as e:
-            print(f"⚠️ 평가 중 오류: {str(e)}")
+            print(f"⚠️ 태스크 {task_id} 평가 중 오류: {str(e)}")
             task_result["score"] = -1  # 평가 실패
             task_result["reason"] = f"평가 오류: {str(e)}"
-        
-        return task_result
+
+        # 실패한 태스크의 마지막 화면 (on_failure 정책에서도 남김, 스냅샷 페이지에서 캡처)
+        screenshots = get_screenshot_service()
+        try:
+            if task_result["score"] < 1 and screenshots_dir:
+                if page is None:
+                    page = await self.playwright_helper.open_snapshot_page(
+                        snapshot.url, snapshot.storage_state, snapshot.har_replayer
+                    )
+                await screenshots.capture(page, os.path.join(screenshots_dir, f"task_{task_id}_final"), failed=True)
+                await screenshots.flush()
+        except Exception as e:
+            print(f"⚠️ 최종 스크린샷 실패: {e}")
+        finally:
+            if page is not None:
+                await page.context.close()
+        task_result["eval_s"] = time.perf_counter() - started
     
+    async def _report_evaluation(self, evaluation: asyncio.Task, task_result: Dict[str, Any], index: int, total: int):
+        """백그라운드 평가가 끝나길 기다려 결과 출력"""
+        await evaluation
+        append_task_result(self.results_jsonl, task_result)
+        # 평가 점수까지 붙은 뒤 루프/후보 행을 열 기반 궤적 저장소에 추가
+        self.trajectory_store.append_task(task_result)
+        self.print_task_result(task_result, index, total)
+
     def print_task_result(self, task_result: Dict[str, Any], index: int, total: int):
         """태스크 결과 출력"""
         score = task_result["score"]
@@ -224,16 +361,60 @@ class AgentQTestRunner:
         max_task_index: Optional[int] = None,
         test_results_id: str = "",
         headless: bool = True,
-        wait_time: int = 2
+        wait_time: int = 2,
+        block_requests: bool = True,
+        har_mode: Optional[str] = None,
+        har_dir: str = TEST_HAR,
+        mock_llm: bool = False,
+        mock_site: bool = False,
+        screenshot_policy: str = "on_failure",
+        llm_cache: bool = False,
+        reflection: Optional[str] = None,
+        obs_budget: Optional[int] = None,
+        resource_cache: bool = False,
+        nav_prefetch: bool = False,
+        num_shards: int = 1,
+        shard_index: int = 0,
+        resume: bool = False
     ) -> List[Dict[str, Any]]:
-        """테스트 실행"""
+        """테스트 실행
+
+        har_mode: "record"면 태스크별 HAR 기록, "replay"면 네트워크 없이 HAR로 재실행
+        mock_llm/mock_site: 스크립트형 목업 LLM과 로컬 예약 사이트로 LLM/네트워크 없이 루프 처리량 측정
+        screenshot_policy: always(매 액션) / on_failure(실패한 액션·태스크만) / off
+        llm_cache: 같은 프롬프트의 LLM 응답을 디스크 캐시에서 재사용
+        reflection: "split"(explanation → critique) / "fused"(reflect 노드 하나), None이면 기본 설정
+        obs_budget: 페이지 개요(접근성 트리 관찰) 토큰 예산, None이면 AGENTQ_OBS_TOKENS
+        resource_cache: JS/CSS/이미지/폰트를 Cache-Control에 따라 디스크 캐시에서 제공 (샤드 워커끼리 공유)
+        nav_prefetch: critic 채점 동안 링크 이동 후보의 대상 페이지를 백그라운드 탭에 미리 로드
+        num_shards/shard_index: 범위 안의 태스크 중 (위치 % num_shards == shard_index)인 것만 실행
+        resume: 같은 test_results_id의 JSONL에 결과가 있는 task_id는 건너뜀
+        """
         
         print("🚀 AgentQ 테스트 실행 시작")
         print("=" * 60)
         
         # 초기화
         self.create_test_folders()
-        await self.setup_browser(headless=headless)
+        if reflection:
+            self.executor = AgentQExecutor(fused_reflection=reflection == "fused")
+        observation.set_observation_budget(obs_budget)
+        if mock_llm:
+            from test.mock_llm import MockChatModel
+            get_llm_manager().add_model("mock", MockChatModel(), make_default=True)
+        elif not get_llm_manager().list_models():
+            setup_default_llms()
+        if llm_cache:
+            get_llm_manager().enable_cache()
+        mock_server = None
+        get_screenshot_service().config.policy = screenshot_policy
+        if mock_site:
+            from test.mock_site import start_mock_site, stop_mock_site
+            mock_server = start_mock_site()
+        self.block_requests = block_requests
+        self.har_mode = har_mode
+        self.har_dir = har_dir
+        await self.setup_browser(headless=headless, block_requests=block_requests, resource_cache=resource_cache)
         
         # 테스트 설정 로드
         print(f"📂 테스트 파일 로드: {test_file}")
@@ -242,54 +423,127 @@ class AgentQTestRunner:
         if not test_results_id:
             test_results_id = f"agentq_test_{int(time.time())}"
         
-        # 테스트 범위 설정
+        # 테스트 범위/샤드 설정
         max_task_index = max_task_index or len(test_configurations)
-        total_tests = max_task_index - min_task_index
+        selected = [
+            (index, task_config)
+            for position, (index, task_config) in enumerate(
+                enumerate(test_configurations[min_task_index:max_task_index], start=min_task_index)
+            )
+            if position % num_shards == shard_index
+        ]
+        shard_ids = [str(task_config.get("task_id")) for _, task_config in selected]
+        previous_results = load_task_results(test_results_id) if resume else {}
+        if previous_results:
+            selected = [(i, c) for i, c in selected if str(c.get("task_id")) not in previous_results]
+            print(f"⏭️ 이전 결과가 있는 {len(shard_ids) - len(selected)}개 태스크 건너뜀 (resume)")
+        total_tests = len(selected)
+        
+        print(f"📊 총 {total_tests}개 태스크 실행 예정 (인덱스 {min_task_index}~{max_task_index-1}"
+              + (f", 샤드 {shard_index + 1}/{num_shards}" if num_shards > 1 else "") + ")")
         
-        print(f"📊 총 {total_tests}개 태스크 실행 예정 (인덱스 {min_task_index}~{max_task_index-1})")
+        # 평가가 끝날 때마다 태스크 결과를 JSONL로 기록
+        os.makedirs(shard_results_dir(test_results_id), exist_ok=True)
+        self.results_jsonl = os.path.join(shard_results_dir(test_results_id), f"shard_{shard_index}.jsonl")
+        print(f"📝 태스크별 결과 기록: {self.results_jsonl}")
+        self.trajectory_store = TrajectoryStore(test_results_id)
         
         test_results = []
+        # 직전 태스크의 평가 (다음 태스크 실행과 겹쳐 진행)
+        pending_evaluation: Optional[Tuple[asyncio.Task, Dict[str, Any], int]] = None
+        # 이 실행에서만 선행 로드를 켜고 끝나면 원래 설정으로 되돌림
+        previous_nav_prefetch = nodes.ENABLE_NAV_PREFETCH
+        nodes.ENABLE_NAV_PREFETCH = previous_nav_prefetch or nav_prefetch
         
         try:
-            for index, task_config in enumerate(
-                test_configurations[min_task_index:max_task_index], 
-                start=min_task_index
-            ):
+            for position, (index, task_config) in enumerate(selected, start=1):
                 task_id = str(task_config.get("task_id"))
                 
                 # 로그 폴더 생성
                 log_folders = self.create_task_log_folders(task_id, test_results_id)
+                get_screenshot_service().output_dir = log_folders["task_screenshots_folder"]
                 
                 print(f"\n{'='*60}")
-                print(f"📋 태스크 {index + 1}/{total_tests} (ID: {task_id})")
+                print(f"📋 태스크 {position}/{total_tests} (인덱스 {index}, ID: {task_id})")
                 
                 # 태스크 실행
-                task_result = await self.execute_single_task(
+                task_result, snapshot = await self.run_single_task(
                     task_config, 
                     log_folders["task_log_folder"]
                 )
-                
                 test_results.append(task_result)
-                self.print_task_result(task_result, index + 1, total_tests)
+
+                # 이 태스크의 평가를 백그라운드로 시작하고, 직전 태스크 평가 결과를 출력
+                evaluation = asyncio.create_task(self.evaluate_task(
+                    task_config, task_result, snapshot, log_folders["task_screenshots_folder"]
+                ))
+                if pending_evaluation:
+                    await self._report_evaluation(*pending_evaluation, total_tests)
+                pending_evaluation = (evaluation, task_result, position)
                 
-                # 대기 시간
+                # 이전 태스크의 네트워크 활동이 잦아들 때까지 대기 (최대 wait_time초)
                 if wait_time > 0:
-                    await asyncio.sleep(wait_time)
+                    await wait_for_network_idle(self.page, timeout_s=wait_time)
+
+            if pending_evaluation:
+                await self._report_evaluation(*pending_evaluation, total_tests)
+                pending_evaluation = None
         
         finally:
+            nodes.ENABLE_NAV_PREFETCH = previous_nav_prefetch
+            # 중단된 경우에도 브라우저를 닫기 전에 진행 중인 평가를 마무리
+            if pending_evaluation:
+                await asyncio.gather(pending_evaluation[0], return_exceptions=True)
             # 정리
+            get_wait_timeouts().save()
+            await get_screenshot_service().close()
             await self.cleanup_browser()
+            if mock_server:
+                stop_mock_site(mock_server)
+        
+        print(f"🧾 궤적 {self.trajectory_store.rows_written}행 저장: {self.trajectory_store.run_dir} "
+              f"(python -m agentq.trajectory_store {test_results_id})")
+        
+        # resume으로 건너뛴 태스크 결과까지 합쳐 이 샤드 전체 기준으로 요약
+        if previous_results:
+            merged = {**previous_results, **{str(r["task_id"]): r for r in test_results}}
+            test_results = [merged[i] for i in shard_ids if i in merged]
         
         # 결과 요약
-        self.print_summary(test_results, total_tests)
+        self.print_summary(test_results, len(test_results))
         
-        # 결과 저장
-        self.save_test_results(test_results, test_results_id)
+        # 결과 저장 (샤드 워커는 서로 덮어쓰지 않도록 샤드별 파일, 전체 결과는 merge_shard_results가 저장)
+        self.save_test_results(
+            test_results,
+            test_results_id if num_shards == 1 else f"{test_results_id}_shard_{shard_index}"
+        )
         
         return test_results
     
+    def merge_shard_results(self, test_results_id: str, task_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """샤드별 JSONL을 합쳐 요약 출력 및 저장 (task_ids 순서로 정렬, 없으면 기록된 순서)"""
+        results = load_task_results(test_results_id)
+        if task_ids is not None:
+            test_results = [results[i] for i in task_ids if i in results]
+            missing = [i for i in task_ids if i not in results]
+            if missing:
+                print(f"⚠️ 결과가 없는 태스크 {len(missing)}개: {', '.join(missing[:10])}{' ...' if len(missing) > 10 else ''}")
+        else:
+            test_results = list(results.values())
+        if not test_results:
+            print("⚠️ 합칠 결과가 없습니다.")
+            return []
+        self.print_summary(test_results, len(test_results))
+        self.save_test_results(test_results, test_results_id)
+        return test_results
+
     def print_summary(self, test_results: List[Dict[str, Any]], total_tests: int):
         """결과 요약 출력"""
+        if total_tests == 0:
+            # 태스크 수보다 샤드가 많으면 빈 샤드가 생김
+            print(f"\n{'='*60}")
+            print("📊 실행한 태스크가 없습니다.")
+            return
         passed_tests = [r for r in test_results if r["score"] == 1]
         failed_tests = [r for r in test_results if 0 <= r["score"] < 1]
         skipped_tests = [r for r in test_results if r["score"] < 0]
@@ -316,6 +570,103 @@ class AgentQTestRunner:
             print(f"\n⏱️ 평균 실행 시간: {avg_time:.2f}초")
             print(f"⏱️ 총 실행 시간: {total_time:.2f}초")
             print(f"🔄 평균 루프 횟수: {avg_loops:.1f}회")
+            if total_time > 0:
+                total_loops = sum(r["loop_count"] for r in test_results)
+                print(f"🔁 처리량: {total_loops / total_time:.2f} loops/sec")
+            eval_times = [r["eval_s"] for r in test_results if "eval_s" in r]
+            if eval_times:
+                print(f"🧮 평균 평가 시간: {sum(eval_times) / len(eval_times):.2f}초 (스냅샷에서 다음 태스크 실행과 겹쳐 진행)")
+            self.print_llm_call_summary()
+            cache = get_llm_manager().cache
+            if cache:
+                stats = cache.summary()
+                print(f"🗄️ LLM 캐시: 적중 {stats['hits']}회 / 미스 {stats['misses']}회 ({stats['hit_rate']*100:.1f}%), "
+                      f"절감 {stats['saved_s']:.1f}초, 제거 {stats['evictions']}건, {stats['size_mb']:.1f}MB")
+            self.print_resource_cache_summary(test_results)
+            shots = get_screenshot_service().summary()
+            if shots["captured"]:
+                print(f"📸 스크린샷 {shots['captured']}장 (평균 {shots['avg_kb']:.0f}KB, 캡처 {shots['avg_capture_s']:.3f}초, 건너뜀 {shots['skipped']})")
+            self.print_loop_latency_summary(test_results)
+            self.print_span_summary(test_results)
+
+    def print_resource_cache_summary(self, test_results: List[Dict[str, Any]]):
+        """태스크별 리소스 캐시 통계 합계 (샤드 결과를 합쳐도 태스크 결과 기준으로 계산)"""
+        per_task = [r["resource_cache"] for r in test_results if r.get("resource_cache")]
+        if not per_task:
+            return
+        served = sum(c["hits"] + c["revalidated"] for c in per_task)
+        misses = sum(c["misses"] for c in per_task)
+        avoided = sum(c["bytes_avoided"] for c in per_task)
+        ratio = served / (served + misses) * 100 if served + misses else 0.0
+        print(f"📦 리소스 캐시: 적중 {served}건 / 미스 {misses}건 ({ratio:.1f}%), "
+              f"{avoided / 1024 / 1024:.1f}MB 절감 (태스크당 평균 {avoided / len(per_task) / 1024:.0f}KB)")
+
+    def print_loop_latency_summary(self, test_results: List[Dict[str, Any]]):
+        """루프당 지연과 DOM 선행 추출/critic 병렬화로 줄어든 시간 출력"""
+        loops = [m for r in test_results for m in r.get("loop_metrics", []) if "loop_s" in m]
+        if not loops:
+            return
+
+        def avg(key: str) -> float:
+            return sum(m.get(key, 0.0) for m in loops) / len(loops)
+
+        dom_saved = avg("dom_overlap_saved_s")
+        critic_saved = sum(m.get("critic_serial_s", 0.0) - m.get("critic_s", 0.0) for m in loops) / len(loops)
+        loop_latency = avg("loop_s")
+        # 절감분이 없었다면 걸렸을 루프 지연 대비 감소율
+        baseline = loop_latency + dom_saved + critic_saved
+        reduction = (dom_saved + critic_saved) / baseline * 100 if baseline else 0.0
+
+        latency_table = [
+            ["항목", "루프당 평균(초)"],
+            ["루프 지연", f"{loop_latency:.2f}"],
+            ["DOM 대기", f"{avg('dom_wait_s'):.2f}"],
+            ["후보 생성 LLM", f"{avg('thought_llm_s'):.2f}"],
+            ["Critic", f"{avg('critic_s'):.2f}"],
+            ["액션 후 LLM (설명/평가)", f"{avg('post_action_llm_s'):.2f}"],
+            ["페이지 개요 토큰", f"{avg('obs_tokens'):.0f}"],
+            ["DOM 선행 추출 절감", f"{dom_saved:.2f}"],
+            ["Critic 병렬화 절감", f"{critic_saved:.2f}"],
+        ]
+        print("\n" + tabulate(latency_table, headers="firstrow", tablefmt="grid"))
+        print(f"⚡ 루프당 지연 감소: {reduction:.1f}% ({len(loops)}개 루프 기준)")
+
+        prefetched = [m for m in loops if m.get("prefetch_started")]
+        if prefetched:
+            hits = int(sum(m.get("prefetch_hit", 0) for m in prefetched))
+            wasted = int(sum(m.get("prefetch_wasted", 0) for m in prefetched))
+            saved = sum(m.get("prefetch_saved_s", 0.0) for m in prefetched)
+            print(f"🔮 이동 선행 로드: {len(prefetched)}개 루프, 적중 {hits}회 ({hits / len(prefetched) * 100:.1f}%), "
+                  f"낭비된 로드 {wasted}건, 절감 {saved:.1f}초")
+    
+    def print_span_summary(self, test_results: List[Dict[str, Any]]):
+        """스팬별 총 시간, 루프당 평균, 전체 실행 시간 대비 비율, 토큰 사용량 출력 (중첩 스팬은 부모에도 포함됨)"""
+        spans = merge_span_summaries(r.get("spans", {}) for r in test_results)
+        if not spans:
+            return
+        total_time = sum(r["tct"] for r in test_results) or 1.0
+        total_loops = sum(r["loop_count"] for r in test_results) or 1
+        table = [["스팬", "횟수", "총 시간(초)", "루프당(초)", "비율", "입력 토큰", "출력 토큰"]]
+        for name, s in sorted(spans.items(), key=lambda item: item[1]["total_s"], reverse=True):
+            table.append([
+                name, s["count"], f"{s['total_s']:.2f}", f"{s['total_s'] / total_loops:.2f}",
+                f"{s['total_s'] / total_time * 100:.1f}%", s["input_tokens"], s["output_tokens"]
+            ])
+        print("\n" + tabulate(table, headers="firstrow", tablefmt="grid"))
+
+    def print_llm_call_summary(self):
+        """모델별 호출 수, 병합/재시도 횟수, 대기열 대기 시간과 모델 응답 시간 출력"""
+        metrics = get_llm_manager().metrics
+        if not metrics:
+            return
+        table = [["모델", "호출", "병합", "재시도", "실패", "평균 대기(초)", "평균 응답(초)"]]
+        for name, m in metrics.items():
+            calls = m["calls"] or 1
+            table.append([
+                name, m["calls"], m["coalesced"], m["retries"], m["failures"],
+                f"{m['queue_wait_s'] / calls:.2f}", f"{m['model_s'] / calls:.2f}"
+            ])
+        print("\n" + tabulate(table, headers="firstrow", tablefmt="grid"))
     
     def save_test_results(self, test_results: List[Dict[str, Any]], test_results_id: str):
         """테스트 결과 저장"""
@@ -0,0 +1,224 @@
+"""
+커맨드 문법(agentq/command_grammar.py) 퍼즈 코퍼스 검사와 처리량 벤치마크
+정상 커맨드 코퍼스에 대소문자/공백/괄호/잘림/문자 삽입 변형을 가해 만든 입력에 대해
+컴파일된 문법이 기존 re.match 연쇄(아래에 그대로 보관)와 같은 액션 dict를 내는지,
+해석하지 못한 커맨드에는 범위 안의 오류 위치가 붙는지 확인하고 두 구현의 처리량을 비교합니다.
+
+pytest로 수집되는 테스트가 아니라 문법을 고칠 때 직접 돌리는 수동 검사/벤치 스크립트이며,
+불일치가 하나라도 있으면 종료 코드 1로 끝납니다.
+
+사용법: python -m test.command_grammar_bench [--cases 20000] [--seed 0] [--rounds 5]
+"""
+
+import argparse
+import random
+import sys
+import time
+from typing import List
+
+from agentq.command_grammar import parse_command, parse_commands
+
+# 실제 LLM 출력에서 보이는 형태 위주의 정상 커맨드
+CORPUS = [
+    "GOTO [URL=https://www.opentable.com]", "GOTO [URL=<https://example.com/a?b=c>]", "GO TO [URL=example.com]",
+    "NAVIGATE https://example.com/path", "NAVIGATE: https://example.com", "goto: www.google.com",
+    "SEARCH [TEXT=Cecconi's New York]", "SEARCH [best pizza (near me)]", "SEARCH: cheap flights to Paris.",
+    "SEARCH: python  asyncio # comment", "search [TEXT=  a   b  ]", "SEARCH [x] trailing",
+    "CLICK [ID=submit_search]", "CLICK [ID=ID=42]", "CLICK [=#login > a]", "CLICK [SELECTOR=button.primary]",
+    "CLICK: ID=17", "CLICK: a[href='/next']", "TYPE [ID=search_input] [TEXT=Cecconi's New York]",
+    "TYPE [ID=ID=5] [hello world]", "TYPE: ID=q || new york", "TYPE: #email || a@b.c", "SUBMIT [ID=form1]",
+    "CLEAR [ID=search_input]", "SCROLL [UP]", "SCROLL [down]", "SCROLL: up", "GET_DOM", "get dom", "GET-DOM",
+    "GETDOM", "SCREENSHOT", "SCREENSHOT [PATH=shot.png]", "WAIT: 3", "WAIT [SECONDS=10]",
+    "ASK USER HELP [TEXT=Which date?]", "ASKUSERHELP [TEXT=x]",
+    # 잘못된 커맨드
+    "CLICK", "CLICK [ID=5", "TYPE [ID=5]", "SCROLL [LEFT]", "WAIT: soon", "FOO [BAR]", "SUBMIT [5]",
+    "GOTO [URL=https://a b]", "ASK USER HELP", "SCREENSHOT [PATH=]", "", "   ", "]", "[ID=5]",
+]
+MUTATION_CHARS = "[]=:<>|#()., \t-_IDURLTEXTidurl0123456789ſK\n"
+
+
+def mutate(rng: random.Random, cmd: str) -> str:
+    """코퍼스 커맨드 하나에 무작위 변형 1~3개 적용"""
+    for _ in range(rng.randint(1, 3)):
+        op = rng.randrange(7)
+        i = rng.randint(0, len(cmd))
+        if op == 0:
+            cmd = cmd[:i] + rng.choice(MUTATION_CHARS) + cmd[i:]
+        elif op == 1 and cmd:
+            cmd = cmd[:i] + cmd[i + 1:]
+        elif op == 2:
+            cmd = cmd[:i]
+        elif op == 3:
+            cmd = "".join(ch.swapcase() if rng.random() < 0.3 else ch for ch in cmd)
+        elif op == 4:
+            cmd = " " * rng.randint(0, 3) + cmd + " " * rng.randint(0, 3)
+        elif op == 5:
+            cmd = cmd[:i] + " " * rng.randint(1, 3) + cmd[i:]
+        else:
+            cmd = cmd + rng.choice(CORPUS)
+    return cmd
+
+
+def build_cases(count: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    return list(CORPUS) + [mutate(rng, rng.choice(CORPUS)) for _ in range(count)]
+
+
+def check(cases: List[str]) -> int:
+    """기존 구현과 다른 결과 수 (오류 위치가 범위를 벗어나도 실패로 셈)"""
+    failures = 0
+    for cmd, parsed in zip(cases, parse_commands(cases)):
+        expected = legacy_parse_command_line(cmd)
+        if parsed.action != expected:
+            failures += 1
+            print(f"❌ 결과 불일치: {cmd!r}\n   기존: {expected}\n   문법: {parsed.action}")
+            continue
+        if expected is None and cmd.strip():
+            error = parsed.error
+            if not error or not (0 <= error.start < error.end <= len(cmd)) or not cmd[error.start:error.end].strip():
+                failures += 1
+                print(f"❌ 오류 위치 이상: {cmd!r} → {error}")
+    return failures
+
+
+def bench(cases: List[str], rounds: int):
+    for name, parse in (("기존 re.match 연쇄", legacy_parse_command_line), ("컴파일된 문법", lambda c: parse_command(c).action)):
+        best = float("inf")
+        for _ in range(rounds):
+            started = time.perf_counter()
+            for cmd in cases:
+                parse(cmd)
+            best = min(best, time.perf_counter() - started)
+        print(f"⏱️ {name}: {len(cases) / best:,.0f} 커맨드/초 ({best * 1000:.1f}ms / {len(cases)}개)")
+
+
+# 기존 prompt_utils.parse_command_line (동등성 기준으로 그대로 보관)
+def legacy_parse_command_line(cmd: str):
+    import re
+    if not cmd:
+        return None
+    c = cmd.strip()
+
+    # NAVIGATE / GOTO
+    m = re.match(r'^(?:GOTO|GO TO|NAVIGATE)\s*\[\s*URL\s*=\s*<([^>\]]+)>\s*\]\s*$', c, re.I)
+    if m:
+        return {"type": "NAVIGATE", "target": m.group(1).strip()}
+    # NAVIGATE / GOTO (tolerant forms without angle brackets)
+    m = re.match(r'^(?:GOTO|GO TO|NAVIGATE)\s*\[\s*URL\s*=\s*([^\]\s]+)\s*\]\s*$', c, re.I)
+    if m:
+        return {"type": "NAVIGATE", "target": m.group(1).strip()}
+    m = re.match(r'^(?:GOTO|GO TO|NAVIGATE)\s+(https?://\S+)\s*$', c, re.I)
+    if m:
+        return {"type": "NAVIGATE", "target": m.group(1).strip()}
+    m = re.match(r'^(?:NAVIGATE|GOTO)\s*:\s*(.+)$', c, re.I)
+    if m:
+        return {"type": "NAVIGATE", "target": m.group(1).strip()}
+
+    # SEARCH  (handles [TEXT=...] or "SEARCH: query")
+    m = re.match(
+        r'''^SEARCH\s*
+            (?:
+               \[\s*(?:TEXT\s*=\s*)?([^\]]+?)\s*\]      # bracket form
+              |
+               :\s*([^\n\r#]+?)\s*$                     # colon form to end-of-line
+            )''', c, re.I | re.X)
+    if m:
+        q = (m.group(1) or m.group(2) or "").strip()
+        # trim trailing parenthetical/period/comment tails
+        q = re.sub(r'\s*\(.*?\)\s*$', '', q)
+        q = re.sub(r'\s*[\.\)]\s*$', '', q)
+        q = re.sub(r'\s+#.*$', '', q)
+        q = re.sub(r'\s{2,}', ' ', q).strip()
+        return {"type": "SEARCH", "content": q}
+
+    # CLICK  (ID or selector)
+    m = re.match(r'^CLICK\s*\[\s*(?:ID|SELECTOR)?\s*=\s*([^\]]+)\s*\]\s*$', c, re.I)
+    if m:
+        tgt = m.group(1).strip()
+        # If target format is ID=foo or starts with ID=
+        id_match = re.match(r'^ID\s*=\s*(.+)$', tgt, re.I)
+        if id_match:
+            return {"type": "CLICK", "target": id_match.group(1).strip(), "by": "agentq-id"}
+        # otherwise treat as generic selector
+        return {"type": "CLICK", "target": tgt}
+    m = re.match(r'^CLICK\s*:\s*(.+)$', c, re.I)
+    if m:
+        tgt = m.group(1).strip()
+        id_match = re.match(r'^ID\s*=\s*(.+)$', tgt, re.I)
+        if id_match:
+            return {"type": "CLICK", "target": id_match.group(1).strip(), "by": "agentq-id"}
+        return {"type": "CLICK", "target": tgt}
+
+    # TYPE  ([ID][TEXT=...]  or  TYPE: selector || text)
+    m = re.match(r'^TYPE\s*\[\s*([^\]]+)\s*\]\s*\[\s*(?:TEXT\s*=\s*)?([^\]]+)\s*\]\s*$', c, re.I)
+    if m:
+        tgt = m.group(1).strip()
+        txt = m.group(2).strip()
+        id_match = re.match(r'^ID\s*=\s*(.+)$', tgt, re.I)
+        if id_match:
+            return {"type": "TYPE", "target": id_match.group(1).strip(), "content": txt, "by": "agentq-id"}
+        return {"type": "TYPE", "target": tgt, "content": txt}
+    m = re.match(r'^TYPE\s*:\s*(.+?)\s*\|\|\s*(.+)$', c, re.I)
+    if m:
+        tgt = m.group(1).strip()
+        txt = m.group(2).strip()
+        id_match = re.match(r'^ID\s*=\s*(.+)$', tgt, re.I)
+        if id_match:
+            return {"type": "TYPE", "target": id_match.group(1).strip(), "content": txt, "by": "agentq-id"}
+        return {"type": "TYPE", "target": tgt, "content": txt}
+
+    # SUBMIT / CLEAR
+    m = re.match(r'^SUBMIT\s*\[\s*ID\s*=\s*([^\]]+)\s*\]\s*$', c, re.I)
+    if m:
+        return {"type": "SUBMIT", "target": m.group(1).strip(), "by": "agentq-id"}
+    m = re.match(r'^CLEAR\s*\[\s*ID\s*=\s*([^\]]+)\s*\]\s*$', c, re.I)
+    if m:
+        return {"type": "CLEAR", "target": m.group(1).strip(), "by": "agentq-id"}
+
+    # SCROLL
+    m = re.match(r'^SCROLL\s*\[\s*(UP|DOWN)\s*\]\s*$', c, re.I)
+    if m:
+        return {"type": "SCROLL", "target": m.group(1).lower()}
+    m = re.match(r'^SCROLL\s*:\s*(up|down)\s*$', c, re.I)
+    if m:
+        return {"type": "SCROLL", "target": m.group(1).lower()}
+
+    # GET_DOM
+    if re.match(r'^(GET[_\s-]?DOM)\s*$', c, re.I):
+        return {"type": "GET_DOM"}
+
+    # SCREENSHOT [PATH=...]
+    m = re.match(r'^SCREENSHOT(?:\s*\[\s*PATH\s*=\s*([^\]]+)\s*\])?\s*$', c, re.I)
+    if m:
+        return {"type": "SCREENSHOT", "target": (m.group(1) or "screenshot.png").strip()}
+
+    # WAIT: seconds
+    m = re.match(r'^WAIT\s*:\s*(\d+)\s*$', c, re.I)
+    if m:
+        return {"type": "WAIT", "content": m.group(1).strip()}
+    m = re.match(r'^WAIT\s*\[\s*SECONDS\s*=\s*(\d+)\s*\]\s*$', c, re.I)
+    if m:
+        return {"type": "WAIT", "content": m.group(1).strip()}
+
+    # ASK USER HELP
+    m = re.match(r'^ASK\s*USER\s*HELP\s*\[\s*TEXT\s*=\s*(.+?)\s*\]\s*$', c, re.I)
+    if m:
+        return {"type": "ASK_USER_HELP", "content": m.group(1).strip()}
+
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="커맨드 문법 퍼즈 검사 및 벤치마크")
+    parser.add_argument("--cases", type=int, default=20000, help="변형 커맨드 수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rounds", type=int, default=5, help="벤치마크 반복 횟수 (최솟값 사용)")
+    args = parser.parse_args()
+
+    cases = build_cases(args.cases, args.seed)
+    failures = check(cases)
+    print(f"{'✅' if not failures else '❌'} 퍼즈 코퍼스 {len(cases)}개 중 불일치 {failures}개")
+    for sample in ("CLICK [ID=5", "SCROLL [LEFT]", "FOO [BAR]", "  WAIT: soon"):
+        print(parse_command(sample).error.render(sample))
+    bench(cases, args.rounds)
+    sys.exit(1 if failures else 0)
@@ -1,29 +1,89 @@
 """base class for evaluation"""
 
+import ast
+import asyncio
 import collections
 import html
-import time
+import inspect
+import logging
 import urllib
 import urllib.parse
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
-from playwright.sync_api import CDPSession, Page
+from playwright.async_api import CDPSession, Page
 from termcolor import colored
 
-from agentq.core.agent.eval_agent import EvalAgent
-from agentq.core.models.models import EvalAgentInput, EvalAgentOutput
-from agentq.core.skills.get_dom_with_content_type import get_dom_with_content_type
-from agentq.core.skills.get_screenshot import get_screenshot
-from agentq.core.skills.get_url import geturl
-from agentq.utils.logger import logger
+from agentq.waits import track_page, wait_for_network_idle
 from test.test_utils import (
+    GradingItem,
     clean_answer,
     evaluate_exact_match,
-    evaluate_fuzzy_match,
     evaluate_must_include,
-    evaluate_ua_match,
+    grade_answers,
 )
 
+logger = logging.getLogger(__name__)
+
+# program_html의 "func:" URL/로케이터에서 부를 수 있는 도우미 (임의 코드 eval 대신 등록된 이름만 허용)
+EVAL_HELPERS: Dict[str, Callable[..., Any]] = {}
+
+
+def register_eval_helper(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Registers a helper callable (sync or async) under its function name for "func:" expressions."""
+    EVAL_HELPERS[func.__name__] = func
+    return func
+
+
+async def call_eval_helper(expression: str, page: Any) -> Any:
+    """Evaluates a "name(arg, ...)" expression against the helper registry.
+
+    Arguments must be literals, except `__page__` (the evaluation page) and
+    `__last_url__` (bare or quoted, the page URL).
+
+    Raises:
+        ValueError: If the expression is not a call to a registered helper.
+    """
+    call = ast.parse(expression.strip(), mode="eval").body
+    if not isinstance(call, ast.Call) or not isinstance(call.func, ast.Name):
+        raise ValueError(f"Unsupported helper expression: {expression}")
+    helper = EVAL_HELPERS.get(call.func.id)
+    if helper is None:
+        raise ValueError(f"Unknown eval helper: {call.func.id}")
+
+    def resolve(node: ast.expr) -> Any:
+        if isinstance(node, ast.Name) and node.id == "__page__":
+            return page
+        if isinstance(node, ast.Name) and node.id == "__last_url__":
+            return page.url
+        value = ast.literal_eval(node)
+        return page.url if value == "__last_url__" else value
+
+    args = [resolve(node) for node in call.args]
+    kwargs = {kw.arg: resolve(kw.value) for kw in call.keywords}
+    result = helper(*args, **kwargs)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+class EvalSnapshot:
+    """State captured when a task ends, so evaluation can run off the live page.
+
+    Holds the last URL and the context storage state (cookies, local storage). Page-based
+    evaluators get a page restored from it in a separate context; URL/string evaluators only
+    read `url`, so the snapshot itself can be passed in place of a page.
+    """
+
+    def __init__(self, url: str, storage_state: Dict[str, Any], har_replayer: Any = None) -> None:
+        self.url = url
+        self.storage_state = storage_state
+        # 재생 모드에서는 태스크 당시의 HAR로 복원 (다음 태스크가 재생기를 바꾸기 전 참조를 잡아 둠)
+        self.har_replayer = har_replayer
+
+    @classmethod
+    async def capture(cls, page: Page, har_replayer: Any = None) -> "EvalSnapshot":
+        return cls(page.url, await page.context.storage_state(), har_replayer)
+
 
 class Evaluator:
     """Base class for evaluation strategies.
@@ -32,6 +92,9 @@ class Evaluator:
         eval_tag (str): A tag to identify or categorize the evaluator.
     """
 
+    # 페이지(DOM)가 필요한지 여부. False인 평가기는 EvalSnapshot(url)만으로 동작
+    requires_page: bool = True
+
     def __init__(self, eval_tag: str = "") -> None:
         """Initialize the evaluator with an optional evaluation tag."""
         self.eval_tag = eval_tag
@@ -48,6 +111,8 @@ class Evaluator:
 
 
 class StringEvaluator(Evaluator):
+    requires_page = False
+
     async def __call__(
         self,
         task_config: Dict[str, Any],
@@ -58,51 +123,76 @@ class StringEvaluator(Evaluator):
         last_action = answer or ""
         pred = clean_answer(last_action)
 
-        score = 1.0
+        # Scoring steps in config order, replayed once the LLM verdicts are known:
+        # ("mul", value) multiplies the score, ("fuzzy", i) multiplies in verdict i and
+        # ("ua", exact, i) multiplies in the exact "N/A" check and, if the running score
+        # is then not 1, replaces it with verdict i (the unbatched scoring rule).
+        steps: List[tuple] = []
+        fuzzy_items: List[GradingItem] = []
+        certainly_one = True
         for approach, value in task_config["eval"]["reference_answers"].items():
             if approach == "exact_match":
                 logger.info(
                     f"Evaluating exact_match for answer: PreDicted: {pred} , Reference: {value}"
                 )
-                score *= evaluate_exact_match(ref=value, pred=pred)
+                steps.append(("mul", evaluate_exact_match(ref=value, pred=pred)))
             elif approach == "must_include":
                 logger.info(
                     f'Evaluating must_include for answer: "{answer}" to see if it includes the expeced values: "{value}"\n'
                 )
                 assert isinstance(value, List)
                 for must_value in value:
-                    score *= evaluate_must_include(
+                    steps.append(("mul", evaluate_must_include(
                         ref=must_value,
                         pred=pred,
                         tokenize=(len(value) == 1),
-                    )
+                    )))
             elif approach == "some_matches":
                 min_required_matches = value.get("min_required", 1)
                 matches = sum(
                     evaluate_must_include(ref=phrase, pred=pred, tokenize=False)
                     for phrase in value["phrases"]
                 )
-                score *= float(matches >= min_required_matches)
+                steps.append(("mul", float(matches >= min_required_matches)))
             elif approach == "fuzzy_match":
                 logger.info(f"Evaluating fuzzy_match for answer: {answer}")
                 intent = task_config["intent"]
                 if value == "N/A":
-                    score *= evaluate_exact_match(ref=value, pred=pred)
-                    if score != 1:
-                        score = 1.0 * evaluate_ua_match(
-                            intent=task_config["intent"],
-                            ref=task_config["eval"]["string_note"],
-                            pred=pred,
+                    exact = evaluate_exact_match(ref=value, pred=pred)
+                    if certainly_one and exact == 1:
+                        # The running score stays 1, so the ua verdict would never be used
+                        steps.append(("mul", exact))
+                    else:
+                        steps.append(("ua", exact, len(fuzzy_items)))
+                        fuzzy_items.append(
+                            GradingItem("ua", pred, task_config["eval"]["string_note"], intent)
                         )
                 else:
                     logger.info(f"Evaluating generic for answer: {answer}")
                     assert isinstance(value, List)
                     for reference in value:
-                        score *= evaluate_fuzzy_match(
-                            ref=reference, pred=pred, intent=intent
-                        )
+                        steps.append(("fuzzy", len(fuzzy_items)))
+                        fuzzy_items.append(GradingItem("fuzzy", pred, reference, intent))
             else:
                 logger.info(f"Unknown approach value received: {approach}")
+            certainly_one = certainly_one and all(step[0] == "mul" and step[1] == 1 for step in steps)
+
+        # Without a ua step a deterministic 0 cannot be undone, so the LLM verdicts are not needed
+        if any(step[0] == "ua" for step in steps) or all(step[0] != "mul" or step[1] != 0 for step in steps):
+            verdicts = await grade_answers(fuzzy_items) if fuzzy_items else []
+        else:
+            return {"score": 0.0}
+
+        score = 1.0
+        for step in steps:
+            if step[0] == "mul":
+                score *= step[1]
+            elif step[0] == "fuzzy":
+                score *= verdicts[step[1]]
+            else:
+                score *= step[1]
+                if score != 1:
+                    score = 1.0 * verdicts[step[2]]
         return {"score": score}
 
 
@@ -112,6 +202,8 @@ class URLEvaluator(Evaluator):
     This includes checking if the base path of the URL and its query parameters match those specified in the reference URLs.
     """
 
+    requires_page = False
+
     async def __call__(
         self,
         task_config: Dict[str, Any],
@@ -196,6 +288,8 @@ class HTMLContentEvaluator(Evaluator):
     """Evaluates if specified HTML content or elements appear on the webpage.
 
     This involves navigating to URLs specified in the configuration and checking for the presence of HTML elements or content using various strategies.
+    Targets on other URLs are opened in a separate page of the same context, so the evaluation page
+    stays on the last URL for evaluators running concurrently.
     """
 
     async def __call__(
@@ -225,81 +319,89 @@ class HTMLContentEvaluator(Evaluator):
         for target in targets:
             target_url: str = target["url"]  # which url to check
             if target_url.startswith("func"):
-                func = target_url.split("func:")[1]
-                func = func.replace("__last_url__", page.url)
-                target_url = eval(func)
+                target_url = await call_eval_helper(target_url.split("func:")[1], page)
 
-            locator: str = target["locator"]  # js element locator
-
-            # navigate to that url
+            # navigate to that url (in its own page, leaving the evaluation page untouched)
             if target_url != "last":
-                page.goto(target_url)
-                time.sleep(3)
-
-            # empty, use the full page
-            if not locator.strip():
-                selected_element = page.content()
-            # use JS to select the element
-            elif (
-                locator.startswith("document.")
-                or locator.startswith("[...document.")
-                or locator.startswith("jsblock:")
-            ):
-                if "prep_actions" in target:
-                    try:
-                        for prep_action in target["prep_actions"]:
-                            page.evaluate(f"() => {prep_action}")
-                    except Exception:
-                        pass
+                target_page = await page.context.new_page()
+                track_page(target_page)
                 try:
-                    if locator.startswith("jsblock:"):
-                        locator = locator.split("jsblock:")[1]
+                    await target_page.goto(target_url)
+                    await wait_for_network_idle(target_page)
+                    score *= await self._score_target(target, target_page)
+                finally:
+                    await target_page.close()
+            else:
+                score *= await self._score_target(target, page)
+        return {"score": score}
 
-                    selected_element = str(await page.evaluate(f"() => {locator}"))
-                    if not selected_element:
-                        selected_element = ""
+    async def _score_target(self, target: Dict[str, Any], page: Page) -> float:
+        """Scores a single program_html target on the given page."""
+        score = 1.0
+        locator: str = target["locator"]  # js element locator
+
+        # empty, use the full page
+        if not locator.strip():
+            selected_element = await page.content()
+        # use JS to select the element
+        elif (
+            locator.startswith("document.")
+            or locator.startswith("[...document.")
+            or locator.startswith("jsblock:")
+        ):
+            if "prep_actions" in target:
+                try:
+                    for prep_action in target["prep_actions"]:
+                        await page.evaluate(f"() => {prep_action}")
                 except Exception:
-                    # the page is wrong, return empty
+                    pass
+            try:
+                if locator.startswith("jsblock:"):
+                    locator = locator.split("jsblock:")[1]
+
+                selected_element = str(await page.evaluate(f"() => {locator}"))
+                if not selected_element:
                     selected_element = ""
-            # run program to call API
-            elif locator.startswith("func:"):  # a helper function
-                func = locator.split("func:")[1]
-                func = func.replace("__page__", "page")
-                selected_element = eval(func)
-            else:
-                raise ValueError(f"Unknown locator: {locator}")
+            except Exception:
+                # the page is wrong, return empty
+                selected_element = ""
+        # run program to call API
+        elif locator.startswith("func:"):  # a helper function
+            selected_element = await call_eval_helper(locator.split("func:")[1], page)
+        else:
+            raise ValueError(f"Unknown locator: {locator}")
 
-            selected_element = html.unescape(selected_element)
+        selected_element = html.unescape(selected_element)
 
-            if "exact_match" in target["required_contents"]:
-                required_contents = target["required_contents"]["exact_match"]
-                cur_score = evaluate_exact_match(
-                    ref=required_contents, pred=selected_element
+        if "exact_match" in target["required_contents"]:
+            required_contents = target["required_contents"]["exact_match"]
+            cur_score = evaluate_exact_match(
+                ref=required_contents, pred=selected_element
+            )
+            score *= float(cur_score)
+            # logger.info(f"[exact match] {cur_score}, selected element: {selected_element}, required contents: {required_contents}")
+        elif "must_include" in target["required_contents"]:
+            required_contents = target["required_contents"]["must_include"]
+            assert isinstance(required_contents, List)
+            for content in required_contents:  # type: ignore
+                content_or = content.split(" |OR| ")  # type: ignore
+                cur_score = any(
+                    [
+                        evaluate_must_include(
+                            ref=content,  # type: ignore
+                            pred=selected_element,
+                            tokenize=False,
+                        )
+                        for content in content_or  # type: ignore
+                    ]
                 )
                 score *= float(cur_score)
-                # logger.info(f"[exact match] {cur_score}, selected element: {selected_element}, required contents: {required_contents}")
-            elif "must_include" in target["required_contents"]:
-                required_contents = target["required_contents"]["must_include"]
-                assert isinstance(required_contents, List)
-                for content in required_contents:  # type: ignore
-                    content_or = content.split(" |OR| ")  # type: ignore
-                    cur_score = any(
-                        [
-                            evaluate_must_include(
-                                ref=content,  # type: ignore
-                                pred=selected_element,
-                                tokenize=False,
-                            )
-                            for content in content_or  # type: ignore
-                        ]
-                    )
-                    score *= float(cur_score)
-                    # logger.info(f"[must include] {cur_score}, selected element: {selected_element}, required contents: {content_or}")
-            else:
-                raise ValueError(
-                    f"Unknown required_contents: {target['required_contents'].keys()}"
-                )
-        return {"score": score}
+                # logger.info(f"[must include] {cur_score}, selected element: {selected_element}, required contents: {content_or}")
+        else:
+            raise ValueError(
+                f"Unknown required_contents: {target['required_contents'].keys()}"
+            )
+        return score
 
 
 class ManualContentEvaluator(Evaluator):
@@ -347,7 +449,9 @@ class ManualContentEvaluator(Evaluator):
         elif answer_type.strip().lower() == "golden":
             print(colored("Golden answer (reference): ", "yellow") + reference_answer)
 
-        user_response = input(
+        # 입력 대기 중에도 다른 태스크 실행/평가가 진행되도록 스레드에서 받음
+        user_response = await asyncio.to_thread(
+            input,
             colored(
                 "Annotate the task as Pass, Fail or Skip (please use Skip sparingly)? ",
                 "magenta",
@@ -369,7 +473,7 @@ class ManualContentEvaluator(Evaluator):
         reason: Optional[str] = None
 
         if eval_response["score"] <= 0:
-            reason = input("Reason for rating: ")
+            reason = await asyncio.to_thread(input, "Reason for rating: ")
             eval_response["reason"] = reason
 
         return eval_response
@@ -380,6 +484,9 @@ class LLMEvaluator(Evaluator):
 
     def __init__(self):
         super().__init__()
+        # 평가 에이전트는 llm_eval 태스크에서만 필요하므로 다른 평가기 사용 시 의존성을 요구하지 않음
+        from agentq.core.agent.eval_agent import EvalAgent
+
         self.eval_agent = EvalAgent()
 
     async def __call__(
@@ -389,6 +496,11 @@ class LLMEvaluator(Evaluator):
         client: Optional[CDPSession] = None,
         answer: Optional[str] = None,
     ) -> Dict[str, Union[float, str]]:
+        from agentq.core.models.models import EvalAgentInput, EvalAgentOutput
+        from agentq.core.skills.get_dom_with_content_type import get_dom_with_content_type
+        from agentq.core.skills.get_screenshot import get_screenshot
+        from agentq.core.skills.get_url import geturl
+
         # Get current page URL and DOM content
         current_url = await geturl(webpage=page)
         dom_content = await get_dom_with_content_type(
@@ -432,6 +544,11 @@ class EvaluatorComb(Evaluator):
         """
         self.evaluators = evaluators
 
+    @property
+    def requires_page(self) -> bool:
+        """True if any included evaluator needs a live page rather than just the last URL."""
+        return any(evaluator.requires_page for evaluator in self.evaluators)
+
     async def __call__(
         self,
         task_config: Dict[str, Any],
@@ -452,8 +569,11 @@ class EvaluatorComb(Evaluator):
         """
         score: float = 1.0
         reason: str | None = None
-        for evaluator in self.evaluators:
-            eval_result = await evaluator(task_config, page, client, answer)
+        # evaluators are independent (HTML targets on other URLs use their own page), so run them concurrently
+        eval_results = await asyncio.gather(
+            *[evaluator(task_config, page, client, answer) for evaluator in self.evaluators]
+        )
+        for eval_result in eval_results:
             score: float = score * eval_result["score"]  # type: ignore
             if "reason" in eval_result:
                 if reason is None:
@@ -0,0 +1,144 @@
+"""
+네트워크 없이 에이전트 루프를 돌리기 위한 스크립트형 목업 LLM
+프롬프트의 Objective / Current URL만 보고 목업 예약 사이트(test/mock_site.py)의
+정해진 경로를 따라가는 커맨드를 만들어, 루프 처리량(loops/sec)과 성공률을 LLM 지연 없이 측정합니다.
+"""
+
+import re
+from typing import Any, List, Optional, Type
+from urllib.parse import parse_qs, urlsplit
+
+from langchain_core.messages import AIMessage, BaseMessage
+from pydantic import BaseModel
+
+from agentq.nodes import CriticScore
+from test.mock_site import DEFAULT_COVERS, RESTAURANTS
+
+# 후보 목록을 채우는 방해 커맨드 (critic 랭킹 경로도 함께 측정)
+DISTRACTOR_COMMANDS = ["GET_DOM", "SCROLL [DOWN]"]
+CONFIRMATION_NOTE = "The reservation form was submitted and the confirmation page is shown."
+
+
+def _field(prompt: str, name: str) -> str:
+    m = re.search(rf"{name}:\s*(.+)", prompt)
+    return m.group(1).strip() if m else ""
+
+
+def _wanted_restaurant(objective: str) -> Optional[dict]:
+    text = objective.lower()
+    return next((r for r in RESTAURANTS if r["name"].lower() in text), None)
+
+
+def _wanted_covers(objective: str) -> int:
+    m = re.search(r"(?:party of|table for)\s+(\d+)|(\d+)\s+(?:people|guests|persons)", objective, re.I)
+    return int(m.group(1) or m.group(2)) if m else DEFAULT_COVERS
+
+
+def _wanted_slot(objective: str) -> str:
+    """'7:30 PM', '8 pm', '19:30' 형태의 시간을 슬롯 id 접미사(1930)로 변환 (없으면 19:00)"""
+    m = re.search(r"\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b", objective, re.I) or re.search(r"\b(\d{1,2}):(\d{2})()\b", objective)
+    if not m:
+        return "1900"
+    hour, minute, meridiem = int(m.group(1)), m.group(2) or "00", (m.group(3) or "").lower()
+    if meridiem == "pm" and hour < 12:
+        hour += 12
+    return f"{hour:02d}{minute}"
+
+
+def _explain(prompt: str) -> str:
+    """직전 액션 결과 설명 (예약 완료 버튼 클릭이 성공했으면 확인 문구)"""
+    action, observation = _field(prompt, "Action taken"), _field(prompt, "Observation")
+    if "#complete-reservation" in action and "성공" in observation:
+        return CONFIRMATION_NOTE
+    return f"Executed {action}: {observation}"
+
+
+def next_command(objective: str, current_url: str) -> str:
+    """목업 사이트에서 목표를 향한 다음 커맨드 (URL만으로 진행 단계를 판단)"""
+    url = urlsplit(current_url if current_url.startswith("http") else "")
+    parts = [p for p in url.path.split("/") if p]
+    params = parse_qs(url.query)
+    restaurant = _wanted_restaurant(objective)
+
+    if parts == ["confirmation"]:
+        return "GET_DOM"
+    if parts[:1] == ["booking"]:
+        return "CLICK [SELECTOR=#complete-reservation]"
+    if parts[:1] == ["r"]:
+        covers = _wanted_covers(objective)
+        if int((params.get("covers") or [DEFAULT_COVERS])[0]) != covers:
+            return f"CLICK [SELECTOR=#party-{covers}]"
+        return f"CLICK [SELECTOR=#slot-{_wanted_slot(objective)}]"
+    if parts == ["search"] and restaurant:
+        return f"CLICK [SELECTOR=#restaurant-{restaurant['slug']}]"
+    return f"SEARCH [TEXT={restaurant['name'] if restaurant else objective}]"
+
+
+class _StructuredMock:
+    """with_structured_output()이 돌려주는 러너블"""
+
+    def __init__(self, llm: "MockChatModel", schema: Type[BaseModel]):
+        self.llm = llm
+        self.schema = schema
+
+    async def ainvoke(self, messages: List[BaseMessage], **kwargs) -> BaseModel:
+        self.llm.calls += 1
+        prompt = "\n".join(str(m.content) for m in messages)
+        objective, url = _field(prompt, "Objective"), _field(prompt, "Current URL")
+        best = next_command(objective, url)
+        fields = self.schema.model_fields
+
+        if "commands" in fields:
+            commands = [best] + [c for c in DISTRACTOR_COMMANDS if c != best]
+            return self.schema(
+                plan="Search the restaurant, open it, pick party size and time, complete the reservation.",
+                thought=f"On {url or 'the start page'}, the next step is {best}.",
+                commands=commands,
+                status="CONTINUE",
+            )
+        if "scores" in fields:
+            # 사용자 메시지에 나열된 후보만 채점 (critic 부분집합 병렬화와 같은 계약)
+            candidates = re.findall(r"^\s*-\s*(.+)$", str(messages[-1].content), re.M)
+            return self.schema(scores=[
+                CriticScore(cmd=c.strip(), score=0.9 if c.strip() == best else 0.1, rationale="scripted")
+                for c in candidates
+            ])
+        if "done" in fields:
+            # fused reflect 노드: 설명과 완료 판단을 한 번에
+            explanation = _explain(prompt)
+            done = explanation == CONFIRMATION_NOTE
+            return self.schema(
+                explanation=explanation,
+                done=done,
+                rationale="confirmation page reached" if done else "reservation not submitted yet",
+            )
+        raise ValueError(f"목업 LLM이 지원하지 않는 스키마: {self.schema.__name__}")
+
+
+class MockChatModel:
+    """LLMManager에 등록해 쓰는 목업 채팅 모델 (ainvoke / with_structured_output 지원)"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
+        self.calls += 1
+        prompt = "\n".join(str(m.content) for m in messages)
+        if "step-by-step plan" in prompt:
+            content = "1. Search the restaurant\n2. Open it and pick party size and time\n3. Complete the reservation"
+        elif "interpret web interaction results" in prompt:
+            content = _explain(prompt)
+        elif "running summary" in prompt:
+            entries = re.findall(r"^- \[(\w+)-\d+\]", str(messages[-1].content), re.M)
+            content = f"Earlier steps: {', '.join(entries)}."
+        elif "evaluates task completion" in prompt:
+            content = "COMPLETE" if CONFIRMATION_NOTE in prompt else "CONTINUE"
+        else:
+            content = "OK"
+        return AIMessage(content=content)
+
+    def with_structured_output(self, schema: Type[BaseModel], **kwargs) -> _StructuredMock:
+        return _StructuredMock(self, schema)
+
+    def bind(self, **kwargs: Any) -> "MockChatModel":
+        return self
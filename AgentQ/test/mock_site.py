@@ -0,0 +1,213 @@
+"""
+OpenTable 흐름을 흉내 낸 로컬 예약 사이트 (에이전트 루프 벤치마크용)
+홈(검색) → 검색 결과 → 레스토랑 상세(인원/시간 선택) → 예약 폼 → 예약 확인
+
+표준 라이브러리 http.server만 사용하며, 요소에 고정 id와 OpenTable과 같은
+data-test 속성을 달아 web_selectors.OPENTABLE 선택자로도 다룰 수 있습니다.
+"""
+
+import html
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+MOCK_SITE_HOST = "127.0.0.1"
+MOCK_SITE_PORT = int(os.getenv("AGENTQ_MOCK_SITE_PORT", "8765"))
+
+RESTAURANTS: List[Dict[str, str]] = [
+    {"slug": "cote-korean-steakhouse", "name": "Cote Korean Steakhouse", "cuisine": "Korean Steakhouse", "area": "Flatiron", "rating": "4.8"},
+    {"slug": "le-bernardin", "name": "Le Bernardin", "cuisine": "French Seafood", "area": "Midtown West", "rating": "4.9"},
+    {"slug": "carbone", "name": "Carbone", "cuisine": "Italian", "area": "Greenwich Village", "rating": "4.7"},
+    {"slug": "sushi-nakazawa", "name": "Sushi Nakazawa", "cuisine": "Sushi", "area": "West Village", "rating": "4.8"},
+    {"slug": "the-smith", "name": "The Smith", "cuisine": "American Brasserie", "area": "East Village", "rating": "4.5"},
+    {"slug": "olmsted", "name": "Olmsted", "cuisine": "American", "area": "Prospect Heights", "rating": "4.6"},
+]
+TIME_SLOTS = ["17:30", "18:00", "18:30", "19:00", "19:30", "20:00", "21:00"]
+PARTY_SIZES = [1, 2, 3, 4, 5, 6]
+DEFAULT_COVERS = 2
+
+# 로그인한 회원처럼 예약 폼을 미리 채워 둠 (OpenTable 로그인 상태와 동일한 흐름)
+GUEST_PROFILE = {"first_name": "Alex", "last_name": "Kim", "email": "alex.kim@example.com", "phone": "555-0100"}
+
+
+def find_restaurant(slug: str) -> Optional[Dict[str, str]]:
+    return next((r for r in RESTAURANTS if r["slug"] == slug), None)
+
+
+def search_restaurants(query: str) -> List[Dict[str, str]]:
+    words = query.lower().split()
+    if not words:
+        return list(RESTAURANTS)
+    return [
+        r for r in RESTAURANTS
+        if all(w in f"{r['name']} {r['cuisine']} {r['area']}".lower() for w in words)
+    ]
+
+
+def _layout(title: str, body: str) -> str:
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>{html.escape(title)} - MockTable</title></head>
+<body>
+<header><a id="home-link" href="/">MockTable</a></header>
+<main id="main">
+{body}
+</main>
+</body>
+</html>"""
+
+
+def _query(params: Dict[str, List[str]], key: str, default: str = "") -> str:
+    return (params.get(key) or [default])[0]
+
+
+def _covers(params: Dict[str, List[str]]) -> int:
+    try:
+        return int(_query(params, "covers", str(DEFAULT_COVERS)))
+    except ValueError:
+        return DEFAULT_COVERS
+
+
+def render_home(params: Dict[str, List[str]]) -> str:
+    options = "".join(
+        f'<option value="{n}"{" selected" if n == DEFAULT_COVERS else ""}>{n} people</option>' for n in PARTY_SIZES
+    )
+    return _layout("Find your table", f"""
+<h1>Find your table for any occasion</h1>
+<form id="search-form" action="/search" method="get" role="search">
+  <input id="search-input" name="q" type="search" placeholder="Search restaurant, cuisine or location" data-test="typeahead-input">
+  <select id="party-size" name="covers" data-test="party-size-select">{options}</select>
+  <button id="search-button" type="submit" data-test="submit-search">Let's go</button>
+</form>""")
+
+
+def render_search(params: Dict[str, List[str]]) -> str:
+    query = _query(params, "q")
+    covers = _covers(params)
+    results = search_restaurants(query)
+    cards = "\n".join(
+        f"""<li class="restaurant" data-test="restaurant-card">
+  <a id="restaurant-{r['slug']}" href="/r/{r['slug']}?covers={covers}">{html.escape(r['name'])}</a>
+  <span class="cuisine">{html.escape(r['cuisine'])}</span> · <span class="area">{html.escape(r['area'])}</span> · <span class="rating">{r['rating']}</span>
+</li>"""
+        for r in results
+    )
+    return _layout(f"Results for {query}", f"""
+<h1>{len(results)} restaurants matching "{html.escape(query)}"</h1>
+<ul id="results">
+{cards or '<li id="no-results">No restaurants found</li>'}
+</ul>""")
+
+
+def render_detail(slug: str, params: Dict[str, List[str]]) -> Optional[str]:
+    restaurant = find_restaurant(slug)
+    if not restaurant:
+        return None
+    covers = _covers(params)
+    current = ' aria-current="true"'
+    party = " ".join(
+        f'<a id="party-{n}" href="/r/{slug}?covers={n}"{current if n == covers else ""}>{n}</a>'
+        for n in PARTY_SIZES
+    )
+    slots = " ".join(
+        f'<a id="slot-{t.replace(":", "")}" class="slot" data-test="book-button" '
+        f'href="/booking/{slug}?{urlencode({"time": t, "covers": covers})}">{t}</a>'
+        for t in TIME_SLOTS
+    )
+    return _layout(restaurant["name"], f"""
+<h1 id="restaurant-name">{html.escape(restaurant['name'])}</h1>
+<p>{html.escape(restaurant['cuisine'])} · {html.escape(restaurant['area'])} · Rating {restaurant['rating']}</p>
+<section id="party-size-picker"><h2>Party size: <span id="selected-covers">{covers}</span></h2>{party}</section>
+<section id="time-slots"><h2>Select a time</h2>{slots}</section>""")
+
+
+def render_booking(slug: str, params: Dict[str, List[str]]) -> Optional[str]:
+    restaurant = find_restaurant(slug)
+    if not restaurant:
+        return None
+    time_slot = _query(params, "time", TIME_SLOTS[0])
+    covers = _covers(params)
+    fields = "\n".join(
+        f'<label>{key.replace("_", " ").title()} <input id="{key.replace("_", "-")}" name="{key}" value="{html.escape(value)}" required></label>'
+        for key, value in GUEST_PROFILE.items()
+    )
+    return _layout(f"Complete your reservation at {restaurant['name']}", f"""
+<h1>You're almost done!</h1>
+<p id="booking-summary">{html.escape(restaurant['name'])} · {time_slot} · {covers} people</p>
+<form id="reservation-form" action="/confirmation" method="get">
+  <input type="hidden" name="restaurant" value="{slug}">
+  <input type="hidden" name="time" value="{html.escape(time_slot)}">
+  <input type="hidden" name="covers" value="{covers}">
+{fields}
+  <label>Special requests <textarea id="special-requests" name="requests"></textarea></label>
+  <button id="complete-reservation" type="submit">Complete reservation</button>
+</form>""")
+
+
+def render_confirmation(params: Dict[str, List[str]]) -> Optional[str]:
+    restaurant = find_restaurant(_query(params, "restaurant"))
+    if not restaurant:
+        return None
+    return _layout("Reservation confirmed", f"""
+<h1 id="confirmation-title">Reservation confirmed</h1>
+<p id="confirmation-details">You're all set! {html.escape(restaurant['name'])} at {html.escape(_query(params, 'time'))}
+for {_covers(params)} people under {html.escape(_query(params, 'first_name'))} {html.escape(_query(params, 'last_name'))}.</p>""")
+
+
+def route(path: str, params: Dict[str, List[str]]) -> Tuple[int, str]:
+    """경로 → (상태 코드, HTML)"""
+    parts = [p for p in path.split("/") if p]
+    page: Optional[str] = None
+    if not parts:
+        page = render_home(params)
+    elif parts == ["search"]:
+        page = render_search(params)
+    elif len(parts) == 2 and parts[0] == "r":
+        page = render_detail(parts[1], params)
+    elif len(parts) == 2 and parts[0] == "booking":
+        page = render_booking(parts[1], params)
+    elif parts == ["confirmation"]:
+        page = render_confirmation(params)
+    if page is None:
+        return 404, _layout("Not found", '<h1 id="not-found">Page not found</h1>')
+    return 200, page
+
+
+class MockSiteHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        status, page = route(url.path, parse_qs(url.query, keep_blank_values=True))
+        body = page.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 벤치마크 출력이 요청 로그로 덮이지 않도록 조용히 처리
+        pass
+
+
+def start_mock_site(host: str = MOCK_SITE_HOST, port: int = MOCK_SITE_PORT) -> ThreadingHTTPServer:
+    """백그라운드 스레드에서 목업 사이트 시작 (port=0이면 임의 포트). stop_mock_site()로 종료"""
+    server = ThreadingHTTPServer((host, port), MockSiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"🍽️ 목업 예약 사이트 시작: http://{host}:{server.server_address[1]}/")
+    return server
+
+
+def stop_mock_site(server: ThreadingHTTPServer):
+    """서빙 스레드를 멈추고 소켓도 닫음 (같은 프로세스에서 같은 포트로 다시 띄울 수 있도록)"""
+    server.shutdown()
+    server.server_close()
+
+
+if __name__ == "__main__":
+    server = start_mock_site()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stop_mock_site(server)
@@ -22,7 +22,7 @@ if __name__ == "__main__":
         "--wait_time_non_headless",
         type=int,
         default=5,
-        help="Time to wait between test tasks when running in non-headless mode (default: 10 seconds)",
+        help="Maximum time to wait for the network to go idle between test tasks in non-headless mode (default: 5 seconds)",
     )
     parser.add_argument(
         "-min",
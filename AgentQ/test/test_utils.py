@@ -1,17 +1,96 @@
 """Implements helper functions to assist evaluation cases where other evaluators are not suitable."""
 
+import asyncio
 import json
+import logging
 import os
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, NamedTuple, Optional, Union
 
 from dotenv import load_dotenv
 from nltk.tokenize import word_tokenize  # type: ignore
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+
+from agentq.llm_cache import LLMCache
 
 load_dotenv()
-client = OpenAI()
+logger = logging.getLogger(__name__)
+_client: Optional[OpenAI] = None
+_async_client: Optional[AsyncOpenAI] = None
+_grader_cache: Optional[LLMCache] = None
+
+GRADER_MODEL = os.getenv("AGENTQ_GRADER_MODEL", "gpt-4-turbo-preview")
+GRADER_CACHE_DIR = os.getenv("AGENTQ_GRADER_CACHE_DIR", ".agentq/grader_cache")
+
+
+def get_openai_client() -> OpenAI:
+    """Returns a lazily created OpenAI client so importing this module does not require an API key."""
+    global _client
+    if _client is None:
+        _client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
+    return _client
+
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """Returns a lazily created AsyncOpenAI client for the batched grader."""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncOpenAI(
+            api_key=os.environ["OPENAI_API_KEY"],
+            organization=os.environ.get("OPENAI_ORGANIZATION") or None,
+        )
+    return _async_client
+
+
+def get_grader_cache() -> LLMCache:
+    """Returns the on-disk verdict cache, keyed by a hash of (model, kind, pred, reference, question)."""
+    global _grader_cache
+    if _grader_cache is None:
+        _grader_cache = LLMCache(cache_dir=GRADER_CACHE_DIR)
+    return _grader_cache
+
+
+def _fuzzy_match_message(pred: str, reference: str, question: str) -> str:
+    message = "Help a teacher to grade the answer of a student given a question. Keep in mind that the student may use different phrasing or wording to answer the question. The goal is to evaluate whether the answer is semantically equivalent to the reference answer.\n"
+    message += f"question: {question}\n"
+    message += f"reference answer: {reference}\n"
+    message += "all the string 'N/A' that you see is a special sequence that means 'not achievable'\n"
+    message += f"student answer: {pred}\n"
+    message += "Conclude the judgement by correct/incorrect/partially correct."
+    return message
+
+
+def _ua_match_message(pred: str, reference: str, question: str) -> str:
+    message = ""
+    message += f"task: {question}\n"
+    message += f"actual unachievable reason: {reference}\n"
+    message += f"reported unachievable reason: {pred}\n"
+    message += (
+        "The task described above is inherently unachievable due to the reason specified under 'actual unachievable reason'. "
+        "An individual previously attempted this task and was unable to complete it. They provided a reason for their failure, "
+        "which is Listed under 'reported unachievable reason'. Your role is to review both the actual and reported reasons. "
+        "Determine if the reported reason aligns with the actual reason, even if implicitly. "
+        "If the stated reason is in line with the actual reason, respond with 'same'. Otherwise, respond with 'different'."
+    )
+    return message
+
+
+def _parse_fuzzy_verdict(response: str) -> float:
+    response = response.lower()
+    if "partially correct" in response or "incorrect" in response:
+        return 0.0
+    assert "correct" in response
+    return 1.0
+
+
+def _parse_ua_verdict(response: str) -> float:
+    response = response.lower()
+    if "different" in response:
+        return 0.0
+    assert "same" in response
+    return 1.0
 
 
 def llm_fuzzy_match(pred: str, reference: str, question: str) -> float:
@@ -30,12 +109,7 @@ def llm_fuzzy_match(pred: str, reference: str, question: str) -> float:
     """
     messages: List[Dict[str, Any]] = []
     # construct the question to ask
-    message = "Help a teacher to grade the answer of a student given a question. Keep in mind that the student may use different phrasing or wording to answer the question. The goal is to evaluate whether the answer is semantically equivalent to the reference answer.\n"
-    message += f"question: {question}\n"
-    message += f"reference answer: {reference}\n"
-    message += "all the string 'N/A' that you see is a special sequence that means 'not achievable'\n"
-    message += f"student answer: {pred}\n"
-    message += "Conclude the judgement by correct/incorrect/partially correct."
+    message = _fuzzy_match_message(pred, reference, question)
     messages = [
         {"role": "system", "content": "You are a helpful assistant"},
         {"role": "user", "content": message},
@@ -48,12 +122,8 @@ def llm_fuzzy_match(pred: str, reference: str, question: str) -> float:
         max_tokens=768,
         top_p=1.0,
         context_length=0,
-    ).lower()
-    if "partially correct" in response or "incorrect" in response:
-        return 0.0
-    else:
-        assert "correct" in response
-        return 1.0
+    )
+    return _parse_fuzzy_verdict(response)
 
 
 def llm_ua_match(pred: str, reference: str, question: str) -> float:
@@ -73,17 +143,7 @@ def llm_ua_match(pred: str, reference: str, question: str) -> float:
     """
     messages: List[Dict[str, Any]] = []
     # construct the question to ask
-    message = ""
-    message += f"task: {question}\n"
-    message += f"actual unachievable reason: {reference}\n"
-    message += f"reported unachievable reason: {pred}\n"
-    message += (
-        "The task described above is inherently unachievable due to the reason specified under 'actual unachievable reason'. "
-        "An individual previously attempted this task and was unable to complete it. They provided a reason for their failure, "
-        "which is Listed under 'reported unachievable reason'. Your role is to review both the actual and reported reasons. "
-        "Determine if the reported reason aligns with the actual reason, even if implicitly. "
-        "If the stated reason is in line with the actual reason, respond with 'same'. Otherwise, respond with 'different'."
-    )
+    message = _ua_match_message(pred, reference, question)
     messages = [
         {"role": "system", "content": "You are a helpful assistant"},
         {"role": "user", "content": message},
@@ -96,12 +156,124 @@ def llm_ua_match(pred: str, reference: str, question: str) -> float:
         max_tokens=768,
         top_p=1.0,
         context_length=0,
-    ).lower()
-    if "different" in response:
-        return 0.0
-    else:
-        assert "same" in response
+    )
+    return _parse_ua_verdict(response)
+
+
+class GradingItem(NamedTuple):
+    """One LLM-graded comparison: kind is "fuzzy" (semantic equivalence) or "ua" (unachievable reason)."""
+
+    kind: str
+    pred: str
+    reference: str
+    question: str
+
+
+def local_precheck(item: GradingItem) -> Optional[float]:
+    """Decides a grading item without the LLM only when the cleaned strings are identical.
+
+    Containment or similarity is not conclusive ("250" contains "25", "2023-01-16" is close
+    to "2023-01-15"), so every other item returns None and goes to the cache/LLM path.
+    exact_match and must_include are decided by the evaluator before items are built.
+    """
+    if clean_answer(item.pred) == clean_answer(item.reference):
         return 1.0
+    return None
+
+
+def _grading_key(item: GradingItem) -> str:
+    return LLMCache.make_key(GRADER_MODEL, 0, item.kind, item.pred, extra={"reference": item.reference, "question": item.question})
+
+
+async def _grade_single(item: GradingItem) -> float:
+    """Grades one item with its original single-answer prompt."""
+    message = _fuzzy_match_message(*item[1:]) if item.kind == "fuzzy" else _ua_match_message(*item[1:])
+    response = await generate_from_openai_chat_completion_async(
+        model=GRADER_MODEL,
+        messages=[
+            {"role": "system", "content": "You are a helpful assistant"},
+            {"role": "user", "content": message},
+        ],
+        temperature=0,
+        max_tokens=768,
+        top_p=1.0,
+    )
+    return _parse_fuzzy_verdict(response) if item.kind == "fuzzy" else _parse_ua_verdict(response)
+
+
+async def _grade_batch(items: List[GradingItem]) -> List[float]:
+    """Grades several items in one request, falling back to one request per item if the reply is unusable."""
+    if len(items) == 1:
+        return [await _grade_single(items[0])]
+
+    sections = []
+    for number, item in enumerate(items, start=1):
+        message = _fuzzy_match_message(*item[1:]) if item.kind == "fuzzy" else _ua_match_message(*item[1:])
+        sections.append(f"### Item {number}\n{message}")
+    message = (
+        "Grade each numbered item below independently, following the instructions inside the item.\n\n"
+        + "\n\n".join(sections)
+        + '\n\nRespond with a JSON object {"verdicts": [...]} holding exactly one verdict per item, in item order, '
+        "using only the words the item asks for (correct/incorrect/partially correct or same/different)."
+    )
+    response = await generate_from_openai_chat_completion_async(
+        model=GRADER_MODEL,
+        messages=[
+            {"role": "system", "content": "You are a helpful assistant"},
+            {"role": "user", "content": message},
+        ],
+        temperature=0,
+        max_tokens=64 + 16 * len(items),
+        top_p=1.0,
+        response_format={"type": "json_object"},
+    )
+    try:
+        verdicts = json.loads(response)["verdicts"]
+        if len(verdicts) != len(items):
+            raise ValueError(f"expected {len(items)} verdicts, got {len(verdicts)}")
+        return [
+            _parse_fuzzy_verdict(str(verdict)) if item.kind == "fuzzy" else _parse_ua_verdict(str(verdict))
+            for item, verdict in zip(items, verdicts)
+        ]
+    except (ValueError, KeyError, TypeError, AssertionError) as e:
+        logger.info(f"Batched grading reply unusable ({e}), grading items one by one")
+        return list(await asyncio.gather(*(_grade_single(item) for item in items)))
+
+
+async def grade_answers(items: List[GradingItem]) -> List[float]:
+    """Grades all items of a task: local pre-check, then the verdict cache, then one batched LLM request.
+
+    Parameters:
+        items (List[GradingItem]): The comparisons to grade.
+
+    Returns:
+        List[float]: 1.0 or 0.0 per item, in the same order.
+    """
+    scores: List[Optional[float]] = [local_precheck(item) for item in items]
+    cache = get_grader_cache()
+    pending: Dict[str, GradingItem] = {}
+    for index, item in enumerate(items):
+        if scores[index] is not None:
+            continue
+        key = _grading_key(item)
+        cached = cache.get(key)
+        if cached:
+            scores[index] = cached["value"]
+        else:
+            pending.setdefault(key, item)
+
+    if pending:
+        started = time.perf_counter()
+        verdicts = await _grade_batch(list(pending.values()))
+        latency = (time.perf_counter() - started) / len(pending)
+        graded = dict(zip(pending, verdicts))
+        for key, verdict in graded.items():
+            cache.put(key, "grade", verdict, latency)
+        for index, item in enumerate(items):
+            if scores[index] is None:
+                scores[index] = graded[_grading_key(item)]
+    logger.info(f"Graded {len(items)} item(s), {len(pending)} sent to the LLM")
+    return [float(score) for score in scores]
 
 
 def generate_from_openai_chat_completion(
@@ -138,6 +310,7 @@ def generate_from_openai_chat_completion(
         raise ValueError(
             "OPENAI_API_KEY environment variable must be set when using OpenAI API."
         )
+    client = get_openai_client()
     client.api_key = os.environ["OPENAI_API_KEY"]
     client.organization = os.environ.get("OPENAI_ORGANIZATION", "")
 
@@ -154,6 +327,37 @@ def generate_from_openai_chat_completion(
     return answer
 
 
+async def generate_from_openai_chat_completion_async(
+    messages: List[Dict[str, str]],
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    top_p: float,
+    response_format: Optional[Dict[str, str]] = None,
+) -> str:
+    """Async counterpart of `generate_from_openai_chat_completion` used by the batched grader.
+
+    Raises:
+        ValueError: If the 'OPENAI_API_KEY' environment variable is not set.
+    """
+    if "OPENAI_API_KEY" not in os.environ:
+        raise ValueError(
+            "OPENAI_API_KEY environment variable must be set when using OpenAI API."
+        )
+    kwargs: Dict[str, Any] = {"response_format": response_format} if response_format else {}
+    response = await get_async_openai_client().chat.completions.create(
+        model=model,
+        messages=messages,  # type: ignore
+        temperature=temperature,
+        max_tokens=max_tokens,
+        top_p=top_p,
+        n=1,
+        **kwargs,
+    )
+    answer: str = response.choices[0].message.content  # type: ignore
+    return answer
+
+
 def clean_answer(answer: str) -> str:
     """Cleans and preprocesses the answer string for evaluation.
 
@@ -17,6 +17,7 @@ from agentq.core.agent.planner_agent import PlannerAgent
 from agentq.core.models.models import State
 from agentq.core.orchestrator.orchestrator import Orchestrator
 from agentq.utils.logger import logger
+from agentq.waits import wait_for_network_idle
 from test.evaluators import evaluator_router
 from test.test_utils import (
     get_formatted_current_timestamp,
@@ -232,8 +233,10 @@ async def run_tests(
         save_individual_test_result(task_result, results_dir)
         print_test_result(task_result, index + 1, total_tests)
 
+        # Wait for the page's network to settle instead of sleeping a fixed time
+        # (wait_time_non_headless is only the upper bound)
         if not orchestrator.playwright_manager.isheadless:
-            await asyncio.sleep(wait_time_non_headless)
+            await wait_for_network_idle(page, timeout_s=wait_time_non_headless)
 
         await orchestrator.playwright_manager.take_screenshots("final", None)
         await orchestrator.playwright_manager.close_except_specified_tab(page)
@@ -1,8 +1,23 @@
 '''LLM 모델(OpenAI, Ollama 등) 초기화 및 관리 유틸리티'''
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any, List
 from abc import ABC, abstractmethod
 
+# 동시에 보낼 수 있는 LLM 요청 수 (행동 샘플링과 가치 함수 샘플링이 이 한도를 함께 씀)
+LLM_MAX_IN_FLIGHT = int(os.getenv('LLM_MAX_IN_FLIGHT', '8'))
+_in_flight = threading.BoundedSemaphore(LLM_MAX_IN_FLIGHT)
+_sampling_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _get_sampling_pool() -> ThreadPoolExecutor:
+    """샘플 요청을 보내는 스레드 풀 (실제 동시 요청 수는 _in_flight로 제한)"""
+    global _sampling_pool
+    if _sampling_pool is None:
+        _sampling_pool = ThreadPoolExecutor(max_workers=LLM_MAX_IN_FLIGHT * 4, thread_name_prefix="llm-sample")
+    return _sampling_pool
+
 
 class BaseLLMClient(ABC):
     """LLM 클라이언트 기본 클래스"""
@@ -12,6 +27,12 @@ class BaseLLMClient(ABC):
         """텍스트 생성"""
         pass
 
+    def generate_many(self, prompt: str, n: int, temperature: float = 0.7, max_tokens: int = 1000, top_p: float = None) -> List[str]:
+        """같은 프롬프트로 n개 샘플 생성 (기본 구현은 요청 n개를 동시에 보내고 샘플 순서대로 반환)"""
+        if n <= 1:
+            return [self.generate(prompt, temperature, max_tokens, top_p) for _ in range(n)]
+        return list(_get_sampling_pool().map(lambda _: self.generate(prompt, temperature, max_tokens, top_p), range(n)))
+
 
 class OpenAIClient(BaseLLMClient):
     """OpenAI API 클라이언트"""
@@ -38,11 +59,33 @@ class OpenAIClient(BaseLLMClient):
             if top_p is not None:
                 params["top_p"] = top_p
 
-            response = self.client.chat.completions.create(**params)
+            with _in_flight:
+                response = self.client.chat.completions.create(**params)
             return response.choices[0].message.content
         except Exception as e:
             return f"OpenAI API 오류: {str(e)}"
 
+    def generate_many(self, prompt: str, n: int, temperature: float = 0.7, max_tokens: int = 1000, top_p: float = None) -> List[str]:
+        """n개 샘플을 요청 하나(n 파라미터)로 생성"""
+        if n <= 1:
+            return [self.generate(prompt, temperature, max_tokens, top_p) for _ in range(n)]
+        try:
+            params = {
+                "model": self.model,
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "n": n,
+            }
+            if top_p is not None:
+                params["top_p"] = top_p
+
+            with _in_flight:
+                response = self.client.chat.completions.create(**params)
+            return [choice.message.content for choice in sorted(response.choices, key=lambda c: c.index)]
+        except Exception as e:
+            return [f"OpenAI API 오류: {str(e)}"] * n
+
 
 class OllamaClient(BaseLLMClient):
     """Ollama 로컬 LLM 클라이언트"""
@@ -53,7 +96,11 @@ class OllamaClient(BaseLLMClient):
         
         try:
             import requests
+            from requests.adapters import HTTPAdapter
             self.session = requests.Session()
+            # 동시 샘플 요청이 연결을 버리지 않고 재사용하도록 풀 크기를 동시 요청 한도에 맞춤
+            self.session.mount("http://", HTTPAdapter(pool_maxsize=LLM_MAX_IN_FLIGHT))
+            self.session.mount("https://", HTTPAdapter(pool_maxsize=LLM_MAX_IN_FLIGHT))
         except ImportError:
             raise ImportError("requests 패키지가 설치되지 않았습니다: pip install requests")
     
@@ -67,15 +114,18 @@ class OllamaClient(BaseLLMClient):
             if top_p is not None:
                 options["top_p"] = top_p
 
-            response = self.session.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": options
-                }
-            )
+            # Ollama는 n 샘플링을 지원하지 않아 generate_many에서 요청을 동시에 보냄
+            # (서버 쪽에서 실제로 병렬 처리하려면 OLLAMA_NUM_PARALLEL 설정 필요)
+            with _in_flight:
+                response = self.session.post(
+                    f"{self.base_url}/api/generate",
+                    json={
+                        "model": self.model,
+                        "prompt": prompt,
+                        "stream": False,
+                        "options": options
+                    }
+                )
             
             if response.status_code == 200:
                 return response.json().get("response", "")
@@ -125,6 +175,12 @@ class LLMManager:
         if not self.client:
             raise ValueError("LLM 클라이언트가 초기화되지 않았습니다.")
         return self.client.generate(prompt, temperature, max_tokens, top_p)
+
+    def generate_many(self, prompt: str, n: int, temperature: float = 0.7, max_tokens: int = 1000, top_p: float = None) -> List[str]:
+        """n개 샘플 생성 (OpenAI는 요청 하나, 그 외는 동시 요청)"""
+        if not self.client:
+            raise ValueError("LLM 클라이언트가 초기화되지 않았습니다.")
+        return self.client.generate_many(prompt, n, temperature, max_tokens, top_p)
     
     def get_client_info(self) -> Dict[str, Any]:
         """클라이언트 정보 반환"""
@@ -151,4 +207,10 @@ def get_llm_manager() -> LLMManager:
 def generate_text(prompt: str, temperature: float = 0.7, max_tokens: int = 1000, top_p: float = None) -> str:
     """편의 함수: 텍스트 생성"""
     manager = get_llm_manager()
-    return manager.generate(prompt, temperature, max_tokens, top_p)
\ No newline at end of file
+    return manager.generate(prompt, temperature, max_tokens, top_p)
+
+
+def generate_samples(prompt: str, n: int, temperature: float = 0.7, max_tokens: int = 1000, top_p: float = None) -> List[str]:
+    """편의 함수: 같은 프롬프트로 n개 샘플을 한 번에 생성 (결과는 샘플 순서대로)"""
+    manager = get_llm_manager()
+    return manager.generate_many(prompt, n, temperature, max_tokens, top_p)
@@ -7,10 +7,11 @@ import heapq
 import re
 from typing import List, Dict, Any
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 from state import SearchState, PrioritizedItem, Observation
 from tools import Action, transition, ActType
-from llm_utils import generate_text
+from llm_utils import generate_samples
 from prompt_utils import construct_prompt, construct_value_prompt
 from prompt import PROMPT
 
@@ -59,8 +60,8 @@ def value_function(state: Dict[str, Any]) -> float:
 
     scores = []
     num_samples = state['branching'] # 가치 함수 평가를 위한 샘플 수
-    for i in range(num_samples):
-        response = generate_text(prompt, temperature=0.7) # 가치 함수는 일관된 응답이 중요하므로 낮은 temperature
+    # 샘플을 동시에 생성 (가치 함수는 일관된 응답이 중요하므로 낮은 temperature)
+    for i, response in enumerate(generate_samples(prompt, num_samples, temperature=0.7)):
         # print(f"가치 함수 LLM 응답 (샘플 {i+1}/{num_samples}):\n{response}") # 디버깅용
         score_match = re.search(r"Final Score: (\d+\.?\d*)", response)
         if score_match:
@@ -181,8 +182,8 @@ def propose_actions(state: Dict[str, Any]) -> List[Action]:
     # 20번 샘플링하여 액션 후보 생성
     candidate_actions = []
     num_samples = state['branching']
-    for i in range(num_samples):
-        response = generate_text(prompt, temperature=1.0, top_p=0.95) # 핵 샘플링 적용
+    # 샘플을 동시에 생성 (핵 샘플링 적용), 결과는 샘플 순서대로 집계
+    for i, response in enumerate(generate_samples(prompt, num_samples, temperature=1.0, top_p=0.95)):
         # print(f"LLM 응답 (샘플 {i+1}/{num_samples}):\n{response}") # 디버깅용
         parsed_actions = parse_llm_action(response)
         if parsed_actions:
@@ -204,12 +205,15 @@ def initialize_state(state: SearchState) -> Dict[str, Any]:
     """에이전트의 첫 상태를 초기화합니다."""
     from tools import webshop_client
     print("---" + "- 1. 초기 상태 설정 ---")
-    initial_observation = webshop_client.reset()
+    # 초기 상태도 전용 세션에서 띄우고, 이후 모든 분기는 이 노드의 env에서 복원해 시작
+    session = webshop_client.restore(None)
+    initial_observation = webshop_client.reset(session=session)
 
     initial_agent_state = {
         "goal": state['goal'], "max_steps": state['max_steps'], "search_counter": 0,
         "branching": state['branching'], "budget": state['budget'],
-        "observation": initial_observation, "action_history": [], "best_score": -1.0,
+        "observation": initial_observation, "env": webshop_client.snapshot(session, initial_observation),
+        "action_history": [], "best_score": -1.0,
         "best_state": None, "done": False, "final_answer": None,
     }
 
@@ -248,10 +252,19 @@ def expand_frontier(state: SearchState) -> Dict[str, Any]:
 
     print(f"제안된 행동 후보: {[str(a) for a in actions]}")
 
-    for action in actions:
+    def expand_child(action: Action) -> tuple[Dict[str, Any], float]:
         next_state_update = transition(current_state, action)
         next_state = {**current_state, **next_state_update}
-        new_score = value_function(next_state)
+        return next_state, value_function(next_state)
+
+    # 전이는 노드마다 복원한 세션에서 실행되므로 자식별 전이+가치 평가를 동시에 실행
+    # (LLM 동시 요청 수는 llm_utils의 한도를 따름)
+    with ThreadPoolExecutor(max_workers=len(actions)) as pool:
+        children = list(pool.map(expand_child, actions))
+    next_states = [next_state for next_state, _ in children]
+    new_scores = [score for _, score in children]
+
+    for action, next_state, new_score in zip(actions, next_states, new_scores):
         print(f"  - 행동 '{action}' -> 새 상태 점수: {new_score:.4f}")
         frontier.push(new_score, next_state)
 
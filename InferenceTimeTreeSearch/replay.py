@@ -86,6 +86,9 @@ class ReplayLogger:
                     "result_count": len(obs.get('results', [])),
                     "cart_count": len(obs.get('cart', []))
                 }
+            elif key == 'env':
+                # 복원 핸들은 URL과 액션 경로만 저장 (쿠키는 남기지 않음)
+                serialized[key] = {"url": value.url, "actions": [str(a) for a in value.actions]} if value else None
             else:
                 serialized[key] = value
         
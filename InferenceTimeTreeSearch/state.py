@@ -54,6 +54,7 @@ class SearchState(TypedDict):
 
     # 현재 상태 정보
     observation: Observation
+    env: Optional[Any]  # tools.EnvHandle: 이 상태를 복원하기 위한 URL/쿠키/액션 경로
     action_history: List[str]
     
     # ITTS 관련
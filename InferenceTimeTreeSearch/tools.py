@@ -5,9 +5,10 @@ WebShop 환경과 상호작용하기 위한 액션(Action)과 도구(Tool)를 
 import os
 import re
 import requests
+from requests.adapters import HTTPAdapter
 from enum import Enum
 from dataclasses import dataclass, asdict
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from bs4 import BeautifulSoup
 
 # state.py에서 정의한 Observation과 Product를 가져옵니다.
@@ -30,6 +31,20 @@ class Action:
         """액션을 문자열로 표현"""
         return f"{self.type.value}('{self.parameter}')"
 
+@dataclass(frozen=True)
+class EnvHandle:
+    """
+    탐색 노드마다 들고 다니는 복원 가능한 환경 상태.
+    노드를 어떤 순서로 확장하든 그 노드가 만들어질 때의 페이지/세션에서 다음 액션을 실행하기 위해 사용합니다.
+    """
+    url: Optional[str] = None                            # 현재 페이지의 실제 URL
+    cookies: Tuple[Tuple[str, str, str, str], ...] = ()  # (name, value, domain, path)
+    actions: Tuple[Action, ...] = ()                     # 초기 상태부터의 액션 경로 (replay 복원용)
+
+# 'url': URL+쿠키로 복원 (기본), 'replay': 새 세션에서 reset 후 액션 경로를 다시 실행
+# (서버가 쿠키 밖에 상태를 두는 경우에도 분기끼리 섞이지 않지만 깊이만큼 요청이 늘어남)
+WEBSHOP_RESTORE_MODE = os.environ.get("WEBSHOP_RESTORE_MODE", "url").lower()
+
 # --- WebShop 클라이언트 ---
 
 class WebShopClient:
@@ -39,9 +54,45 @@ class WebShopClient:
     """
     def __init__(self, base_url: Optional[str] = None):
         self.base_url = base_url or os.environ.get("WEBSHOP_BASE_URL", "http://localhost:3000")
-        self.session = requests.Session()
+        # 분기마다 세션을 새로 만들어도 연결 풀은 공유 (세션 간 쿠키는 공유되지 않음)
+        self._adapter = HTTPAdapter(pool_maxsize=int(os.environ.get("LLM_MAX_IN_FLIGHT", "8")))
+        self.session = self.new_session()
+
+    def new_session(self) -> requests.Session:
+        """공유 연결 풀을 쓰는 빈 세션"""
+        session = requests.Session()
+        session.mount("http://", self._adapter)
+        session.mount("https://", self._adapter)
+        return session
+
+    def restore(self, handle: Optional[EnvHandle]) -> requests.Session:
+        """노드의 환경 상태를 담은 새 세션을 만듭니다 (handle이 없으면 빈 세션)."""
+        session = self.new_session()
+        if handle is None:
+            return session
+        if WEBSHOP_RESTORE_MODE == "replay":
+            observation = self.reset(session=session)
+            for action in handle.actions:
+                observation = self.step(action, observation, session=session)
+            return session
+        for name, value, domain, path in handle.cookies:
+            session.cookies.set(name, value, domain=domain, path=path)
+        return session
+
+    def snapshot(self, session: requests.Session, observation: Observation, actions: Tuple[Action, ...] = ()) -> EnvHandle:
+        """액션 실행 직후 세션/페이지 상태를 EnvHandle로 저장합니다."""
+        cookies = tuple((c.name, c.value, c.domain, c.path) for c in session.cookies)
+        return EnvHandle(url=observation.url, cookies=cookies, actions=tuple(actions))
+
+    def step(self, action: Action, current_observation: Observation, session: Optional[requests.Session] = None) -> Observation:
+        """액션 하나를 실행합니다."""
+        if action.type == ActType.SEARCH:
+            return self.search(action.parameter, session=session)
+        elif action.type == ActType.CHOOSE:
+            return self.choose(action.parameter, current_observation, session=session)
+        raise ValueError(f"Unsupported action type: {action.type}")
 
-    def _parse_html_observation(self, html_content: str, query: Optional[str] = None) -> Observation:
+    def _parse_html_observation(self, html_content: str, query: Optional[str] = None, url: str = "") -> Observation:
         """
         HTML 응답을 Observation 객체로 파싱합니다.
         성공한 테스트 스크립트의 파싱 로직을 기반으로 합니다.
@@ -98,7 +149,7 @@ class WebShopClient:
         has_search_bar = soup.find('input', {'name': 'search_query'}) is not None
 
         return Observation(
-            url="", # self.session.get_redirect_history()는 response 객체에서만 사용 가능하여 임시 처리
+            url=url, # 리다이렉트를 따라간 뒤의 실제 URL (response.url)
             query=query,
             page=1, # TODO: 페이지 정보 파싱 필요
             sort=None, # TODO: 정렬 정보 파싱 필요
@@ -109,33 +160,36 @@ class WebShopClient:
             html=html_content
         )
 
-    def reset(self) -> Observation:
+    def reset(self, session: Optional[requests.Session] = None) -> Observation:
         """환경을 초기화하고 초기 관찰값을 반환합니다."""
+        session = session or self.session
         try:
-            response = self.session.get(f"{self.base_url}/", timeout=10)
+            response = session.get(f"{self.base_url}/", timeout=10)
             response.raise_for_status()
-            return self._parse_html_observation(response.text)
+            return self._parse_html_observation(response.text, url=response.url)
         except requests.RequestException as e:
             print(f"Error during reset: {e}")
             return Observation(url=None, query=None, page=1, sort=None, filters={}, results=[], cart=[], available_actions={'has_search_bar': False, 'clickables': []}, html=str(e))
 
-    def search(self, query: str) -> Observation:
+    def search(self, query: str, session: Optional[requests.Session] = None) -> Observation:
         """'search[query]' 액션을 실행합니다."""
+        session = session or self.session
         try:
-            response = self.session.post(
+            response = session.post(
                 f"{self.base_url}/abc", # WebShop의 검색 URL 경로
                 data={'search_query': query},
                 timeout=10,
                 allow_redirects=True
             )
             response.raise_for_status()
-            return self._parse_html_observation(response.text, query=query)
+            return self._parse_html_observation(response.text, query=query, url=response.url)
         except requests.RequestException as e:
             print(f"Error during search: {e}")
             return Observation(url=None, query=query, page=1, sort=None, filters={}, results=[], cart=[], available_actions={'has_search_bar': False, 'clickables': []}, html=str(e))
 
-    def choose(self, target: str, current_observation: Observation) -> Observation:
+    def choose(self, target: str, current_observation: Observation, session: Optional[requests.Session] = None) -> Observation:
         """'choose[button_text]' 액션을 실행합니다."""
+        session = session or self.session
         try:
             clickable_map = current_observation.available_actions.get('clickables', {})
             action_url = clickable_map.get(target)
@@ -146,20 +200,20 @@ class WebShopClient:
                     # For now, we'll assume it's a simple click that might refresh the page or trigger JS.
                     # A robust solution would require finding the form and submitting it.
                     # For now, we'll just go to the current URL as a fallback.
-                    response = self.session.get(current_observation.url or f"{self.base_url}/", timeout=10)
+                    response = session.get(current_observation.url or f"{self.base_url}/", timeout=10)
                 elif action_url.startswith('/'): # Relative URL
-                    response = self.session.get(f"{self.base_url}{action_url}", timeout=10)
+                    response = session.get(f"{self.base_url}{action_url}", timeout=10)
                 else: # Absolute URL
-                    response = self.session.get(action_url, timeout=10)
+                    response = session.get(action_url, timeout=10)
             else:
                 # Fallback if the target is not found in clickable_map
                 # This might happen if LLM hallucinates an action or if it's a complex form submission.
                 # For now, go to the home page.
                 print(f"경고: '{target}'에 해당하는 클릭 가능한 액션을 찾을 수 없습니다. 홈 페이지로 이동합니다.")
-                response = self.session.get(f"{self.base_url}/", timeout=10)
+                response = session.get(f"{self.base_url}/", timeout=10)
 
             response.raise_for_status()
-            return self._parse_html_observation(response.text)
+            return self._parse_html_observation(response.text, url=response.url)
         except requests.RequestException as e:
             print(f"Error during choose: {e}")
             return Observation(url=None, query=None, page=1, sort=None, filters={}, results=[], cart=[], available_actions={'has_search_bar': False, 'clickables': {}}, html=str(e))
@@ -172,15 +226,15 @@ webshop_client = WebShopClient()
 def transition(state: Dict[str, Any], action: Action) -> Dict[str, Any]:
     """
     주어진 상태(state)에서 액션(action)을 수행하고 다음 상태를 반환합니다.
+    state의 env(EnvHandle)로 복원한 전용 세션에서 실행하므로 다른 분기의 실행 순서와 무관하고,
+    서로 다른 노드의 전이를 동시에 실행해도 됩니다.
     """
-    if action.type == ActType.SEARCH:
-        new_observation = webshop_client.search(action.parameter)
-    elif action.type == ActType.CHOOSE:
-        new_observation = webshop_client.choose(action.parameter, state['observation'])
-    else:
-        raise ValueError(f"Unsupported action type: {action.type}")
+    env: Optional[EnvHandle] = state.get("env")
+    session = webshop_client.restore(env)
+    new_observation = webshop_client.step(action, state['observation'], session=session)
 
     return {
         "observation": new_observation,
         "action_history": state.get("action_history", []) + [str(action)],
+        "env": webshop_client.snapshot(session, new_observation, (env.actions if env else ()) + (action,)),
     }